@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for the Teknik Servis backend
+Usage: python manage.py <command>
+"""
+
+import argparse
+import asyncio
+
+import server
+
+
+async def check_indexes():
+    """Report every hot query whose explain() plan is a COLLSCAN"""
+    print(f"Checking {len(server.HOT_QUERIES)} hot queries on database '{server.db_name}'...")
+    scans = await server.find_collection_scans()
+    if not scans:
+        print("✅ Every hot query is served by an index")
+        return 0
+    
+    for scan in scans:
+        print(f"❌ COLLSCAN on {scan['collection']}: filter={scan['filter']} sort={scan['sort']}")
+    return 1
+
+
+async def rebuild_search():
+    """Recompute the folded search fields behind /api/search"""
+    counts = await server.rebuild_search_fields()
+    for collection_name, count in counts.items():
+        print(f"✅ {collection_name}: {count} documents reindexed")
+    return 0
+
+
+async def reconcile_stats():
+    """Rebuild stats_counters from the source collections and report drift"""
+    drift = await server.rebuild_stats_counters()
+    if not drift:
+        print("✅ Stats counters were in sync")
+        return 0
+    
+    for entry in drift:
+        print(f"⚠️  {entry['scope']}.{entry['field']}: counter was {entry['actual']}, actual {entry['expected']}")
+    print(f"✅ Rebuilt stats counters ({len(drift)} values corrected)")
+    return 0
+
+
+async def backfill_rollups():
+    """Rebuild the daily repair rollups from the full repair history"""
+    buckets = await server.rebuild_repair_rollups()
+    print(f"✅ Rebuilt repair_rollups: {buckets} (day, technician, status) buckets")
+    return 0
+
+
+async def rebuild_visibility():
+    """Recompute visible_to_technicians on every repair"""
+    updated = await server.rebuild_repair_visibility()
+    print(f"✅ visible_to_technicians recomputed on {updated} repairs")
+    return 0
+
+
+async def migrate_dates():
+    """Convert ISO string timestamps to BSON dates (resumable)"""
+    converted = await server.migrate_dates()
+    if not converted:
+        print("✅ Timestamps were already migrated")
+        return 0
+    
+    for collection_name, count in converted.items():
+        print(f"✅ {collection_name}: {count} timestamps converted")
+    return 0
+
+
+async def rebuild_notification_counters():
+    """Move legacy notifications into admin inboxes and recount every unread counter"""
+    migrated = await server.migrate_legacy_notifications()
+    if migrated:
+        print(f"✅ {migrated} legacy notifications moved into admin inboxes")
+    inboxes = await server.rebuild_notification_counters()
+    print(f"✅ Unread counters rebuilt for {inboxes} inboxes")
+    return 0
+
+
+async def compact_notifications():
+    """Archive old unread notifications into monthly collections and expire read ones"""
+    result = await server.compact_notifications()
+    for collection_name, count in result["archived"].items():
+        print(f"✅ {collection_name}: {count} notifications archived")
+    print(f"✅ {result['expiring']} read notifications given an expiry")
+    return 0
+
+
+COMMANDS = {
+    "check-indexes": check_indexes,
+    "rebuild-search": rebuild_search,
+    "reconcile-stats": reconcile_stats,
+    "backfill-rollups": backfill_rollups,
+    "rebuild-visibility": rebuild_visibility,
+    "migrate-dates": migrate_dates,
+    "rebuild-notification-counters": rebuild_notification_counters,
+    "compact-notifications": compact_notifications,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teknik Servis maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    
+    try:
+        return asyncio.run(COMMANDS[args.command]())
+    finally:
+        server.client.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,11 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, ReturnDocument, UpdateOne, ReplaceOne, InsertOne
 from passlib.context import CryptContext
 import os
 import logging
@@ -14,20 +16,39 @@ import uuid
 from datetime import datetime, timedelta, timezone
 import jwt
 import hashlib
+import json
+import orjson
+import re
+import unicodedata
+import secrets
 import base64
 import shutil
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from collections import OrderedDict
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / ".env")
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt runs on a bounded thread pool so a login burst cannot stall the event loop
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', '64'))
+
+# String-to-date migration: a resumable background task started with the server, or
+# "python manage.py migrate-dates" when DATE_MIGRATION_ON_STARTUP=false. Reads accept
+# string and native timestamps side by side until it completes.
+DATE_MIGRATION_ON_STARTUP = os.environ.get('DATE_MIGRATION_ON_STARTUP', 'true').lower() == 'true'
+DATE_MIGRATION_BATCH_SIZE = int(os.environ.get('DATE_MIGRATION_BATCH_SIZE', '500'))
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# tz_aware: stored dates come back as UTC datetimes rather than naive ones
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 # Use Emergent's default database name or from env
 db_name = os.environ.get('DB_NAME', 'test')  # Emergent uses 'test' as default
 db = client[db_name]
@@ -36,8 +57,61 @@ db = client[db_name]
 SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get('REFRESH_TOKEN_EXPIRE_DAYS', '14'))
+# "stateless": require_role authorizes from the signed token claims (id, role, active flag)
+# "database": every authenticated request re-reads the user document
+AUTH_MODE = os.environ.get('AUTH_MODE', 'stateless')
+TOKEN_EPOCH_REFRESH_SECONDS = int(os.environ.get('TOKEN_EPOCH_REFRESH_SECONDS', '30'))
+
+# In-process cache for the user document read by get_current_user
+USER_CACHE_ENABLED = os.environ.get('USER_CACHE_ENABLED', 'true').lower() == 'true'
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', '60'))
+USER_CACHE_MAX_SIZE = int(os.environ.get('USER_CACHE_MAX_SIZE', '1024'))
+
+# List pagination: a page is at most PAGE_LIMIT_MAX rows; clients follow X-Next-Cursor
+# (sent back as ?after=) until it is absent
+PAGE_LIMIT_DEFAULT = int(os.environ.get('PAGE_LIMIT_DEFAULT', '100'))
+PAGE_LIMIT_MAX = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+LEADERBOARD_CACHE_MAX_SIZE = int(os.environ.get('LEADERBOARD_CACHE_MAX_SIZE', '64'))
+# Delta sync: tombstones outlive the longest gap a client may poll after; a caught-up
+# watermark is set this many seconds back so writes from skewed clocks are not missed
+REPAIR_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('REPAIR_TOMBSTONE_RETENTION_DAYS', '30'))
+CHANGES_OVERLAP_SECONDS = int(os.environ.get('CHANGES_OVERLAP_SECONDS', '5'))
+NOTIFICATION_STREAM_HEARTBEAT_SECONDS = float(os.environ.get('NOTIFICATION_STREAM_HEARTBEAT_SECONDS', '15'))
+NOTIFICATION_STREAM_QUEUE_SIZE = int(os.environ.get('NOTIFICATION_STREAM_QUEUE_SIZE', '100'))
+NOTIFICATION_STREAM_REPLAY_LIMIT = int(os.environ.get('NOTIFICATION_STREAM_REPLAY_LIMIT', '100'))
+# EventSource cannot send headers: browsers trade their access token for a one-time
+# ticket that is valid this many seconds, so the token never appears in a URL
+NOTIFICATION_STREAM_TICKET_SECONDS = int(os.environ.get('NOTIFICATION_STREAM_TICKET_SECONDS', '30'))
+# "oldest": a full subscriber queue drops its oldest event; "disconnect": the slow stream
+# is closed and the browser reconnects, replaying what it missed through Last-Event-ID
+NOTIFICATION_STREAM_DROP_POLICY = os.environ.get('NOTIFICATION_STREAM_DROP_POLICY', 'oldest')
+# "memory": one process; "mongo": a change stream on stream_events fans events out to
+# every uvicorn worker (needs a replica set)
+NOTIFICATION_BROKER = os.environ.get('NOTIFICATION_BROKER', 'memory')
+NOTIFICATION_BROKER_EVENT_TTL_SECONDS = int(os.environ.get('NOTIFICATION_BROKER_EVENT_TTL_SECONDS', '3600'))
+NOTIFICATION_BROKER_RETRY_SECONDS = float(os.environ.get('NOTIFICATION_BROKER_RETRY_SECONDS', '5'))
+# Write-behind notification inserts: a batch is flushed once it holds FLUSH_SIZE items or
+# its oldest item has waited FLUSH_LATENCY_MS. A full queue makes callers wait up to
+# ENQUEUE_TIMEOUT_SECONDS, then the notification is written inline.
+NOTIFICATION_WRITE_BEHIND = os.environ.get('NOTIFICATION_WRITE_BEHIND', 'true').lower() == 'true'
+NOTIFICATION_FLUSH_SIZE = int(os.environ.get('NOTIFICATION_FLUSH_SIZE', '100'))
+NOTIFICATION_FLUSH_LATENCY_MS = float(os.environ.get('NOTIFICATION_FLUSH_LATENCY_MS', '200'))
+NOTIFICATION_WRITE_QUEUE_SIZE = int(os.environ.get('NOTIFICATION_WRITE_QUEUE_SIZE', '10000'))
+NOTIFICATION_ENQUEUE_TIMEOUT_SECONDS = float(os.environ.get('NOTIFICATION_ENQUEUE_TIMEOUT_SECONDS', '1'))
+# Retention: read notifications expire (TTL) READ_RETENTION_DAYS after being read; unread
+# ones older than ARCHIVE_AFTER_DAYS move to notifications_archive_YYYY_MM. The archive
+# pass runs every RETENTION_INTERVAL_HOURS (0 disables the background pass).
+NOTIFICATION_READ_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_READ_RETENTION_DAYS', '30'))
+NOTIFICATION_ARCHIVE_AFTER_DAYS = int(os.environ.get('NOTIFICATION_ARCHIVE_AFTER_DAYS', '90'))
+NOTIFICATION_RETENTION_INTERVAL_HOURS = float(os.environ.get('NOTIFICATION_RETENTION_INTERVAL_HOURS', '24'))
+# YYYY-MM-DD date-range query parameters
+DAY_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
 
 security = HTTPBearer()
+# EventSource cannot set headers, so the notification stream also takes a one-time ?ticket=
+stream_security = HTTPBearer(auto_error=False)
 
 # Create the main app without a prefix
 app = FastAPI(title="Teknik Servis API")
@@ -95,6 +169,10 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: User
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class Customer(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -105,6 +183,12 @@ class Customer(BaseModel):
     created_by_technician: Optional[str] = None  # Müşteriyi ekleyen teknisyen ID'si
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class CustomerSuggestion(BaseModel):
+    id: str
+    full_name: str
+    phone: str
+    email: Optional[str] = None
+
 class CustomerCreate(BaseModel):
     full_name: str
     email: Optional[EmailStr] = None
@@ -128,6 +212,7 @@ class RepairRequest(BaseModel):
     final_cost: Optional[float] = None
     payment_status: PaymentStatus = PaymentStatus.PENDING
     created_by: str
+    customer_phone: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     completed_at: Optional[datetime] = None
@@ -155,6 +240,7 @@ class Notification(BaseModel):
     title: str
     message: str
     related_id: Optional[str] = None  # ID of the related customer or repair
+    recipient_id: Optional[str] = None  # Inbox owner: one document per recipient
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     read: bool = False
     # Enhanced fields for frontend linking
@@ -164,6 +250,14 @@ class Notification(BaseModel):
     device_info: Optional[str] = None
     new_status: Optional[str] = None
 
+def read_marker() -> dict:
+    """$set for marking notifications read; the TTL index removes them after retention"""
+    now = datetime.now(timezone.utc)
+    return {"read": True, "read_at": now, "expires_at": now + timedelta(days=NOTIFICATION_READ_RETENTION_DAYS)}
+
+class NotificationReadRequest(BaseModel):
+    ids: Optional[List[str]] = None  # None marks the whole inbox read
+
 
 class StockCategory(str, Enum):
     SPARE_PART = "yedek_parca"
@@ -253,6 +347,67 @@ def get_password_hash(password):
     """Hash a password using bcrypt"""
     return pwd_context.hash(password)
 
+class PasswordHasher:
+    """Runs bcrypt on a dedicated thread pool with at most `workers` calls in flight.
+    
+    Callers beyond `max_queue` waiting get a 503 instead of piling up."""
+    
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.semaphore = None
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_waiting_seen = 0
+    
+    async def run(self, func, *args):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.workers)
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"}
+            )
+        
+        self.waiting += 1
+        self.max_waiting_seen = max(self.max_waiting_seen, self.waiting)
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self.semaphore.release()
+    
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+    
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.waiting,
+            "max_queue_depth": self.max_waiting_seen,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -263,27 +418,197 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    credentials_exception = HTTPException(
+def hash_refresh_token(refresh_token: str) -> str:
+    """Refresh tokens are 256-bit random strings, so a fast digest is enough to store them"""
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+async def issue_refresh_token(user_id: str, family_id: Optional[str] = None) -> str:
+    """Store a new refresh token; rotations of one login share a family_id"""
+    refresh_token = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    await db.refresh_tokens.insert_one({
+        "id": str(uuid.uuid4()),
+        "token_hash": hash_refresh_token(refresh_token),
+        "family_id": family_id or str(uuid.uuid4()),
+        "user_id": user_id,
+        "used": False,
+        "created_at": now,
+        "expires_at": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    })
+    return refresh_token
+
+def user_token_claims(user: dict) -> dict:
+    """Claims embedded in an access token so role checks need no user lookup"""
+    return {
+        "sub": user["email"],
+        "uid": user["id"],
+        "role": user["role"],
+        "name": user["full_name"],
+        "phone": user.get("phone"),
+        "active": user.get("is_active", True),
+        "epoch": user.get("token_epoch", 0)
+    }
+
+class TokenEpochs:
+    """In-process mirror of users.token_epoch, refreshed every TOKEN_EPOCH_REFRESH_SECONDS.
+    
+    Bumping a user's epoch revokes every token issued before the bump. Deleted users
+    take their token_epoch with them, so their revoked epoch is kept in
+    token_revocations until every access token they could hold has expired."""
+    
+    def __init__(self, refresh_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self.epochs = {}
+        self.refreshed_at = None
+    
+    async def current(self, user_id: str) -> int:
+        now = time.monotonic()
+        if self.refreshed_at is None or now - self.refreshed_at >= self.refresh_seconds:
+            self.refreshed_at = now
+            epochs = {}
+            async for user in db.users.find({"token_epoch": {"$gt": 0}}, {"_id": 0, "id": 1, "token_epoch": 1}):
+                epochs[user["id"]] = user["token_epoch"]
+            async for revocation in db.token_revocations.find({}, {"token_epoch": 1}):
+                epochs[revocation["_id"]] = max(epochs.get(revocation["_id"], 0), revocation["token_epoch"])
+            self.epochs = epochs
+        return self.epochs.get(user_id, 0)
+    
+    async def bump(self, user_id: str):
+        """Revoke the user's outstanding tokens"""
+        user = await db.users.find_one_and_update(
+            {"id": user_id},
+            {"$inc": {"token_epoch": 1}},
+            projection={"token_epoch": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if user:
+            self.epochs[user_id] = user["token_epoch"]
+    
+    async def revoke_deleted(self, users: List[dict]):
+        """Revoke the tokens of users about to be deleted"""
+        if not users:
+            return
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        await db.token_revocations.bulk_write([
+            UpdateOne(
+                {"_id": user["id"]},
+                {"$set": {"token_epoch": user.get("token_epoch", 0) + 1, "expires_at": expires_at}},
+                upsert=True
+            )
+            for user in users
+        ], ordered=False)
+        for user in users:
+            self.epochs[user["id"]] = user.get("token_epoch", 0) + 1
+
+token_epochs = TokenEpochs(TOKEN_EPOCH_REFRESH_SECONDS)
+
+class UserCache:
+    """LRU cache of user documents keyed by email, with a per-entry TTL.
+    
+    Writers that touch a user call invalidate(); the TTL bounds staleness
+    for writes made by other workers."""
+    
+    def __init__(self, enabled: bool, ttl_seconds: float, max_size: int):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    async def get(self, email: str) -> Optional[dict]:
+        if not self.enabled:
+            return await db.users.find_one({"email": email})
+        
+        entry = self.entries.get(email)
+        if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+            self.entries.move_to_end(email)
+            self.hits += 1
+            return dict(entry[1])
+        
+        self.misses += 1
+        user = await db.users.find_one({"email": email})
+        if user is None:
+            self.entries.pop(email, None)
+            return None
+        self.entries[email] = (time.monotonic(), user)
+        self.entries.move_to_end(email)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return dict(user)
+    
+    def invalidate(self, email: Optional[str] = None):
+        """Drop one user, or every user when email is None"""
+        if email is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(email, None)
+    
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+user_cache = UserCache(USER_CACHE_ENABLED, USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_SIZE)
+
+def credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def decode_access_token(token: str) -> dict:
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except jwt.PyJWTError:
-        raise credentials_exception
+        raise credentials_exception()
+    if payload.get("sub") is None:
+        raise credentials_exception()
+    return payload
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    payload = decode_access_token(credentials.credentials)
     
-    user = await db.users.find_one({"email": email})
+    user = await user_cache.get(payload["sub"])
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
+    if "epoch" in payload and payload["epoch"] < user.get("token_epoch", 0):
+        raise credentials_exception()
     return User(**user)
 
+async def get_token_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Authenticate from token claims alone when AUTH_MODE is stateless"""
+    if AUTH_MODE != "stateless":
+        return await get_current_user(credentials)
+    
+    payload = decode_access_token(credentials.credentials)
+    # Tokens issued before role claims existed still go through the user lookup
+    if "uid" not in payload:
+        return await get_current_user(credentials)
+    
+    if not payload.get("active", True):
+        raise credentials_exception()
+    if payload.get("epoch", 0) < await token_epochs.current(payload["uid"]):
+        raise credentials_exception()
+    
+    # Claims are signed by us, so skip re-validating them
+    return User.model_construct(
+        id=payload["uid"],
+        email=payload["sub"],
+        full_name=payload["name"],
+        role=UserRole(payload["role"]),
+        phone=payload.get("phone"),
+        is_active=True
+    )
+
 def require_role(required_roles: List[UserRole]):
-    def role_checker(current_user: User = Depends(get_current_user)):
+    def role_checker(current_user: User = Depends(get_token_user)):
         if current_user.role not in required_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -292,8 +617,481 @@ def require_role(required_roles: List[UserRole]):
         return current_user
     return role_checker
 
-async def create_notification(notification_type: str, title: str, message: str, related_id: str, extra_data: dict = None):
-    """Helper function to create notifications"""
+def encode_cursor(document: dict) -> str:
+    """Encode the (created_at, id) keyset position of a document as an opaque cursor"""
+    created_at = document["created_at"]
+    payload = {"id": document["id"]}
+    if isinstance(created_at, datetime):
+        payload["created_at"] = created_at.isoformat()
+    else:
+        # Not yet converted by migrate_dates
+        payload["created_at_text"] = created_at
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def cursor_filter(cursor: str, descending: bool = False) -> dict:
+    """Build the Mongo filter matching documents strictly after a cursor position"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if "created_at_text" in payload:
+            created_at = str(payload["created_at_text"])
+        else:
+            created_at = datetime.fromisoformat(payload["created_at"])
+        last_id = payload["id"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    after = "$lt" if descending else "$gt"
+    conditions = [
+        {"created_at": {after: created_at}},
+        {"created_at": created_at, "id": {after: last_id}}
+    ]
+    # Until migrate_dates completes, unconverted strings sort before every date (BSON
+    # type order) and range operators only compare values of the same type
+    if isinstance(created_at, datetime) and descending:
+        conditions.append({"created_at": {"$type": "string"}})
+    elif isinstance(created_at, str) and not descending:
+        conditions.append({"created_at": {"$type": "date"}})
+    return {"$or": conditions}
+
+async def fetch_page(collection, query: dict, limit: int, after: Optional[str] = None, projection: dict = None, build=None, descending: bool = False):
+    """Read one keyset page ordered by (created_at, id), newest first when `descending`.
+    
+    Documents are streamed from the cursor and passed through `build` one at a time,
+    so a page is never materialized twice. Returns (items, next_cursor)."""
+    if after:
+        query = {"$and": [query, cursor_filter(after, descending)]} if query else cursor_filter(after, descending)
+    
+    direction = DESCENDING if descending else ASCENDING
+    cursor = collection.find(query, projection).sort([("created_at", direction), ("id", direction)]).limit(limit + 1)
+    items = []
+    last_position = None
+    has_more = False
+    async for document in cursor:
+        if len(items) == limit:
+            has_more = True
+            break
+        # Keep the raw keyset position; build() may consume the document
+        last_position = {"created_at": document.get("created_at"), "id": document["id"]}
+        items.append(build(document) if build else document)
+    
+    next_cursor = encode_cursor(last_position) if has_more else None
+    return items, next_cursor
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+# List endpoints read documents this API wrote itself, so validating every row into
+# the model and then again through response_model is wasted work. The fast path fills
+# defaults with model_construct, keeps the plain field dict, and encodes it with orjson.
+# ?fields= trims list rows to a sparse fieldset; id and the (created_at, id) page
+# position are always kept
+SPARSE_REQUIRED_FIELDS = {"id", "created_at"}
+FIELDS_DESCRIPTION = "Comma-separated fields to return, e.g. fields=id,status,customer_name. id and created_at are always included."
+
+def sparse_fields(model, fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a ?fields= value into `model` field names; None means every field"""
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested - set(model.model_fields))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return [name for name in model.model_fields if name in requested or name in SPARSE_REQUIRED_FIELDS]
+
+def model_projection(model, fields: Optional[List[str]] = None) -> dict:
+    """Fetch only the model's fields (or the sparse subset), leaving out search and visibility helpers"""
+    return {"_id": 0, **{name: 1 for name in (fields or model.model_fields)}}
+
+def trusted_row(model, fields: Optional[List[str]] = None):
+    """fetch_page `build` callback producing `model`'s fields without validation.
+    
+    This is what model_construct does, minus building the model instance."""
+    fields = [(name, model.model_fields[name]) for name in (fields or model.model_fields)]
+    def build(document: dict) -> dict:
+        return {
+            name: document[name] if name in document else field.get_default(call_default_factory=True)
+            for name, field in fields
+        }
+    return build
+
+def page_response(items: list, next_cursor: Optional[str], etag: Optional[str] = None) -> ORJSONResponse:
+    """Encode a page with orjson; returning a Response skips response_model validation"""
+    response = ORJSONResponse(items, headers=etag_headers(etag) if etag else None)
+    set_next_cursor(response, next_cursor)
+    return response
+
+async def attach_customer_phones(repairs: List[dict]):
+    """Refresh customer_phone on repair documents with a single $in customer lookup"""
+    customer_ids = list({repair["customer_id"] for repair in repairs if repair.get("customer_id")})
+    if not customer_ids:
+        return repairs
+    
+    phones = {}
+    async for customer in db.customers.find({"id": {"$in": customer_ids}}, {"_id": 0, "id": 1, "phone": 1}):
+        phones[customer["id"]] = customer.get("phone", "")
+    
+    for repair in repairs:
+        if repair.get("customer_id") in phones:
+            repair["customer_phone"] = phones[repair["customer_id"]]
+    return repairs
+
+def repair_visibility(repair: dict, customer: Optional[dict]) -> List[str]:
+    """Ids stored in visible_to_technicians: the assigned technician, the creator and
+    the technician who owns the customer. Technician reads match on this one field."""
+    user_ids = [
+        repair.get("assigned_technician_id"),
+        repair.get("created_by"),
+        customer.get("created_by_technician") if customer else None
+    ]
+    return sorted({user_id for user_id in user_ids if user_id})
+
+async def rebuild_repair_visibility(database=None, only_missing: bool = False, batch_size: int = 500) -> int:
+    """Recompute visible_to_technicians on repairs; returns the number updated"""
+    database = db if database is None else database
+    owners = {}
+    async for customer in database.customers.find(
+        {"created_by_technician": {"$nin": [None, ""]}}, {"_id": 0, "id": 1, "created_by_technician": 1}
+    ):
+        owners[customer["id"]] = customer
+    
+    query = {"visible_to_technicians": {"$exists": False}} if only_missing else {}
+    projection = {"customer_id": 1, "assigned_technician_id": 1, "created_by": 1}
+    operations = []
+    updated = 0
+    async for repair in database.repairs.find(query, projection):
+        visibility = repair_visibility(repair, owners.get(repair.get("customer_id")))
+        operations.append(UpdateOne({"_id": repair["_id"]}, {"$set": {"visible_to_technicians": visibility}}))
+        if len(operations) >= batch_size:
+            await database.repairs.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await database.repairs.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    return updated
+
+# Turkish letters are folded to ASCII before tokenizing, so "çini", "Çini" and "cini"
+# index and search the same way. İ/I/ı all fold to "i".
+TURKISH_FOLD = str.maketrans({
+    "ç": "c", "Ç": "c", "ğ": "g", "Ğ": "g", "ı": "i", "I": "i", "İ": "i",
+    "ö": "o", "Ö": "o", "ş": "s", "Ş": "s", "ü": "u", "Ü": "u",
+    "â": "a", "Â": "a", "î": "i", "Î": "i", "û": "u", "Û": "u"
+})
+SEARCH_MIN_PREFIX = 2
+SEARCH_MAX_PREFIX = 15
+
+def fold_turkish(text: str) -> str:
+    folded = unicodedata.normalize("NFKD", text.translate(TURKISH_FOLD).lower())
+    return "".join(ch for ch in folded if not unicodedata.combining(ch))
+
+def search_tokens(*values) -> List[str]:
+    """Folded alphanumeric tokens of the given field values"""
+    tokens = []
+    for value in values:
+        if value:
+            tokens.extend(re.findall(r"[a-z0-9]+", fold_turkish(str(value))))
+    return tokens
+
+def phone_tokens(phone: Optional[str]) -> List[str]:
+    """Digit-only phone number, with and without the leading trunk 0"""
+    digits = "".join(filter(str.isdigit, phone or ""))
+    if not digits:
+        return []
+    return [digits, digits.lstrip("0")] if digits.startswith("0") else [digits]
+
+def index_terms(tokens: List[str]) -> str:
+    """Tokens plus their edge prefixes, so a partially typed word still matches"""
+    terms = []
+    seen = set()
+    for token in tokens:
+        for length in range(min(SEARCH_MIN_PREFIX, len(token)), min(len(token), SEARCH_MAX_PREFIX) + 1):
+            term = token[:length]
+            if term not in seen:
+                seen.add(term)
+                terms.append(term)
+    return " ".join(terms)
+
+def customer_search_fields(customer: dict) -> dict:
+    """Folded text-search fields plus the name_words/phone_keys typeahead keys"""
+    return {
+        "name_words": sorted(set(search_tokens(customer.get("full_name")))),
+        "phone_keys": phone_tokens(customer.get("phone")),
+        "search_primary": index_terms(search_tokens(customer.get("full_name"), customer.get("phone")) + phone_tokens(customer.get("phone"))),
+        "search_text": index_terms(search_tokens(customer.get("email"), customer.get("address")))
+    }
+
+def repair_search_fields(repair: dict) -> dict:
+    return {
+        "search_primary": index_terms(search_tokens(repair.get("customer_name"), repair.get("device_type"), repair.get("brand"), repair.get("model"))),
+        "search_text": index_terms(search_tokens(repair.get("description")))
+    }
+
+# Notifications live in per-recipient inboxes: one document per recipient, read with
+# (recipient_id, read, created_at) indexes. Every admin receives every notification;
+# repair notifications also go to the assigned technician and, when one has an account,
+# the customer. notification_counters keeps each recipient's unread count ({_id: user id}).
+
+async def admin_recipient_ids(database=None) -> List[str]:
+    database = db if database is None else database
+    admins = await database.users.find(
+        {"role": UserRole.ADMIN, "is_active": {"$ne": False}}, {"_id": 0, "id": 1}
+    ).to_list(None)
+    return [admin["id"] for admin in admins]
+
+async def customer_user_ids(customer_ids: set, database=None) -> dict:
+    """customer record id -> id of the customer user with the same email"""
+    database = db if database is None else database
+    if not customer_ids:
+        return {}
+    customers = await database.customers.find(
+        {"id": {"$in": sorted(customer_ids)}, "email": {"$nin": [None, ""]}}, {"_id": 0, "id": 1, "email": 1}
+    ).to_list(None)
+    if not customers:
+        return {}
+    users = await database.users.find(
+        {"email": {"$in": [customer["email"] for customer in customers]}, "role": UserRole.CUSTOMER},
+        {"_id": 0, "id": 1, "email": 1}
+    ).to_list(None)
+    user_by_email = {user["email"]: user["id"] for user in users}
+    return {customer["id"]: user_by_email[customer["email"]] for customer in customers if customer["email"] in user_by_email}
+
+async def inbox_documents(batch: List[dict], database=None) -> List[dict]:
+    """Expand queued notifications into one inbox document per recipient"""
+    admin_ids = await admin_recipient_ids(database)
+    customer_users = await customer_user_ids({item["customer_id"] for item in batch if item.get("customer_id")}, database)
+    documents = []
+    for item in batch:
+        notification = dict(item["notification"])
+        if isinstance(notification.get("created_at"), datetime):
+            # Mongo keeps milliseconds: stream the value a Last-Event-ID replay compares against
+            created_at = notification["created_at"]
+            notification["created_at"] = created_at.replace(microsecond=created_at.microsecond // 1000 * 1000)
+        recipients = admin_ids + item.get("user_ids", []) + [customer_users.get(item.get("customer_id"))]
+        for recipient_id in dict.fromkeys(recipient for recipient in recipients if recipient):
+            documents.append({**notification, "id": str(uuid.uuid4()), "recipient_id": recipient_id})
+    return documents
+
+async def adjust_unread_counts(deltas: dict, database=None):
+    database = db if database is None else database
+    operations = [
+        UpdateOne({"_id": recipient_id}, {"$inc": {"unread": delta}}, upsert=True)
+        for recipient_id, delta in deltas.items() if delta
+    ]
+    if operations:
+        await database.notification_counters.bulk_write(operations, ordered=False)
+
+async def read_unread_counts(recipient_ids, database=None) -> dict:
+    database = db if database is None else database
+    counters = await database.notification_counters.find({"_id": {"$in": list(recipient_ids)}}).to_list(None)
+    counts = {recipient_id: 0 for recipient_id in recipient_ids}
+    counts.update({counter["_id"]: max(0, counter.get("unread", 0)) for counter in counters})
+    return counts
+
+async def rebuild_notification_counters(database=None) -> int:
+    """Recount every inbox's unread notifications; returns the number of inboxes"""
+    database = db if database is None else database
+    counts = await database.notifications.aggregate([
+        {"$match": {"read": False, "recipient_id": {"$ne": None}}},
+        {"$group": {"_id": "$recipient_id", "unread": {"$sum": 1}}}
+    ]).to_list(None)
+    await database.notification_counters.delete_many({})
+    if counts:
+        await database.notification_counters.insert_many(counts)
+    return len(counts)
+
+async def migrate_legacy_notifications(database=None, batch_size: int = 500) -> int:
+    """Move notifications written before inboxes into every admin's inbox (admins were the
+    only readers). update_repair_status also wrote is_read/user_id; those become read/type."""
+    database = db if database is None else database
+    admin_ids = await admin_recipient_ids(database)
+    if not admin_ids:
+        return 0
+    migrated = 0
+    operations = []
+    async for notification in database.notifications.find({"recipient_id": {"$exists": False}}):
+        document = {key: value for key, value in notification.items() if key not in ("_id", "is_read", "user_id")}
+        if "is_read" in notification:
+            document.setdefault("read", notification["is_read"])
+            document.setdefault("type", "repair_status_update")
+            document.setdefault("related_id", notification.get("repair_id"))
+        document.setdefault("read", False)
+        # The stored document becomes the first admin's copy, the other admins get new ones
+        operations.append(ReplaceOne({"_id": notification["_id"]}, {**document, "recipient_id": admin_ids[0]}))
+        operations.extend(
+            InsertOne({**document, "id": str(uuid.uuid4()), "recipient_id": admin_id}) for admin_id in admin_ids[1:]
+        )
+        migrated += 1
+        if len(operations) >= batch_size:
+            await database.notifications.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await database.notifications.bulk_write(operations, ordered=False)
+    if migrated:
+        await rebuild_notification_counters(database)
+    return migrated
+
+class NotificationWriter:
+    """Write-behind queue for notification inserts, flushed with insert_many.
+    
+    Recipients are resolved and inbox documents built per batch, off the request path.
+    Notifications are published to the streams once their batch is stored, so a
+    Last-Event-ID replay always finds them. Until start() runs (scripts, tests) and
+    after stop(), add() writes inline. Bulk inbox updates call flush() first so they
+    also cover what is still queued."""
+    
+    def __init__(self, flush_size: int, flush_latency_ms: float, queue_size: int, enqueue_timeout: float):
+        self.flush_size = flush_size
+        self.flush_latency = flush_latency_ms / 1000
+        self.queue_size = queue_size
+        self.enqueue_timeout = enqueue_timeout
+        self.queue = None
+        self.task = None
+        self.queued = 0
+        self.written = 0
+        self.batches = 0
+        self.inline = 0
+        self.failed = 0
+    
+    def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.task = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        """Flush everything still queued (shutdown)"""
+        if self.task is None:
+            return
+        await self.queue.put(None)
+        await self.task
+        self.task = None
+        # Anything added while the last batch was being written
+        leftover = []
+        while not self.queue.empty():
+            leftover.append(self.queue.get_nowait())
+        flushes = [item for item in leftover if isinstance(item, asyncio.Future)]
+        leftover = [item for item in leftover if not isinstance(item, asyncio.Future)]
+        try:
+            if leftover:
+                await self.write(leftover)
+        finally:
+            for flushed in flushes:
+                flushed.set_result(None)
+    
+    async def flush(self):
+        """Write everything queued so far without waiting out the flush latency"""
+        if self.task is None or self.task.done():
+            return
+        flushed = asyncio.get_running_loop().create_future()
+        await self.queue.put(flushed)
+        await flushed
+    
+    async def add(self, notification: dict, user_ids: List[str] = None, customer_id: Optional[str] = None):
+        """Queue a notification for the admins, `user_ids` and the user behind `customer_id`"""
+        item = {"notification": notification, "user_ids": user_ids or [], "customer_id": customer_id}
+        if self.task is None or self.task.done():
+            await self.write([item])
+            self.inline += 1
+            return
+        try:
+            # Backpressure: wait for room rather than grow without bound
+            await asyncio.wait_for(self.queue.put(item), timeout=self.enqueue_timeout)
+            self.queued += 1
+        except asyncio.TimeoutError:
+            await self.write([item])
+            self.inline += 1
+    
+    async def write(self, batch: List[dict]):
+        documents = await inbox_documents(batch)
+        if not documents:
+            return
+        documents.sort(key=lambda document: (document["created_at"], document["id"]))
+        await db.notifications.insert_many(documents, ordered=False)
+        self.written += len(documents)
+        self.batches += 1
+        unread = {}
+        for document in documents:
+            unread[document["recipient_id"]] = unread.get(document["recipient_id"], 0) + (0 if document.get("read") else 1)
+        await adjust_unread_counts(unread)
+        # One ordered publish per batch: streams must see notifications in the order a
+        # Last-Event-ID replay resumes in
+        await notification_broker.publish_many([
+            ("notification", notification_event(document), document["id"], document["recipient_id"])
+            for document in documents
+        ])
+        await publish_unread_count(list(unread))
+    
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is None:
+                break
+            batch, flushes = [], []
+            deadline = loop.time() + self.flush_latency
+            while True:
+                if isinstance(item, asyncio.Future):
+                    # flush(): write what is queued ahead of it now
+                    flushes.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.flush_size:
+                    break
+                try:
+                    item = self.queue.get_nowait() if stopping else await asyncio.wait_for(
+                        self.queue.get(), timeout=max(0, deadline - loop.time()))
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+                if item is None:
+                    # Drain what is already queued without waiting out the latency
+                    stopping = True
+                    try:
+                        item = self.queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+            try:
+                if batch:
+                    await self.write(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logging.error(f"❌ Error writing {len(batch)} notifications: {e}")
+            finally:
+                for flushed in flushes:
+                    flushed.set_result(None)
+    
+    def stats(self) -> dict:
+        return {
+            "enabled": self.task is not None,
+            "flush_size": self.flush_size,
+            "flush_latency_ms": self.flush_latency * 1000,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "queued": self.queued,
+            "written": self.written,
+            "batches": self.batches,
+            "inline": self.inline,
+            "failed": self.failed
+        }
+
+notification_writer = NotificationWriter(
+    NOTIFICATION_FLUSH_SIZE, NOTIFICATION_FLUSH_LATENCY_MS, NOTIFICATION_WRITE_QUEUE_SIZE, NOTIFICATION_ENQUEUE_TIMEOUT_SECONDS
+)
+
+async def create_notification(
+    notification_type: str,
+    title: str,
+    message: str,
+    related_id: str,
+    extra_data: dict = None,
+    user_ids: List[str] = None,
+    customer_id: Optional[str] = None
+):
+    """Helper function to create notifications (admins always receive them)"""
     notification = Notification(
         type=notification_type,
         title=title,
@@ -301,14 +1099,13 @@ async def create_notification(notification_type: str, title: str, message: str,
         related_id=related_id
     )
     
-    notification_dict = notification.dict()
-    notification_dict["created_at"] = notification_dict["created_at"].isoformat()
+    notification_dict = notification.model_dump()
     
     # Add extra data if provided
     if extra_data:
         notification_dict.update(extra_data)
     
-    await db.notifications.insert_one(notification_dict)
+    await notification_writer.add(notification_dict, user_ids, customer_id)
     return notification
 
 # Authentication routes
@@ -323,24 +1120,27 @@ async def register(user_data: UserCreate):
         )
     
     # Hash password
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     
     # Create user
     user_dict = user_data.dict(exclude={"password"})
     user_obj = User(**user_dict)
     
     # Prepare for MongoDB
-    user_mongo_dict = user_obj.dict()
-    user_mongo_dict["created_at"] = user_mongo_dict["created_at"].isoformat()
-    user_mongo_dict["password"] = hashed_password
+    user_mongo_dict = user_obj.model_dump()
+    user_mongo_dict["hashed_password"] = hashed_password
     
     await db.users.insert_one(user_mongo_dict)
+    user_cache.invalidate(user_obj.email)
+    await bump_collection_version("users")
+    if user_obj.role == UserRole.TECHNICIAN:
+        await track_global_counter("total_technicians", 1)
     return user_obj
 
 @api_router.post("/auth/login", response_model=Token)
 async def login(user_credentials: UserLogin):
     user = await db.users.find_one({"email": user_credentials.email})
-    if not user or not verify_password(user_credentials.password, user["hashed_password"]):
+    if not user or not await password_hasher.verify(user_credentials.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -355,22 +1155,72 @@ async def login(user_credentials: UserLogin):
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["email"]}, expires_delta=access_token_expires
+        data=user_token_claims(user), expires_delta=access_token_expires
     )
     
     # Parse user data
     user_data = user.copy()
-    if isinstance(user_data.get("created_at"), str):
-        user_data["created_at"] = datetime.fromisoformat(user_data["created_at"])
     
     user_obj = User(**{k: v for k, v in user_data.items() if k != "hashed_password"})
     
     return Token(
         access_token=access_token,
         token_type="bearer",
-        user=user_obj
+        user=user_obj,
+        refresh_token=await issue_refresh_token(user["id"])
     )
 
+@api_router.post("/auth/refresh", response_model=Token)
+async def refresh_access_token(refresh_request: RefreshRequest):
+    """Exchange a refresh token for a new access token without a password check.
+    
+    Refresh tokens are single use: each call rotates it. Presenting an already used
+    token revokes the whole family, since it means the token was copied."""
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    token_hash = hash_refresh_token(refresh_request.refresh_token)
+    now = datetime.now(timezone.utc)
+    
+    stored = await db.refresh_tokens.find_one_and_update(
+        {"token_hash": token_hash, "used": False, "expires_at": {"$gt": now}},
+        {"$set": {"used": True, "used_at": now}}
+    )
+    if stored is None:
+        reused = await db.refresh_tokens.find_one({"token_hash": token_hash, "used": True})
+        if reused:
+            await db.refresh_tokens.delete_many({"family_id": reused["family_id"]})
+            logger.warning(f"Refresh token reuse detected for user {reused['user_id']}, family revoked")
+        raise invalid_token
+    
+    user = await db.users.find_one({"id": stored["user_id"]})
+    if not user or not user.get("is_active", True):
+        await db.refresh_tokens.delete_many({"family_id": stored["family_id"]})
+        raise invalid_token
+    
+    access_token = create_access_token(
+        data=user_token_claims(user), expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    
+    user_data = user.copy()
+    
+    return Token(
+        access_token=access_token,
+        token_type="bearer",
+        user=User(**{k: v for k, v in user_data.items() if k != "hashed_password"}),
+        refresh_token=await issue_refresh_token(user["id"], stored["family_id"])
+    )
+
+@api_router.post("/auth/logout")
+async def logout(refresh_request: RefreshRequest):
+    """Revoke the refresh token family of this login"""
+    stored = await db.refresh_tokens.find_one({"token_hash": hash_refresh_token(refresh_request.refresh_token)})
+    if stored:
+        await db.refresh_tokens.delete_many({"family_id": stored["family_id"]})
+    return {"message": "Logged out"}
+
 @api_router.get("/auth/me", response_model=User)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
@@ -381,16 +1231,18 @@ async def create_customer(
     customer_data: CustomerCreate,
     current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.TECHNICIAN]))
 ):
-    customer_dict = customer_data.dict()
+    customer_dict = customer_data.model_dump()
     # Teknisyen ise kendi ID'sini ekle
     if current_user.role == UserRole.TECHNICIAN:
         customer_dict["created_by_technician"] = current_user.id
     
     customer_obj = Customer(**customer_dict)
-    customer_mongo_dict = customer_obj.dict()
-    customer_mongo_dict["created_at"] = customer_mongo_dict["created_at"].isoformat()
+    customer_mongo_dict = customer_obj.model_dump()
+    customer_mongo_dict.update(customer_search_fields(customer_mongo_dict))
     
     await db.customers.insert_one(customer_mongo_dict)
+    await track_global_counter("total_customers", 1)
+    await bump_collection_version("customers")
     
     # Create notification for new customer
     await create_notification(
@@ -406,7 +1258,7 @@ async def create_customer(
 @api_router.post("/upload")
 async def upload_file(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_token_user)
 ):
     try:
         # Validate file type
@@ -455,7 +1307,7 @@ async def upload_file(
 @api_router.post("/upload-multiple")
 async def upload_multiple_files(
     files: List[UploadFile] = File(...),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_token_user)
 ):
     try:
         uploaded_files = []
@@ -508,20 +1360,27 @@ async def upload_multiple_files(
 
 @api_router.get("/customers", response_model=List[Customer])
 async def get_customers(
+    request: Request,
+    limit: int = Query(PAGE_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.TECHNICIAN]))
 ):
+    etag = await conditional_etag(request, current_user, "customers")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
     # Teknisyen sadece kendi müşterilerini görebilir
     query = {}
     if current_user.role == UserRole.TECHNICIAN:
         query["created_by_technician"] = current_user.id
     
-    customers = await db.customers.find(query).to_list(1000)
-    result = []
-    for customer in customers:
-        if isinstance(customer.get("created_at"), str):
-            customer["created_at"] = datetime.fromisoformat(customer["created_at"])
-        result.append(Customer(**customer))
-    return result
+    selected = sparse_fields(Customer, fields)
+    result, next_cursor = await fetch_page(
+        db.customers, query, limit, after, projection=model_projection(Customer, selected), build=trusted_row(Customer, selected)
+    )
+    return page_response(result, next_cursor, etag)
 
 
 @api_router.get("/customers/me", response_model=Customer)
@@ -542,9 +1401,11 @@ async def get_my_customer_record(
                 address="",
                 created_by_technician=None
             )
-            customer_dict = new_customer.dict()
-            customer_dict["created_at"] = customer_dict["created_at"].isoformat()
+            customer_dict = new_customer.model_dump()
+            customer_dict.update(customer_search_fields(customer_dict))
             await db.customers.insert_one(customer_dict)
+            await track_global_counter("total_customers", 1)
+            await bump_collection_version("customers")
             return new_customer
         else:
             raise HTTPException(
@@ -552,10 +1413,51 @@ async def get_my_customer_record(
                 detail="Customer record not found"
             )
     
-    if isinstance(customer.get("created_at"), str):
-        customer["created_at"] = datetime.fromisoformat(customer["created_at"])
     return Customer(**customer)
 
+SUGGEST_LIMIT_DEFAULT = 10
+SUGGEST_LIMIT_MAX = 25
+
+@api_router.get("/customers/suggest", response_model=List[CustomerSuggestion])
+async def suggest_customers(
+    q: str,
+    limit: int = Query(SUGGEST_LIMIT_DEFAULT, ge=1, le=SUGGEST_LIMIT_MAX),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.TECHNICIAN]))
+):
+    """Customer typeahead on name-word or phone-digit prefixes, cheap enough to call per keystroke.
+    
+    Phone matches come in phone order. Name matches come in name order, customers
+    whose name contains every typed word in full before those matching on a prefix."""
+    query = {}
+    # Teknisyen sadece kendi müşterilerini görebilir
+    if current_user.role == UserRole.TECHNICIAN:
+        query["created_by_technician"] = current_user.id
+    
+    digits = "".join(filter(str.isdigit, q))
+    stripped = re.sub(r"[\s()+\-]", "", q)
+    projection = {"_id": 0, "id": 1, "full_name": 1, "phone": 1, "email": 1}
+    if digits and digits == stripped:
+        # Anchored prefix regexes become index range scans, already in phone_keys order
+        query["phone_keys"] = {"$regex": "^" + re.escape(digits)}
+        customers = await db.customers.find(query, projection).sort("phone_keys", ASCENDING).limit(limit).to_list(limit)
+        return [CustomerSuggestion(**customer) for customer in customers]
+    
+    words = search_tokens(q)[:5]
+    if not words:
+        return []
+    name_order = [("full_name", ASCENDING), ("id", ASCENDING)]
+    exact = await db.customers.find({**query, "name_words": {"$all": words}}, projection).sort(name_order).limit(limit).to_list(limit)
+    customers = list(exact)
+    if len(customers) < limit:
+        prefix_query = {
+            **query,
+            "$and": [{"name_words": {"$regex": "^" + re.escape(word)}} for word in words],
+            "id": {"$nin": [customer["id"] for customer in exact]}
+        }
+        remaining = limit - len(customers)
+        customers += await db.customers.find(prefix_query, projection).sort(name_order).limit(remaining).to_list(remaining)
+    return [CustomerSuggestion(**customer) for customer in customers]
+
 @api_router.get("/customers/{customer_id}", response_model=Customer)
 async def get_customer(
     customer_id: str,
@@ -575,8 +1477,6 @@ async def get_customer(
             detail="Access denied"
         )
     
-    if isinstance(customer.get("created_at"), str):
-        customer["created_at"] = datetime.fromisoformat(customer["created_at"])
     return Customer(**customer)
 
 class CustomerUpdate(BaseModel):
@@ -606,15 +1506,15 @@ async def update_customer(
         )
     
     # Prepare update data
-    update_data = {k: v for k, v in customer_update.dict().items() if v is not None}
+    update_data = {k: v for k, v in customer_update.model_dump().items() if v is not None}
     
     if update_data:
+        update_data.update(customer_search_fields({**customer, **update_data}))
         await db.customers.update_one({"id": customer_id}, {"$set": update_data})
+        await bump_collection_version("customers")
     
     # Get updated customer
     updated_customer = await db.customers.find_one({"id": customer_id})
-    if isinstance(updated_customer.get("created_at"), str):
-        updated_customer["created_at"] = datetime.fromisoformat(updated_customer["created_at"])
     
     return Customer(**updated_customer)
 
@@ -638,7 +1538,13 @@ async def delete_customer(
         )
     
     # Delete all repairs for this customer first
+    customer_repairs = await db.repairs.find(
+        {"customer_id": customer_id},
+        {**COUNTER_REPAIR_PROJECTION, "id": 1, "visible_to_technicians": 1}
+    ).to_list(None)
     await db.repairs.delete_many({"customer_id": customer_id})
+    await track_repairs_removed(customer_repairs)
+    await record_repair_tombstones(customer_repairs)
     
     # Delete the customer
     result = await db.customers.delete_one({"id": customer_id})
@@ -648,12 +1554,16 @@ async def delete_customer(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Customer not found"
         )
+    await track_global_counter("total_customers", -1)
+    await bump_collection_version("customers")
     
     return {"message": "Customer and all associated repairs deleted successfully"}
 
 @api_router.get("/customers/{customer_id}/repairs", response_model=List[RepairRequest])
 async def get_customer_repairs(
     customer_id: str,
+    limit: int = Query(PAGE_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = None,
     current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.TECHNICIAN]))
 ):
     # First check if customer exists
@@ -671,107 +1581,119 @@ async def get_customer_repairs(
             detail="Access denied"
         )
     
-    repairs = await db.repairs.find({"customer_id": customer_id}).to_list(1000)
-    result = []
-    for repair in repairs:
-        if isinstance(repair.get("created_at"), str):
-            repair["created_at"] = datetime.fromisoformat(repair["created_at"])
-        if isinstance(repair.get("updated_at"), str):
-            repair["updated_at"] = datetime.fromisoformat(repair["updated_at"])
-        if repair.get("completed_at") and isinstance(repair["completed_at"], str):
-            repair["completed_at"] = datetime.fromisoformat(repair["completed_at"])
-        result.append(RepairRequest(**repair))
-    return result
+    result, next_cursor = await fetch_page(
+        db.repairs, {"customer_id": customer_id}, limit, after,
+        projection=model_projection(RepairRequest), build=trusted_row(RepairRequest)
+    )
+    return page_response(result, next_cursor)
 
 # Search functionality
+SEARCH_LIMIT_DEFAULT = 20
+SEARCH_LIMIT_MAX = 100
+
+# Explicit repair filters in a search query: "durum:bekle", "öncelik:acil"
+SEARCH_FILTER_FIELDS = {"durum": RepairStatus, "status": RepairStatus, "oncelik": Priority, "priority": Priority}
+
+def parse_search_query(query: str):
+    """Split a query into customer terms, repair terms and status/priority filters.
+    
+    A field prefix ("durum:bekle") filters on the values it starts; a bare word filters
+    only when it is a whole value ("acil") and stays a customer term either way.
+    Returns (customer_terms, repair_terms, statuses, priorities)."""
+    customer_terms = []
+    repair_terms = []
+    filters = {RepairStatus: set(), Priority: set()}
+    whole_values = {member.value: values for values in filters for member in values}
+    for word in query.split()[:10]:
+        field, separator, value = word.partition(":")
+        values = SEARCH_FILTER_FIELDS.get(fold_turkish(field)) if separator else None
+        if values:
+            folded = "".join(search_tokens(value))
+            matched = {member.value for member in values if folded and member.value.startswith(folded)}
+            # An explicit filter nothing matches finds nothing rather than everything
+            filters[values] |= matched or {folded}
+            continue
+        for token in search_tokens(word):
+            customer_terms.append(token[:SEARCH_MAX_PREFIX])
+            if token in whole_values:
+                filters[whole_values[token]].add(token)
+            else:
+                repair_terms.append(token[:SEARCH_MAX_PREFIX])
+    return customer_terms, repair_terms, filters[RepairStatus], filters[Priority]
+
+async def ranked_search(collection, text_terms: List[str], filters: dict, limit: int, offset: int):
+    """Run a $text query over the folded search fields, best textScore first"""
+    query = dict(filters)
+    projection = None
+    cursor_sort = [("created_at", DESCENDING)]
+    if text_terms:
+        query["$text"] = {"$search": " ".join(text_terms)}
+        projection = {"score": {"$meta": "textScore"}}
+        cursor_sort = [("score", {"$meta": "textScore"})]
+    
+    documents = await collection.find(query, projection).sort(cursor_sort).skip(offset).limit(limit + 1).to_list(limit + 1)
+    return documents[:limit], len(documents) > limit
+
 @api_router.get("/search")
 async def search_data(
     query: str,
     type: Optional[str] = None,  # "customers", "repairs", or None for both
-    current_user: User = Depends(get_current_user)
+    limit: int = Query(SEARCH_LIMIT_DEFAULT, ge=1, le=SEARCH_LIMIT_MAX),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_token_user)
 ):
-    results = {"customers": [], "repairs": []}
+    results = {"customers": [], "repairs": [], "next_offset": None}
     
     if not query or len(query.strip()) < 2:
         return results
     
-    query = query.strip()
+    type = type or None  # admin.html sends type= for "all"
+    customer_terms, repair_terms, statuses, priorities = parse_search_query(query.strip())
+    has_more = False
     
     # Search customers
-    if type is None or type == "customers":
-        customer_query = {
-            "$or": [
-                {"full_name": {"$regex": query, "$options": "i"}},
-                {"phone": {"$regex": query, "$options": "i"}},
-                {"email": {"$regex": query, "$options": "i"}},
-                {"address": {"$regex": query, "$options": "i"}}
-            ]
-        }
+    if (type is None or type == "customers") and customer_terms:
+        customer_filter = {}
         
         # Apply role-based filtering
         if current_user.role == UserRole.TECHNICIAN:
-            customer_query["created_by_technician"] = current_user.id
+            customer_filter["created_by_technician"] = current_user.id
         elif current_user.role == UserRole.CUSTOMER:
-            customer_query["email"] = current_user.email
+            customer_filter["email"] = current_user.email
         
-        customers = await db.customers.find(customer_query).to_list(100)
+        customers, more = await ranked_search(db.customers, customer_terms, customer_filter, limit, offset)
+        has_more = has_more or more
         for customer in customers:
-            if isinstance(customer.get("created_at"), str):
-                customer["created_at"] = datetime.fromisoformat(customer["created_at"])
             results["customers"].append(Customer(**customer))
     
     # Search repairs
-    if type is None or type == "repairs":
-        repair_query = {
-            "$or": [
-                {"customer_name": {"$regex": query, "$options": "i"}},
-                {"device_type": {"$regex": query, "$options": "i"}},
-                {"brand": {"$regex": query, "$options": "i"}},
-                {"model": {"$regex": query, "$options": "i"}},
-                {"description": {"$regex": query, "$options": "i"}},
-                {"status": {"$regex": query, "$options": "i"}},
-                {"priority": {"$regex": query, "$options": "i"}}
-            ]
-        }
+    if (type is None or type == "repairs") and (repair_terms or statuses or priorities):
+        repair_filter = {}
+        if statuses:
+            repair_filter["status"] = {"$in": sorted(statuses)}
+        if priorities:
+            repair_filter["priority"] = {"$in": sorted(priorities)}
         
         # Apply role-based filtering (same as get_repair_requests)
         if current_user.role == UserRole.TECHNICIAN:
-            customer_ids = []
-            customers = await db.customers.find({"created_by_technician": current_user.id}).to_list(1000)
-            customer_ids = [customer["id"] for customer in customers]
-            
-            repair_query = {
-                "$and": [
-                    repair_query,
-                    {
-                        "$or": [
-                            {"assigned_technician_id": current_user.id},
-                            {"customer_id": {"$in": customer_ids}},
-                            {"created_by": current_user.id}
-                        ]
-                    }
-                ]
-            }
+            repair_filter["visible_to_technicians"] = current_user.id
         elif current_user.role == UserRole.CUSTOMER:
-            repair_query["created_by"] = current_user.id
+            repair_filter["created_by"] = current_user.id
         
-        repairs = await db.repairs.find(repair_query).to_list(100)
+        repairs, more = await ranked_search(db.repairs, repair_terms, repair_filter, limit, offset)
+        has_more = has_more or more
         for repair in repairs:
-            if isinstance(repair.get("created_at"), str):
-                repair["created_at"] = datetime.fromisoformat(repair["created_at"])
-            if isinstance(repair.get("updated_at"), str):
-                repair["updated_at"] = datetime.fromisoformat(repair["updated_at"])
-            if repair.get("completed_at") and isinstance(repair["completed_at"], str):
-                repair["completed_at"] = datetime.fromisoformat(repair["completed_at"])
             results["repairs"].append(RepairRequest(**repair))
     
+    if has_more:
+        results["next_offset"] = offset + limit
     return results
 
 # Repair Request routes
 @api_router.post("/repairs", response_model=RepairRequest)
 async def create_repair_request(
     repair_data: RepairRequestCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_token_user)
 ):
     # Get customer info
     customer = await db.customers.find_one({"id": repair_data.customer_id})
@@ -797,7 +1719,7 @@ async def create_repair_request(
                 detail="You can only create repairs for yourself"
             )
     
-    repair_dict = repair_data.dict()
+    repair_dict = repair_data.model_dump()
     repair_dict["customer_name"] = customer["full_name"]
     repair_dict["customer_phone"] = customer.get("phone", "")
     repair_dict["status"] = RepairStatus.PENDING
@@ -806,13 +1728,12 @@ async def create_repair_request(
     repair_obj = RepairRequest(**repair_dict)
     
     # Prepare for MongoDB
-    repair_mongo_dict = repair_obj.dict()
-    repair_mongo_dict["created_at"] = repair_mongo_dict["created_at"].isoformat()
-    repair_mongo_dict["updated_at"] = repair_mongo_dict["updated_at"].isoformat()
-    if repair_mongo_dict["completed_at"]:
-        repair_mongo_dict["completed_at"] = repair_mongo_dict["completed_at"].isoformat()
+    repair_mongo_dict = repair_obj.model_dump()
+    repair_mongo_dict.update(repair_search_fields(repair_mongo_dict))
+    repair_mongo_dict["visible_to_technicians"] = repair_visibility(repair_mongo_dict, customer)
     
     await db.repairs.insert_one(repair_mongo_dict)
+    await track_repair_change(after=repair_mongo_dict)
     
     # Create notification for new repair
     await create_notification(
@@ -824,50 +1745,172 @@ async def create_repair_request(
             "repair_id": repair_obj.id,
             "customer_name": repair_obj.customer_name,
             "device_info": f"{repair_obj.device_type} {repair_obj.brand} {repair_obj.model}"
-        }
+        },
+        user_ids=[repair_obj.assigned_technician_id],
+        customer_id=repair_obj.customer_id
     )
     
     return repair_obj
 
-@api_router.get("/repairs", response_model=List[RepairRequest])
-async def get_repair_requests(current_user: User = Depends(get_current_user)):
-    query = {}
-    
-    # Role-based filtering
+def repair_scope_filter(current_user: User) -> dict:
+    """The repairs (and tombstones) a user may see"""
     if current_user.role == UserRole.TECHNICIAN:
         # Teknisyen hem atanan işleri hem kendi eklediği müşterilerin arızalarını görebilir
-        customer_ids = []
-        customers = await db.customers.find({"created_by_technician": current_user.id}).to_list(1000)
-        customer_ids = [customer["id"] for customer in customers]
-        
-        query = {
-            "$or": [
-                {"assigned_technician_id": current_user.id},
-                {"customer_id": {"$in": customer_ids}},
-                {"created_by": current_user.id}
-            ]
-        }
-    elif current_user.role == UserRole.CUSTOMER:
-        query["created_by"] = current_user.id
+        return {"visible_to_technicians": current_user.id}
+    if current_user.role == UserRole.CUSTOMER:
+        return {"created_by": current_user.id}
     # Admin can see all
-    
-    repairs = await db.repairs.find(query).to_list(1000)
-    result = []
-    for repair in repairs:
-        # Get customer info for phone
-        if repair.get("customer_id"):
-            customer = await db.customers.find_one({"id": repair["customer_id"]})
-            if customer:
-                repair["customer_phone"] = customer.get("phone", "")
-        
-        if isinstance(repair.get("created_at"), str):
-            repair["created_at"] = datetime.fromisoformat(repair["created_at"])
-        if isinstance(repair.get("updated_at"), str):
-            repair["updated_at"] = datetime.fromisoformat(repair["updated_at"])
-        if repair.get("completed_at") and isinstance(repair["completed_at"], str):
-            repair["completed_at"] = datetime.fromisoformat(repair["completed_at"])
-        result.append(RepairRequest(**repair))
-    return result
+    return {}
+
+@api_router.get("/repairs", response_model=List[RepairRequest])
+async def get_repair_requests(
+    request: Request,
+    limit: int = Query(PAGE_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    current_user: User = Depends(get_token_user)
+):
+    # customer_phone is read from customers, so their version counts too
+    etag = await conditional_etag(request, current_user, "repairs", "customers")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    query = repair_scope_filter(current_user)
+    selected = sparse_fields(RepairRequest, fields)
+    projection = model_projection(RepairRequest, selected)
+    with_phones = selected is None or "customer_phone" in selected
+    if with_phones:
+        projection["customer_id"] = 1
+    repairs, next_cursor = await fetch_page(db.repairs, query, limit, after, projection=projection)
+    # Get customer info for phone (one batched lookup for the whole page)
+    if with_phones:
+        await attach_customer_phones(repairs)
+    build = trusted_row(RepairRequest, selected)
+    return page_response([build(repair) for repair in repairs], next_cursor, etag)
+
+def encode_watermark(changed_at: datetime, last_id: str = "") -> str:
+    payload = {"at": changed_at.isoformat(), "id": last_id}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_watermark(token: str) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        changed_at = datetime.fromisoformat(payload["at"])
+        # Watermarks are issued in UTC; one without an offset is read as UTC too
+        if changed_at.tzinfo is None:
+            changed_at = changed_at.replace(tzinfo=timezone.utc)
+        return changed_at, payload["id"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid since token"
+        )
+
+async def record_repair_tombstones(repairs: List[dict]):
+    """Remember deleted repairs so /repairs/changes can report them"""
+    if not repairs:
+        return
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(days=REPAIR_TOMBSTONE_RETENTION_DAYS)
+    tombstones = [{
+        "id": repair["id"],
+        "deleted_at": now,
+        "expires_at": expires_at,
+        "visible_to_technicians": repair.get("visible_to_technicians", []),
+        "created_by": repair.get("created_by")
+    } for repair in repairs]
+    try:
+        await db.repair_tombstones.insert_many(tombstones, ordered=False)
+    except Exception as e:
+        logger.error(f"Recording repair tombstones failed: {e}")
+
+async def record_repair_scope_exits(repair_id: str, technician_ids: List[str]):
+    """A repair left these technicians' visibility (reassignment); their feeds report it
+    as deleted. Admins see every repair, so the changes feed hides these from them."""
+    if not technician_ids:
+        return
+    now = datetime.now(timezone.utc)
+    try:
+        await db.repair_tombstones.insert_one({
+            "id": repair_id,
+            "deleted_at": now,
+            "expires_at": now + timedelta(days=REPAIR_TOMBSTONE_RETENTION_DAYS),
+            "visible_to_technicians": sorted(technician_ids),
+            "created_by": None,
+            "scope_exit": True
+        })
+    except Exception as e:
+        logger.error(f"Recording repair scope exit failed: {e}")
+
+async def mark_repairs_purged():
+    """Bulk deletes leave no tombstones; clients older than this must reload in full"""
+    await db.collection_versions.update_one(
+        {"_id": "repairs"},
+        {"$set": {"purged_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+@api_router.get("/repairs/changes")
+async def get_repair_changes(
+    since: Optional[str] = None,
+    limit: int = Query(PAGE_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX),
+    current_user: User = Depends(get_token_user)
+):
+    """Repairs created or updated, and ids deleted, after the `since` watermark.
+    
+    Pass the returned `next` as `since` on the following call. When `has_more` is
+    true call again straight away. When `reset` is true the watermark is too old to
+    replay (or missing): reload /repairs in full, then continue from `next`."""
+    read_started = datetime.now(timezone.utc)
+    stamp = await db.collection_versions.find_one({"_id": "repairs"}) or {}
+    caught_up_at = read_started - timedelta(seconds=CHANGES_OVERLAP_SECONDS)
+    # Never hand out a watermark from before a purge, or the reload it asks for would
+    # be asked for again until the overlap has passed
+    if stamp.get("purged_at") and stamp["purged_at"] > caught_up_at:
+        caught_up_at = stamp["purged_at"]
+    caught_up = encode_watermark(caught_up_at)
+    result = {"changed": [], "deleted": [], "next": caught_up, "has_more": False, "reset": False}
+    if not since:
+        result["reset"] = True
+        return ORJSONResponse(result)
+    
+    since_at, since_id = decode_watermark(since)
+    retained_from = read_started - timedelta(days=REPAIR_TOMBSTONE_RETENTION_DAYS)
+    if since_at < retained_from or (stamp.get("purged_at") and since_at < stamp["purged_at"]):
+        result["reset"] = True
+        return ORJSONResponse(result)
+    
+    scope = repair_scope_filter(current_user)
+    after = {"$or": [
+        {"updated_at": {"$gt": since_at}},
+        {"updated_at": since_at, "id": {"$gt": since_id}}
+    ]}
+    projection = model_projection(RepairRequest)
+    repairs = await db.repairs.find({**scope, **after}, projection).sort(
+        [("updated_at", ASCENDING), ("id", ASCENDING)]
+    ).limit(limit + 1).to_list(limit + 1)
+    if len(repairs) > limit:
+        repairs = repairs[:limit]
+        result["has_more"] = True
+        result["next"] = encode_watermark(repairs[-1]["updated_at"], repairs[-1]["id"])
+    await attach_customer_phones(repairs)
+    build = trusted_row(RepairRequest)
+    result["changed"] = [build(repair) for repair in repairs]
+    
+    tombstone_scope = scope if scope else {"scope_exit": {"$ne": True}}
+    tombstones = await db.repair_tombstones.find(
+        {**tombstone_scope, "deleted_at": {"$gte": since_at}}, {"_id": 0, "id": 1}
+    ).limit(PAGE_LIMIT_MAX + 1).to_list(PAGE_LIMIT_MAX + 1)
+    if len(tombstones) > PAGE_LIMIT_MAX:
+        result.update(changed=[], deleted=[], has_more=False, reset=True, next=caught_up)
+        return ORJSONResponse(result)
+    # A repair that left a technician's scope and came back is reported as changed only
+    changed_ids = {repair["id"] for repair in repairs}
+    result["deleted"] = list(dict.fromkeys(
+        tombstone["id"] for tombstone in tombstones if tombstone["id"] not in changed_ids
+    ))
+    return ORJSONResponse(result)
 
 @api_router.put("/repairs/{repair_id}", response_model=RepairRequest)
 async def update_repair_request(
@@ -883,20 +1926,31 @@ async def update_repair_request(
         )
     
     # Prepare update data
-    update_data = {k: v for k, v in repair_update.dict().items() if v is not None}
-    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
-    
-    # Handle technician assignment
-    if "assigned_technician_id" in update_data and update_data["assigned_technician_id"]:
-        technician = await db.users.find_one({"id": update_data["assigned_technician_id"], "role": UserRole.TECHNICIAN})
-        if technician:
-            update_data["assigned_technician_name"] = technician["full_name"]
+    update_data = {k: v for k, v in repair_update.model_dump().items() if v is not None}
+    update_data["updated_at"] = datetime.now(timezone.utc)
+    
+    # Handle technician assignment; "" (the select's empty option) unassigns
+    if "assigned_technician_id" in update_data:
+        if update_data["assigned_technician_id"]:
+            technician = await db.users.find_one({"id": update_data["assigned_technician_id"], "role": UserRole.TECHNICIAN})
+            if technician:
+                update_data["assigned_technician_name"] = technician["full_name"]
+        else:
+            update_data["assigned_technician_id"] = None
+            update_data["assigned_technician_name"] = None
+        customer = await db.customers.find_one({"id": repair["customer_id"]}, {"_id": 0, "created_by_technician": 1})
+        update_data["visible_to_technicians"] = repair_visibility({**repair, **update_data}, customer)
     
     # Handle completion
     if update_data.get("status") == RepairStatus.COMPLETED:
-        update_data["completed_at"] = datetime.now(timezone.utc).isoformat()
+        update_data["completed_at"] = datetime.now(timezone.utc)
     
-    await db.repairs.update_one({"id": repair_id}, {"$set": update_data})
+    previous = await db.repairs.find_one_and_update({"id": repair_id}, {"$set": update_data})
+    if previous:
+        await track_repair_change(before=previous, after={**previous, **update_data})
+        if "visible_to_technicians" in update_data:
+            removed = set(previous.get("visible_to_technicians", [])) - set(update_data["visible_to_technicians"])
+            await record_repair_scope_exits(repair_id, list(removed))
     
     # Create notification for status update if status changed
     if "status" in update_data:
@@ -910,26 +1964,20 @@ async def update_repair_request(
                 "customer_name": repair['customer_name'],
                 "device_info": f"{repair['device_type']} {repair['brand']} {repair['model']}",
                 "new_status": update_data['status']
-            }
+            },
+            user_ids=[update_data.get("assigned_technician_id") or repair.get("assigned_technician_id")],
+            customer_id=repair["customer_id"]
         )
     
     # Get updated repair
     updated_repair = await db.repairs.find_one({"id": repair_id})
     
-    # Parse dates
-    if isinstance(updated_repair.get("created_at"), str):
-        updated_repair["created_at"] = datetime.fromisoformat(updated_repair["created_at"])
-    if isinstance(updated_repair.get("updated_at"), str):
-        updated_repair["updated_at"] = datetime.fromisoformat(updated_repair["updated_at"])
-    if updated_repair.get("completed_at") and isinstance(updated_repair["completed_at"], str):
-        updated_repair["completed_at"] = datetime.fromisoformat(updated_repair["completed_at"])
-    
     return RepairRequest(**updated_repair)
 
 @api_router.get("/repairs/{repair_id}", response_model=RepairRequest)
 async def get_repair_request(
     repair_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_token_user)
 ):
     repair = await db.repairs.find_one({"id": repair_id})
     if not repair:
@@ -940,14 +1988,8 @@ async def get_repair_request(
     
     # Check permissions based on role
     if current_user.role == UserRole.TECHNICIAN:
-        # Technician can view repairs they created or are assigned to
-        customer_ids = []
-        customers = await db.customers.find({"created_by_technician": current_user.id}).to_list(1000)
-        customer_ids = [customer["id"] for customer in customers]
-        
-        if (repair.get("created_by") != current_user.id and 
-            repair.get("assigned_technician_id") != current_user.id and
-            repair.get("customer_id") not in customer_ids):
+        # Technician can view repairs they created, are assigned to or whose customer they own
+        if current_user.id not in repair.get("visible_to_technicians", []):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
@@ -961,14 +2003,6 @@ async def get_repair_request(
             )
     # Admin can view all repairs (no additional check needed)
     
-    # Parse dates
-    if isinstance(repair.get("created_at"), str):
-        repair["created_at"] = datetime.fromisoformat(repair["created_at"])
-    if isinstance(repair.get("updated_at"), str):
-        repair["updated_at"] = datetime.fromisoformat(repair["updated_at"])
-    if repair.get("completed_at") and isinstance(repair["completed_at"], str):
-        repair["completed_at"] = datetime.fromisoformat(repair["completed_at"])
-    
     return RepairRequest(**repair)
 
 @api_router.delete("/repairs/{repair_id}")
@@ -991,13 +2025,15 @@ async def delete_repair_request(
                 detail="Access denied"
             )
     
-    result = await db.repairs.delete_one({"id": repair_id})
+    deleted = await db.repairs.find_one_and_delete({"id": repair_id})
     
-    if result.deleted_count == 0:
+    if deleted is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Repair request not found"
         )
+    await track_repair_change(before=deleted)
+    await record_repair_tombstones([deleted])
     
     return {"message": "Repair request deleted successfully"}
 
@@ -1024,10 +2060,12 @@ async def cancel_repair_request(
     # Update repair status to cancelled
     update_data = {
         "status": RepairStatus.CANCELLED,
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "updated_at": datetime.now(timezone.utc)
     }
     
-    await db.repairs.update_one({"id": repair_id}, {"$set": update_data})
+    previous = await db.repairs.find_one_and_update({"id": repair_id}, {"$set": update_data})
+    if previous:
+        await track_repair_change(before=previous, after={**previous, **update_data})
     
     # Create notification for cancellation
     await create_notification(
@@ -1039,20 +2077,14 @@ async def cancel_repair_request(
             "repair_id": repair_id,
             "customer_name": repair['customer_name'],
             "device_info": f"{repair['device_type']} {repair['brand']} {repair['model']}"
-        }
+        },
+        user_ids=[repair.get("assigned_technician_id")],
+        customer_id=repair["customer_id"]
     )
     
     # Get updated repair
     updated_repair = await db.repairs.find_one({"id": repair_id})
     
-    # Parse dates
-    if isinstance(updated_repair.get("created_at"), str):
-        updated_repair["created_at"] = datetime.fromisoformat(updated_repair["created_at"])
-    if isinstance(updated_repair.get("updated_at"), str):
-        updated_repair["updated_at"] = datetime.fromisoformat(updated_repair["updated_at"])
-    if updated_repair.get("completed_at") and isinstance(updated_repair["completed_at"], str):
-        updated_repair["completed_at"] = datetime.fromisoformat(updated_repair["completed_at"])
-    
     return RepairRequest(**updated_repair)
 
 
@@ -1073,13 +2105,15 @@ async def update_repair_status(
     customer = await db.customers.find_one({"id": repair["customer_id"]})
     
     # Update status
-    await db.repairs.update_one(
-        {"id": repair_id},
-        {"$set": {
-            "status": status,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
+    status_update = {
+        "status": status,
+        "updated_at": datetime.now(timezone.utc)
+    }
+    if status == RepairStatus.COMPLETED:
+        status_update["completed_at"] = status_update["updated_at"]
+    previous = await db.repairs.find_one_and_update({"id": repair_id}, {"$set": status_update})
+    if previous:
+        await track_repair_change(before=previous, after={**previous, **status_update})
     
     # Send SMS notification to customer
     if customer and customer.get("phone"):
@@ -1097,29 +2131,44 @@ async def update_repair_status(
         sms_result = await send_sms(customer["phone"], sms_message)
         logger.info(f"SMS result for repair {repair_id}: {sms_result}")
     
-    # Create notification for admin
-    await db.notifications.insert_one({
-        "id": str(uuid.uuid4()),
-        "user_id": current_user.id,
-        "repair_id": repair_id,
-        "title": f"Arıza Durumu Güncellendi",
-        "message": f"{customer['full_name'] if customer else 'Müşteri'} - Durum: {status}",
-        "is_read": False,
-        "created_at": datetime.now(timezone.utc).isoformat()
-    })
+    # Same schema as the other status notifications, so inboxes can read it
+    await create_notification(
+        notification_type="repair_status_update",
+        title="Arıza Durumu Güncellendi",
+        message=f"{customer['full_name'] if customer else 'Müşteri'} - Durum: {status}",
+        related_id=repair_id,
+        extra_data={
+            "repair_id": repair_id,
+            "customer_name": repair.get("customer_name"),
+            "device_info": f"{repair['device_type']} {repair['brand']} {repair['model']}",
+            "new_status": status
+        },
+        user_ids=[repair.get("assigned_technician_id")],
+        customer_id=repair["customer_id"]
+    )
     
     return {"success": True, "status": status, "sms_sent": customer and customer.get("phone") is not None}
 
 # Users management (Admin only)
 @api_router.get("/users", response_model=List[User])
-async def get_users(current_user: User = Depends(require_role([UserRole.ADMIN]))):
-    users = await db.users.find({}, {"password": 0}).to_list(1000)
-    result = []
-    for user in users:
-        if isinstance(user.get("created_at"), str):
-            user["created_at"] = datetime.fromisoformat(user["created_at"])
-        result.append(User(**user))
-    return result
+async def get_users(
+    request: Request,
+    limit: int = Query(PAGE_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    current_user: User = Depends(require_role([UserRole.ADMIN]))
+):
+    etag = await conditional_etag(request, current_user, "users")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    # The projection lists User fields only, so hashed_password never leaves the database
+    selected = sparse_fields(User, fields)
+    result, next_cursor = await fetch_page(
+        db.users, {}, limit, after, projection=model_projection(User, selected), build=trusted_row(User, selected)
+    )
+    return page_response(result, next_cursor, etag)
 
 
 @api_router.put("/users/{user_id}/role")
@@ -1139,51 +2188,101 @@ async def update_user_role(
         {"id": user_id},
         {"$set": {"role": role}}
     )
+    await bump_collection_version("users")
+    # Tokens still carry the old role claim
+    await token_epochs.bump(user_id)
+    user_cache.invalidate(existing_user["email"])
+    was_technician = existing_user.get("role") == UserRole.TECHNICIAN
+    if was_technician != (role == UserRole.TECHNICIAN):
+        await track_global_counter("total_technicians", -1 if was_technician else 1)
     
     return {"success": True, "message": f"User role updated to {role}"}
 
 
 # Technician report endpoint
-@api_router.get("/reports/technician/{technician_id}")
-async def get_technician_report(
-    technician_id: str,
-    current_user: User = Depends(require_role([UserRole.ADMIN]))
-):
-    # Get technician info
+REPORT_LIMIT_DEFAULT = 50
+
+def parse_day(value: str) -> datetime:
+    """UTC midnight of a YYYY-MM-DD day; 400 for days that do not exist (2024-02-30)"""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid date: {value}"
+        )
+
+def created_at_range(start: Optional[str], end: Optional[str]) -> dict:
+    """Filter on created_at between two YYYY-MM-DD days (UTC), inclusive"""
+    if not start and not end:
+        return {}
+    date_range = {}
+    if start:
+        date_range["$gte"] = parse_day(start)
+    if end:
+        date_range["$lt"] = parse_day(end) + timedelta(days=1)
+    return {"created_at": date_range}
+
+def technician_repairs_query(technician_id: str, start: Optional[str] = None, end: Optional[str] = None) -> dict:
+    """A technician's repairs under the rollup attribution: assigned to them, or created
+    by them and not assigned to anyone, so the list matches the per-day totals"""
+    query = {
+        "$or": [
+            {"assigned_technician_id": technician_id},
+            {"assigned_technician_id": {"$in": [None, ""]}, "created_by": technician_id}
+        ]
+    }
+    date_filter = created_at_range(start, end)
+    return {"$and": [query, date_filter]} if date_filter else query
+
+async def get_technician_or_404(technician_id: str) -> dict:
     technician = await db.users.find_one({"id": technician_id, "role": UserRole.TECHNICIAN})
     if not technician:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Technician not found"
         )
+    return technician
+
+def technician_report_totals(daily: List[dict]) -> tuple:
+    """Summary and per-day totals of the report, both taken from the rollup days"""
+    repairs_by_date = {
+        day["day"]: {"count": day["opened"], "total_cost": day["final_cost_total"], "total_estimate": day["cost_estimate_total"]}
+        for day in reversed(daily) if day["opened"]
+    }
+    summary = {
+        "total_repairs": sum(day["count"] for day in repairs_by_date.values()),
+        "total_cost": sum(day["total_cost"] for day in repairs_by_date.values()),
+        "total_estimate": sum(day["total_estimate"] for day in repairs_by_date.values())
+    }
+    return summary, repairs_by_date
+
+@api_router.get("/reports/technician/{technician_id}")
+async def get_technician_report(
+    technician_id: str,
+    start: Optional[str] = Query(None, pattern=DAY_PATTERN),
+    end: Optional[str] = Query(None, pattern=DAY_PATTERN),
+    limit: int = Query(REPORT_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX),
+    current_user: User = Depends(require_role([UserRole.ADMIN]))
+):
+    """Technician summary and per-day totals from repair_rollups, with the first page of
+    customers and of repairs (newest first, so the latest days are filled). Repairs count
+    for their assigned technician, else their creator, in the totals and the list alike.
     
-    # Get technician's customers
-    customers = await db.customers.find({"created_by_technician": technician_id}).to_list(1000)
-    
-    # Get technician's repairs
-    repairs = await db.repairs.find({
-        "$or": [
-            {"assigned_technician_id": technician_id},
-            {"created_by": technician_id}
-        ]
-    }).to_list(1000)
-    
-    # Calculate totals
-    total_repairs = len(repairs)
-    total_cost = sum(repair.get("final_cost", 0) for repair in repairs if repair.get("final_cost"))
-    total_estimate = sum(repair.get("cost_estimate", 0) for repair in repairs if repair.get("cost_estimate"))
-    
-    # Group by dates
-    repairs_by_date = {}
-    for repair in repairs:
-        if isinstance(repair.get("created_at"), str):
-            date_str = repair["created_at"][:10]  # Get YYYY-MM-DD
-        else:
-            date_str = repair.get("created_at", datetime.now(timezone.utc)).strftime("%Y-%m-%d")
-        
-        if date_str not in repairs_by_date:
-            repairs_by_date[date_str] = []
-        repairs_by_date[date_str].append(repair)
+    Further pages come from /reports/technician/{id}/customers and /repairs."""
+    # Get technician info
+    technician = await get_technician_or_404(technician_id)
+    repairs_query = technician_repairs_query(technician_id, start, end)
+    
+    total_customers, (customers, customers_next), (repairs, repairs_next), daily = await asyncio.gather(
+        db.customers.count_documents({"created_by_technician": technician_id}),
+        fetch_page(db.customers, {"created_by_technician": technician_id}, limit,
+                   projection=model_projection(Customer), build=trusted_row(Customer)),
+        fetch_page(db.repairs, repairs_query, limit,
+                   projection=model_projection(RepairRequest), build=trusted_row(RepairRequest), descending=True),
+        read_daily_rollups(start, end, technician_id)
+    )
+    summary, repairs_by_date = technician_report_totals(daily)
     
     return {
         "technician": {
@@ -1193,130 +2292,932 @@ async def get_technician_report(
             "phone": technician.get("phone")
         },
         "summary": {
-            "total_customers": len(customers),
-            "total_repairs": total_repairs,
-            "total_cost": total_cost,
-            "total_estimate": total_estimate
+            "total_customers": total_customers,
+            **summary
         },
         "customers": customers,
+        "customers_next_cursor": customers_next,
         "repairs": repairs,
-        "repairs_by_date": repairs_by_date
+        "repairs_next_cursor": repairs_next,
+        "repairs_by_date": repairs_by_date,
+        "daily": daily
     }
 
+@api_router.get("/reports/technician/{technician_id}/customers", response_model=List[Customer])
+async def get_technician_report_customers(
+    technician_id: str,
+    limit: int = Query(REPORT_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = None,
+    current_user: User = Depends(require_role([UserRole.ADMIN]))
+):
+    await get_technician_or_404(technician_id)
+    result, next_cursor = await fetch_page(
+        db.customers, {"created_by_technician": technician_id}, limit, after,
+        projection=model_projection(Customer), build=trusted_row(Customer)
+    )
+    return page_response(result, next_cursor)
+
+@api_router.get("/reports/technician/{technician_id}/repairs", response_model=List[RepairRequest])
+async def get_technician_report_repairs(
+    technician_id: str,
+    start: Optional[str] = Query(None, pattern=DAY_PATTERN),
+    end: Optional[str] = Query(None, pattern=DAY_PATTERN),
+    limit: int = Query(REPORT_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = None,
+    current_user: User = Depends(require_role([UserRole.ADMIN]))
+):
+    await get_technician_or_404(technician_id)
+    result, next_cursor = await fetch_page(
+        db.repairs, technician_repairs_query(technician_id, start, end), limit, after,
+        projection=model_projection(RepairRequest), build=trusted_row(RepairRequest), descending=True
+    )
+    return page_response(result, next_cursor)
+
+# Technician leaderboard
+OPEN_REPAIR_STATUSES = [RepairStatus.PENDING.value, RepairStatus.APPROVED.value, RepairStatus.IN_PROGRESS.value]
+
+async def compute_technician_leaderboard(start: Optional[str] = None, end: Optional[str] = None, database=None) -> dict:
+    """Per-technician totals for repairs created in [start, end], in one $group pass.
+    
+    A repair counts for its assigned technician, or its creator when unassigned,
+    the same attribution the daily rollups use."""
+    database = db if database is None else database
+    is_completed = {"$eq": ["$status", RepairStatus.COMPLETED.value]}
+    # Only dates sort at or after the epoch (BSON order: null < string < date), so this
+    # also skips timestamps migrate_dates has not converted yet, which cannot be subtracted
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    has_turnaround = {"$and": [
+        is_completed,
+        {"$gte": ["$completed_at", epoch]},
+        {"$gte": ["$created_at", epoch]}
+    ]}
+    turnaround_hours = {"$divide": [
+        {"$subtract": ["$completed_at", "$created_at"]},
+        3600 * 1000
+    ]}
+    pipeline = [
+        {"$match": created_at_range(start, end)},
+        {"$group": {
+            # Unassigned is a missing field, None or "" (the select's empty option)
+            "_id": {"$cond": [
+                {"$in": [{"$ifNull": ["$assigned_technician_id", ""]}, ["", None]]},
+                "$created_by",
+                "$assigned_technician_id"
+            ]},
+            "total_repairs": {"$sum": 1},
+            "completed_repairs": {"$sum": {"$cond": [is_completed, 1, 0]}},
+            "open_repairs": {"$sum": {"$cond": [{"$in": ["$status", OPEN_REPAIR_STATUSES]}, 1, 0]}},
+            "revenue": {"$sum": {"$cond": [{"$gt": ["$final_cost", 0]}, "$final_cost", 0]}},
+            "avg_turnaround_hours": {"$avg": {"$cond": [has_turnaround, turnaround_hours, None]}}
+        }}
+    ]
+    grouped = {}
+    async for result in database.repairs.aggregate(pipeline):
+        key = result.pop("_id")
+        if key:
+            result["revenue"] = float(result["revenue"])
+            if result["avg_turnaround_hours"] is not None:
+                result["avg_turnaround_hours"] = round(result["avg_turnaround_hours"], 1)
+            grouped[key] = result
+    return grouped
+
+@api_router.get("/reports/technicians")
+async def get_technician_leaderboard(
+    start: Optional[str] = Query(None, pattern=DAY_PATTERN),
+    end: Optional[str] = Query(None, pattern=DAY_PATTERN),
+    current_user: User = Depends(require_role([UserRole.ADMIN]))
+):
+    """Repairs, completions, revenue, turnaround and open backlog for every technician (Admin only).
+    
+    The grouped totals are cached per date range until the repairs version changes."""
+    version = await read_collection_version("repairs")
+    grouped = leaderboard_cache.get((start, end), version)
+    if grouped is None:
+        grouped = await compute_technician_leaderboard(start, end)
+        leaderboard_cache.put((start, end), version, grouped)
+    
+    technicians = await db.users.find(
+        {"role": UserRole.TECHNICIAN},
+        {"_id": 0, "id": 1, "full_name": 1, "email": 1}
+    ).to_list(None)
+    empty = {"total_repairs": 0, "completed_repairs": 0, "open_repairs": 0, "revenue": 0.0, "avg_turnaround_hours": None}
+    rows = [{**technician, **grouped.get(technician["id"], empty)} for technician in technicians]
+    rows.sort(key=lambda row: (row["completed_repairs"], row["revenue"]), reverse=True)
+    return {"start": start, "end": end, "technicians": rows}
+
+# ==================== VERSION STAMPS ====================
+
+# collection_versions holds one {_id: <collection>, version: n} document per
+# collection whose derived reports are cached. Writers bump it; readers compare it.
+async def bump_collection_version(name: str):
+    try:
+        await db.collection_versions.update_one({"_id": name}, {"$inc": {"version": 1}}, upsert=True)
+    except Exception as e:
+        logger.error(f"Version bump for {name} failed: {e}")
+
+async def read_collection_version(name: str) -> int:
+    stamp = await db.collection_versions.find_one({"_id": name})
+    return stamp["version"] if stamp else 0
+
+async def read_collection_versions(*names: str) -> dict:
+    versions = {name: 0 for name in names}
+    async for stamp in db.collection_versions.find({"_id": {"$in": list(names)}}):
+        versions[stamp["_id"]] = stamp["version"]
+    return versions
+
+# Dashboard reads carry a strong ETag derived from the versions of the collections
+# they read, the caller and the query string. A matching If-None-Match gets a 304
+# before any query runs. Cache-Control: no-cache makes browsers revalidate every time.
+async def conditional_etag(request: Request, current_user: User, *collections: str) -> str:
+    versions = await read_collection_versions(*collections)
+    key = json.dumps([request.url.path, str(request.query_params), current_user.id, current_user.role, versions], default=str)
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """The 304 response when If-None-Match already holds `etag`, else None"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+    return None
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+class VersionedCache:
+    """LRU cache whose entries are valid only for the collection version they were built from"""
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key, version: int):
+        entry = self.entries.get(key)
+        if entry and entry[0] == version:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+    
+    def put(self, key, version: int, value):
+        self.entries[key] = (version, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+    
+    def stats(self) -> dict:
+        return {"size": len(self.entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+leaderboard_cache = VersionedCache(LEADERBOARD_CACHE_MAX_SIZE)
+
+# ==================== STATS COUNTERS ====================
+
+# stats_counters holds one document per scope: "global", "technician:<id>" (repairs
+# assigned to a technician) and "creator:<id>" (repairs a user opened). Every write
+# path $incs the difference it makes, so /api/stats is a single document read.
+# `python manage.py reconcile-stats` rebuilds them from scratch and reports drift.
+GLOBAL_SCOPE = "global"
+COUNTER_REPAIR_PROJECTION = {
+    "_id": 0, "status": 1, "final_cost": 1, "cost_estimate": 1, "payment_status": 1,
+    "assigned_technician_id": 1, "created_by": 1, "created_at": 1, "completed_at": 1
+}
+
+def repair_counter_scopes(repair: dict) -> List[str]:
+    scopes = [GLOBAL_SCOPE]
+    if repair.get("assigned_technician_id"):
+        scopes.append(f"technician:{repair['assigned_technician_id']}")
+    if repair.get("created_by"):
+        scopes.append(f"creator:{repair['created_by']}")
+    return scopes
+
+def repair_counter_values(repair: dict) -> dict:
+    """What one repair contributes to each counter of its scopes"""
+    final_cost = repair.get("final_cost") or 0
+    has_final_cost = isinstance(final_cost, (int, float)) and final_cost > 0
+    is_paid = repair.get("payment_status") == PaymentStatus.PAID
+    return {
+        "total_repairs": 1,
+        "pending_repairs": int(repair.get("status") == RepairStatus.PENDING),
+        "completed_repairs": int(repair.get("status") == RepairStatus.COMPLETED),
+        "total_paid_amount": float(final_cost) if has_final_cost and is_paid else 0.0,
+        "total_unpaid_amount": float(final_cost) if has_final_cost and not is_paid else 0.0,
+        "paid_repairs": int(has_final_cost and is_paid),
+        "unpaid_repairs": int(has_final_cost and not is_paid)
+    }
+
+async def apply_counter_deltas(deltas: dict):
+    """$inc each scope document by its non-zero deltas. Failures are logged, not raised:
+    the primary write already succeeded and reconcile-stats repairs any drift."""
+    operations = []
+    for scope, fields in deltas.items():
+        increments = {field: value for field, value in fields.items() if value}
+        if increments:
+            operations.append(UpdateOne({"_id": scope}, {"$inc": increments}, upsert=True))
+    if not operations:
+        return
+    try:
+        await db.stats_counters.bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.error(f"Stats counter update failed, run reconcile-stats: {e}")
+
+def add_repair_deltas(counter_deltas: dict, rollup_deltas: dict, repair: dict, sign: int):
+    values = repair_counter_values(repair)
+    for scope in repair_counter_scopes(repair):
+        scope_deltas = counter_deltas.setdefault(scope, {})
+        for field, value in values.items():
+            scope_deltas[field] = scope_deltas.get(field, 0) + sign * value
+    for bucket_id, dimensions, bucket_values in repair_rollup_values(repair):
+        bucket = rollup_deltas.setdefault(bucket_id, {"dimensions": dimensions, "inc": {}})
+        for field, value in bucket_values.items():
+            bucket["inc"][field] = bucket["inc"].get(field, 0) + sign * value
+
+async def track_repair_change(before: Optional[dict] = None, after: Optional[dict] = None):
+    """Move a repair's contribution from its old state to its new one"""
+    counter_deltas = {}
+    rollup_deltas = {}
+    for repair, sign in ((before, -1), (after, 1)):
+        if repair:
+            add_repair_deltas(counter_deltas, rollup_deltas, repair, sign)
+    await apply_counter_deltas(counter_deltas)
+    await apply_rollup_deltas(rollup_deltas)
+    await bump_collection_version("repairs")
+
+async def track_repairs_removed(repairs: List[dict]):
+    counter_deltas = {}
+    rollup_deltas = {}
+    for repair in repairs:
+        add_repair_deltas(counter_deltas, rollup_deltas, repair, -1)
+    await apply_counter_deltas(counter_deltas)
+    await apply_rollup_deltas(rollup_deltas)
+    await bump_collection_version("repairs")
+
+async def track_global_counter(field: str, amount: int):
+    await apply_counter_deltas({GLOBAL_SCOPE: {field: amount}})
+
+async def reset_repair_counters(*extra_fields: str):
+    """Zero the repair counters (and `extra_fields`) after a bulk delete"""
+    try:
+        await db.repair_rollups.delete_many({})
+        await db.stats_counters.delete_many({"_id": {"$ne": GLOBAL_SCOPE}})
+        await db.stats_counters.update_one(
+            {"_id": GLOBAL_SCOPE},
+            {"$set": {field: 0 for field in REPAIR_COUNTER_FIELDS + list(extra_fields)}},
+            upsert=True
+        )
+    except Exception as e:
+        logger.error(f"Stats counter reset failed, run reconcile-stats: {e}")
+    await bump_collection_version("repairs")
+
+async def read_counters(scope: str) -> dict:
+    counters = await db.stats_counters.find_one({"_id": scope}, {"_id": 0}) or {}
+    return {field: counters.get(field, 0) for field in REPAIR_COUNTER_FIELDS + ["total_customers", "total_technicians"]}
+
+async def rebuild_stats_counters(database=None) -> List[dict]:
+    """Recompute every counter document from the source collections.
+    
+    Returns the drift found, one entry per (scope, field) that was wrong."""
+    database = db if database is None else database
+    expected = {}
+    global_stats = await compute_repair_stats({}, database)
+    global_stats["total_customers"] = await database.customers.count_documents({})
+    global_stats["total_technicians"] = await database.users.count_documents({"role": UserRole.TECHNICIAN})
+    expected[GLOBAL_SCOPE] = global_stats
+    
+    by_technician = await group_repair_stats({"assigned_technician_id": {"$nin": [None, ""]}}, "$assigned_technician_id", database)
+    for technician_id, stats in by_technician.items():
+        expected[f"technician:{technician_id}"] = stats
+    by_creator = await group_repair_stats({"created_by": {"$nin": [None, ""]}}, "$created_by", database)
+    for creator_id, stats in by_creator.items():
+        expected[f"creator:{creator_id}"] = stats
+    
+    current = {}
+    async for counters in database.stats_counters.find({}):
+        current[counters.pop("_id")] = counters
+    
+    drift = []
+    for scope in sorted(set(expected) | set(current)):
+        fields = set(expected.get(scope, {})) | set(current.get(scope, {}))
+        for field in sorted(fields):
+            expected_value = expected.get(scope, {}).get(field, 0)
+            actual_value = current.get(scope, {}).get(field, 0)
+            if abs(expected_value - actual_value) > 0.005:
+                drift.append({"scope": scope, "field": field, "expected": expected_value, "actual": actual_value})
+    
+    operations = [ReplaceOne({"_id": scope}, values, upsert=True) for scope, values in expected.items()]
+    await database.stats_counters.bulk_write(operations, ordered=False)
+    await database.stats_counters.delete_many({"_id": {"$nin": list(expected)}})
+    return drift
+
+# ==================== DAILY ROLLUPS ====================
+
+# repair_rollups holds one document per (day, technician, status) bucket, kept current
+# through the same delta path as stats_counters:
+# - opened, cost and payment totals count on the day the repair was created
+# - closed counts on the day it was completed
+# The technician of a repair is its assigned technician, else whoever created it.
+# `python manage.py backfill-rollups` rebuilds the collection from repairs.
+ROLLUP_FIELDS = [
+    "opened",
+    "closed",
+    "cost_estimate_total",
+    "final_cost_total",
+    "paid_amount",
+    "unpaid_amount",
+    "paid_repairs",
+    "unpaid_repairs"
+]
+
+def rollup_day(value: Optional[datetime]) -> Optional[str]:
+    # migrate_dates leaves unparseable strings in place (and logs them); they have no day
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%d")
+
+def rollup_bucket(day: str, technician_id: Optional[str], repair_status) -> tuple:
+    technician_id = technician_id or None
+    status_value = repair_status.value if isinstance(repair_status, Enum) else repair_status
+    bucket_id = f"{day}|{technician_id or '-'}|{status_value}"
+    return bucket_id, {"day": day, "technician_id": technician_id, "status": status_value}
+
+def repair_rollup_values(repair: dict) -> List[tuple]:
+    """(bucket_id, dimensions, values) for every rollup bucket a repair counts in"""
+    technician_id = repair.get("assigned_technician_id") or repair.get("created_by")
+    counters = repair_counter_values(repair)
+    buckets = []
+    
+    opened_day = rollup_day(repair.get("created_at"))
+    if opened_day:
+        bucket_id, dimensions = rollup_bucket(opened_day, technician_id, repair.get("status"))
+        cost_estimate = repair.get("cost_estimate") or 0
+        buckets.append((bucket_id, dimensions, {
+            "opened": 1,
+            "cost_estimate_total": float(cost_estimate) if isinstance(cost_estimate, (int, float)) else 0.0,
+            "final_cost_total": counters["total_paid_amount"] + counters["total_unpaid_amount"],
+            "paid_amount": counters["total_paid_amount"],
+            "unpaid_amount": counters["total_unpaid_amount"],
+            "paid_repairs": counters["paid_repairs"],
+            "unpaid_repairs": counters["unpaid_repairs"]
+        }))
+    
+    closed_day = rollup_day(repair.get("completed_at"))
+    if closed_day:
+        bucket_id, dimensions = rollup_bucket(closed_day, technician_id, repair.get("status"))
+        buckets.append((bucket_id, dimensions, {"closed": 1}))
+    return buckets
+
+async def apply_rollup_deltas(deltas: dict):
+    operations = []
+    for bucket_id, bucket in deltas.items():
+        increments = {field: value for field, value in bucket["inc"].items() if value}
+        if increments:
+            operations.append(UpdateOne(
+                {"_id": bucket_id},
+                {"$inc": increments, "$setOnInsert": bucket["dimensions"]},
+                upsert=True
+            ))
+    if not operations:
+        return
+    try:
+        await db.repair_rollups.bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.error(f"Repair rollup update failed, run backfill-rollups: {e}")
+
+async def rebuild_repair_rollups(database=None) -> int:
+    """Recompute repair_rollups from every repair; returns the number of buckets"""
+    database = db if database is None else database
+    buckets = {}
+    async for repair in database.repairs.find({}, COUNTER_REPAIR_PROJECTION):
+        for bucket_id, dimensions, values in repair_rollup_values(repair):
+            bucket = buckets.setdefault(bucket_id, {"_id": bucket_id, **dimensions, **{field: 0 for field in ROLLUP_FIELDS}})
+            for field, value in values.items():
+                bucket[field] += value
+    
+    await database.repair_rollups.delete_many({})
+    documents = list(buckets.values())
+    for start in range(0, len(documents), 1000):
+        await database.repair_rollups.insert_many(documents[start:start + 1000], ordered=False)
+    return len(documents)
+
+async def read_daily_rollups(start: Optional[str], end: Optional[str], technician_id: Optional[str] = None) -> List[dict]:
+    """Per-day totals summed over the rollup buckets, with an opened count per status"""
+    match = {}
+    if start or end:
+        match["day"] = {}
+        if start:
+            match["day"]["$gte"] = start
+        if end:
+            match["day"]["$lte"] = end
+    if technician_id:
+        match["technician_id"] = technician_id
+    
+    group = {"_id": "$day", "by_status": {"$push": {"status": "$status", "opened": "$opened", "closed": "$closed"}}}
+    for field in ROLLUP_FIELDS:
+        group[field] = {"$sum": f"${field}"}
+    pipeline = [
+        {"$match": match},
+        {"$group": group},
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0, "day": "$_id", "by_status": 1, **{field: 1 for field in ROLLUP_FIELDS}}}
+    ]
+    days = await db.repair_rollups.aggregate(pipeline).to_list(None)
+    for day in days:
+        by_status = {}
+        for entry in day["by_status"]:
+            totals = by_status.setdefault(entry["status"], {"opened": 0, "closed": 0})
+            totals["opened"] += entry.get("opened", 0)
+            totals["closed"] += entry.get("closed", 0)
+        day["by_status"] = {key: value for key, value in by_status.items() if value["opened"] or value["closed"]}
+    return days
+
+@api_router.get("/reports/daily")
+async def get_daily_report(
+    start: Optional[str] = Query(None, pattern=DAY_PATTERN),
+    end: Optional[str] = Query(None, pattern=DAY_PATTERN),
+    technician_id: Optional[str] = None,
+    current_user: User = Depends(require_role([UserRole.ADMIN]))
+):
+    """Daily repair and revenue totals from repair_rollups (Admin only)"""
+    return {"days": await read_daily_rollups(start, end, technician_id)}
+
 # Stats endpoint
-@api_router.get("/stats")
-async def get_stats(current_user: User = Depends(get_current_user)):
+REPAIR_COUNTER_FIELDS = [
+    "total_repairs",
+    "pending_repairs",
+    "completed_repairs",
+    "total_paid_amount",
+    "total_unpaid_amount",
+    "paid_repairs",
+    "unpaid_repairs"
+]
+
+async def group_repair_stats(match: dict, group_key, database=None) -> dict:
+    """Repair counts and payment totals per `group_key` value, in a single $group pass"""
+    database = db if database is None else database
+    has_final_cost = {"$gt": ["$final_cost", 0]}
+    is_paid = {"$eq": ["$payment_status", PaymentStatus.PAID.value]}
+    is_unpaid = {"$ne": ["$payment_status", PaymentStatus.PAID.value]}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": group_key,
+            "total_repairs": {"$sum": 1},
+            "pending_repairs": {"$sum": {"$cond": [{"$eq": ["$status", RepairStatus.PENDING.value]}, 1, 0]}},
+            "completed_repairs": {"$sum": {"$cond": [{"$eq": ["$status", RepairStatus.COMPLETED.value]}, 1, 0]}},
+            "total_paid_amount": {"$sum": {"$cond": [{"$and": [has_final_cost, is_paid]}, "$final_cost", 0]}},
+            "total_unpaid_amount": {"$sum": {"$cond": [{"$and": [has_final_cost, is_unpaid]}, "$final_cost", 0]}},
+            "paid_repairs": {"$sum": {"$cond": [{"$and": [has_final_cost, is_paid]}, 1, 0]}},
+            "unpaid_repairs": {"$sum": {"$cond": [{"$and": [has_final_cost, is_unpaid]}, 1, 0]}}
+        }}
+    ]
+    grouped = {}
+    async for result in database.repairs.aggregate(pipeline):
+        key = result.pop("_id")
+        result["total_paid_amount"] = float(result["total_paid_amount"])
+        result["total_unpaid_amount"] = float(result["total_unpaid_amount"])
+        grouped[key] = result
+    return grouped
+
+async def compute_repair_stats(match: dict, database=None) -> dict:
+    """Repair counts and payment totals for `match` in a single $group pass"""
+    grouped = await group_repair_stats(match, None, database)
+    stats = {field: 0 for field in REPAIR_COUNTER_FIELDS}
+    stats["total_paid_amount"] = 0.0
+    stats["total_unpaid_amount"] = 0.0
+    stats.update(grouped.get(None, {}))
+    return stats
+
+async def read_stats(current_user: User) -> dict:
     if current_user.role == UserRole.ADMIN:
-        total_repairs = await db.repairs.count_documents({})
-        pending_repairs = await db.repairs.count_documents({"status": RepairStatus.PENDING})
-        completed_repairs = await db.repairs.count_documents({"status": RepairStatus.COMPLETED})
-        total_customers = await db.customers.count_documents({})
-        total_technicians = await db.users.count_documents({"role": UserRole.TECHNICIAN})
-        
-        # Calculate total payments (completed repairs with final_cost)
-        total_paid_amount = 0.0
-        total_unpaid_amount = 0.0
-        paid_count = 0
-        unpaid_count = 0
-        
-        repairs_cursor = db.repairs.find({})
-        async for repair in repairs_cursor:
-            if repair.get("final_cost") and repair.get("final_cost") > 0:
-                if repair.get("payment_status") == "odendi":
-                    total_paid_amount += repair["final_cost"]
-                    paid_count += 1
-                else:
-                    total_unpaid_amount += repair["final_cost"]
-                    unpaid_count += 1
-        
+        counters = await read_counters(GLOBAL_SCOPE)
         return {
-            "total_repairs": total_repairs,
-            "pending_repairs": pending_repairs,
-            "completed_repairs": completed_repairs,
-            "total_customers": total_customers,
-            "total_technicians": total_technicians,
-            "total_paid_amount": total_paid_amount,
-            "total_unpaid_amount": total_unpaid_amount,
-            "paid_repairs": paid_count,
-            "unpaid_repairs": unpaid_count
+            "total_repairs": counters["total_repairs"],
+            "pending_repairs": counters["pending_repairs"],
+            "completed_repairs": counters["completed_repairs"],
+            "total_customers": counters["total_customers"],
+            "total_technicians": counters["total_technicians"],
+            "total_paid_amount": float(counters["total_paid_amount"]),
+            "total_unpaid_amount": float(counters["total_unpaid_amount"]),
+            "paid_repairs": counters["paid_repairs"],
+            "unpaid_repairs": counters["unpaid_repairs"]
         }
     elif current_user.role == UserRole.TECHNICIAN:
-        my_repairs = await db.repairs.count_documents({"assigned_technician_id": current_user.id})
-        my_pending = await db.repairs.count_documents({
-            "assigned_technician_id": current_user.id,
-            "status": RepairStatus.PENDING
-        })
-        my_completed = await db.repairs.count_documents({
-            "assigned_technician_id": current_user.id,
-            "status": RepairStatus.COMPLETED
-        })
+        repair_stats = await read_counters(f"technician:{current_user.id}")
         
         return {
-            "my_repairs": my_repairs,
-            "my_pending": my_pending,
-            "my_completed": my_completed
+            "my_repairs": repair_stats["total_repairs"],
+            "my_pending": repair_stats["pending_repairs"],
+            "my_completed": repair_stats["completed_repairs"]
         }
     else:  # Customer
-        my_repairs = await db.repairs.count_documents({"created_by": current_user.id})
-        my_pending = await db.repairs.count_documents({
-            "created_by": current_user.id,
-            "status": RepairStatus.PENDING
-        })
+        repair_stats = await read_counters(f"creator:{current_user.id}")
         
         return {
-            "my_repairs": my_repairs,
-            "my_pending": my_pending
+            "my_repairs": repair_stats["total_repairs"],
+            "my_pending": repair_stats["pending_repairs"]
         }
 
-# Notifications endpoint
-@api_router.get("/notifications")
+@api_router.get("/stats")
+async def get_stats(request: Request, current_user: User = Depends(get_token_user)):
+    etag = await conditional_etag(request, current_user, "repairs", "customers", "users")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    return ORJSONResponse(await read_stats(current_user), headers=etag_headers(etag))
+
+# ==================== NOTIFICATION STREAM ====================
+
+# Signed-in tabs hold a server-sent event stream on their own inbox instead of polling
+# the unread count. Events: "notification" (id = notification id, replayable through
+# Last-Event-ID) and "unread_count". A comment line goes out every heartbeat interval so proxies keep the
+# connection open and dead clients are noticed.
+class NotificationHub:
+    """In-process fan-out of stream events to the connected streams of each recipient"""
+    
+    def __init__(self, queue_size: int, drop_policy: str = "oldest"):
+        if drop_policy not in ("oldest", "disconnect"):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        self.subscribers = {}  # queue -> recipient id
+        self.published = 0
+        self.dropped = 0
+        self.disconnected = 0
+    
+    def subscribe(self, recipient_id: Optional[str] = None) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers[queue] = recipient_id
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.pop(queue, None)
+    
+    def publish(self, event: str, data: dict, event_id: Optional[str] = None, recipient_id: Optional[str] = None):
+        """Deliver to `recipient_id`'s streams, or to every stream when it is None"""
+        self.published += 1
+        for queue, subscriber in list(self.subscribers.items()):
+            if recipient_id is not None and subscriber != recipient_id:
+                continue
+            if not queue.full():
+                queue.put_nowait((event, data, event_id))
+            elif self.drop_policy == "disconnect":
+                # A stalled tab is cut off; it reconnects and replays from Mongo
+                self.end(queue)
+                self.disconnected += 1
+            else:
+                # A stalled tab loses its oldest event rather than blocking everyone
+                queue.get_nowait()
+                queue.put_nowait((event, data, event_id))
+                self.dropped += 1
+    
+    def end(self, queue: asyncio.Queue):
+        """Discard a stream's backlog and queue the end marker"""
+        self.subscribers.pop(queue, None)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+    
+    def close(self):
+        """End every open stream (shutdown)"""
+        for queue in list(self.subscribers):
+            self.end(queue)
+    
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+            "disconnected": self.disconnected,
+            "drop_policy": self.drop_policy
+        }
+
+notification_hub = NotificationHub(NOTIFICATION_STREAM_QUEUE_SIZE, NOTIFICATION_STREAM_DROP_POLICY)
+
+# Publishers go through a broker, which hands every event to the hub of each worker.
+class MemoryBroker:
+    """Single process: publish straight into the local hub"""
+    
+    name = "memory"
+    
+    def __init__(self, hub: NotificationHub, database=None):
+        self.hub = hub
+    
+    @property
+    def has_listeners(self) -> bool:
+        return bool(self.hub.subscribers)
+    
+    async def start(self):
+        pass
+    
+    async def stop(self):
+        pass
+    
+    async def publish(self, event: str, data: dict, event_id: Optional[str] = None, recipient_id: Optional[str] = None):
+        self.hub.publish(event, data, event_id, recipient_id)
+    
+    async def publish_many(self, events: List[tuple]):
+        """Publish (event, data, event_id, recipient_id) tuples in order"""
+        for event in events:
+            self.hub.publish(*event)
+    
+    def stats(self) -> dict:
+        return {"broker": self.name}
+
+class MongoChangeStreamBroker:
+    """Many workers: events are inserted into stream_events and every worker, the
+    publisher included, delivers them to its hub from a change stream. Documents
+    expire after NOTIFICATION_BROKER_EVENT_TTL_SECONDS."""
+    
+    name = "mongo"
+    
+    def __init__(self, hub: NotificationHub, database=None):
+        self.hub = hub
+        self.database = database
+        self.task = None
+        self.resume_token = None
+        self.received = 0
+        self.restarts = 0
+    
+    @property
+    def collection(self):
+        return (db if self.database is None else self.database).stream_events
+    
+    @property
+    def has_listeners(self) -> bool:
+        # Other workers' streams are invisible from here
+        return True
+    
+    async def start(self):
+        self.task = asyncio.create_task(self.listen())
+    
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+    
+    async def publish(self, event: str, data: dict, event_id: Optional[str] = None, recipient_id: Optional[str] = None):
+        await self.collection.insert_one({
+            "event": event,
+            "data": data,
+            "event_id": event_id,
+            "recipient_id": recipient_id,
+            "created_at": datetime.now(timezone.utc)
+        })
+    
+    async def publish_many(self, events: List[tuple]):
+        """Publish (event, data, event_id, recipient_id) tuples in order, in one insert"""
+        if not events:
+            return
+        now = datetime.now(timezone.utc)
+        await self.collection.insert_many([
+            {"event": event, "data": data, "event_id": event_id, "recipient_id": recipient_id, "created_at": now}
+            for event, data, event_id, recipient_id in events
+        ], ordered=True)
+    
+    async def listen(self):
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        while True:
+            try:
+                async with self.collection.watch(pipeline, resume_after=self.resume_token) as stream:
+                    async for change in stream:
+                        self.resume_token = stream.resume_token
+                        document = change["fullDocument"]
+                        self.received += 1
+                        self.hub.publish(document["event"], document["data"], document.get("event_id"), document.get("recipient_id"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.restarts += 1
+                logging.error(f"❌ Notification change stream stopped, retrying: {e}")
+                await asyncio.sleep(NOTIFICATION_BROKER_RETRY_SECONDS)
+    
+    def stats(self) -> dict:
+        return {"broker": self.name, "received": self.received, "restarts": self.restarts}
+
+NOTIFICATION_BROKERS = {
+    MemoryBroker.name: MemoryBroker,
+    MongoChangeStreamBroker.name: MongoChangeStreamBroker,
+}
+
+def make_notification_broker(kind: str, hub: NotificationHub, database=None):
+    if kind not in NOTIFICATION_BROKERS:
+        raise ValueError(f"Unknown notification broker: {kind}")
+    return NOTIFICATION_BROKERS[kind](hub, database)
+
+notification_broker = make_notification_broker(NOTIFICATION_BROKER, notification_hub)
+
+def notification_event(notification: dict) -> dict:
+    return {key: value for key, value in notification.items() if key != "_id"}
+
+async def publish_unread_count(recipient_ids: List[str]):
+    """Push the current unread counters of these inboxes to their streams"""
+    if not notification_broker.has_listeners or not recipient_ids:
+        return
+    for recipient_id, count in (await read_unread_counts(recipient_ids)).items():
+        await notification_broker.publish("unread_count", {"unread_count": count}, recipient_id=recipient_id)
+
+def format_sse(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {orjson.dumps(data).decode()}")
+    return "\n".join(lines) + "\n\n"
+
+def stream_session(user: User, epoch: int, expires_at: datetime) -> dict:
+    """A stream stays open while the access token it was opened with would be accepted"""
+    return {"user": user, "epoch": epoch, "expires_at": expires_at}
+
+async def stream_session_valid(session: dict) -> bool:
+    if datetime.now(timezone.utc) >= session["expires_at"]:
+        return False
+    return session["epoch"] >= await token_epochs.current(session["user"].id)
+
+@api_router.post("/notifications/stream-ticket")
+async def create_stream_ticket(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """A one-time ticket for GET /notifications/stream?ticket=, valid NOTIFICATION_STREAM_TICKET_SECONDS"""
+    current_user = await get_token_user(credentials)
+    payload = decode_access_token(credentials.credentials)
+    ticket = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    await db.stream_tickets.insert_one({
+        "_id": hash_refresh_token(ticket),
+        "user": {
+            "id": current_user.id,
+            "email": current_user.email,
+            "full_name": current_user.full_name,
+            "role": current_user.role.value,
+            "phone": current_user.phone
+        },
+        "epoch": payload.get("epoch", 0),
+        "session_expires_at": datetime.fromtimestamp(payload["exp"], timezone.utc),
+        "expires_at": now + timedelta(seconds=NOTIFICATION_STREAM_TICKET_SECONDS)
+    })
+    return {"ticket": ticket, "expires_in": NOTIFICATION_STREAM_TICKET_SECONDS}
+
+async def get_stream_session(
+    ticket: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(stream_security)
+) -> dict:
+    """Authenticate a stream from a bearer token or a one-time ticket"""
+    if credentials is not None:
+        user = await get_token_user(credentials)
+        payload = decode_access_token(credentials.credentials)
+        return stream_session(user, payload.get("epoch", 0), datetime.fromtimestamp(payload["exp"], timezone.utc))
+    if not ticket:
+        raise credentials_exception()
+    
+    stored = await db.stream_tickets.find_one_and_delete({"_id": hash_refresh_token(ticket)})
+    # The TTL monitor only runs once a minute, so check expiry here too
+    if not stored or stored["expires_at"] <= datetime.now(timezone.utc):
+        raise credentials_exception()
+    user = User.model_construct(**{**stored["user"], "role": UserRole(stored["user"]["role"])}, is_active=True)
+    session = stream_session(user, stored["epoch"], stored["session_expires_at"])
+    if not await stream_session_valid(session):
+        raise credentials_exception()
+    return session
+
+async def replay_notifications(recipient_id: str, last_event_id: str) -> List[dict]:
+    """Inbox notifications created after the one a reconnecting client saw last"""
+    last_seen = await db.notifications.find_one({"id": last_event_id, "recipient_id": recipient_id}, {"_id": 0, "created_at": 1, "id": 1})
+    if not last_seen:
+        return []
+    # Keyed on (created_at, id) like list cursors: a write-behind batch shares timestamps
+    items, _ = await fetch_page(
+        db.notifications, {"recipient_id": recipient_id}, NOTIFICATION_STREAM_REPLAY_LIMIT,
+        after=encode_cursor(last_seen), projection={"_id": 0}
+    )
+    return items
+
+@api_router.get("/notifications/stream")
+async def stream_notifications(
+    request: Request,
+    last_event_id: Optional[str] = None,
+    session: dict = Depends(get_stream_session)
+):
+    """Server-sent events for new notifications and unread-count changes in the user's inbox.
+    
+    Reconnects send Last-Event-ID (or ?last_event_id=) to replay missed notifications.
+    The stream ends when its access token expires or is revoked; browsers then open a
+    new one with a fresh ticket."""
+    current_user = session["user"]
+    last_event_id = request.headers.get("last-event-id") or last_event_id
+    # Subscribe before reading replay and count so nothing published meanwhile is lost
+    queue = notification_hub.subscribe(current_user.id)
+    
+    async def events():
+        try:
+            # Reconnect after 3 s; EventSource sends Last-Event-ID on its own
+            yield "retry: 3000\n\n"
+            if last_event_id:
+                for notification in await replay_notifications(current_user.id, last_event_id):
+                    yield format_sse("notification", notification, notification["id"])
+            counts = await read_unread_counts([current_user.id])
+            yield format_sse("unread_count", {"unread_count": counts[current_user.id]})
+            
+            while True:
+                until_expiry = (session["expires_at"] - datetime.now(timezone.utc)).total_seconds()
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=max(0, min(NOTIFICATION_STREAM_HEARTBEAT_SECONDS, until_expiry)))
+                except asyncio.TimeoutError:
+                    # Revocations and expiry are checked once per heartbeat
+                    if not await stream_session_valid(session):
+                        return
+                    yield ": heartbeat\n\n"
+                    continue
+                if item is None:
+                    return
+                yield format_sse(*item)
+        finally:
+            notification_hub.unsubscribe(queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Notifications endpoints: every user reads and clears their own inbox
+@api_router.get("/notifications", response_model=List[Notification])
 async def get_notifications(
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = None,
     unread_only: bool = False,
-    current_user: User = Depends(require_role([UserRole.ADMIN]))
+    current_user: User = Depends(get_token_user)
 ):
-    query = {}
+    """Newest first; pass the X-Next-Cursor header back as ?after= for the next page"""
+    query = {"recipient_id": current_user.id}
     if unread_only:
         query["read"] = False
     
-    notifications = await db.notifications.find(query).sort("created_at", -1).limit(limit).to_list(limit)
-    result = []
-    for notification in notifications:
-        if isinstance(notification.get("created_at"), str):
-            notification["created_at"] = datetime.fromisoformat(notification["created_at"])
-        result.append(Notification(**notification))
-    return result
+    result, next_cursor = await fetch_page(
+        db.notifications, query, limit, after,
+        projection=model_projection(Notification), build=trusted_row(Notification), descending=True
+    )
+    return page_response(result, next_cursor)
+
+@api_router.put("/notifications/read")
+async def mark_notifications_read(
+    read_request: NotificationReadRequest,
+    current_user: User = Depends(get_token_user)
+):
+    """Mark the listed notifications, or the whole inbox when ids is omitted, as read"""
+    query = {"recipient_id": current_user.id, "read": False}
+    if read_request.ids is not None:
+        query["id"] = {"$in": read_request.ids}
+    else:
+        await notification_writer.flush()
+    result = await db.notifications.update_many(query, {"$set": read_marker()})
+    
+    await adjust_unread_counts({current_user.id: -result.modified_count})
+    await publish_unread_count([current_user.id])
+    return {"marked_read": result.modified_count}
 
 @api_router.put("/notifications/{notification_id}/read")
 async def mark_notification_read(
     notification_id: str,
-    current_user: User = Depends(require_role([UserRole.ADMIN]))
+    current_user: User = Depends(get_token_user)
 ):
+    # Only an unread copy is updated: the marker sets a new read_at every time, so a
+    # repeated call would otherwise count as modified and decrement the counter again
     result = await db.notifications.update_one(
-        {"id": notification_id}, 
-        {"$set": {"read": True}}
+        {"id": notification_id, "recipient_id": current_user.id, "read": False},
+        {"$set": read_marker()}
     )
     
     if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Notification not found"
-        )
+        if not await db.notifications.find_one({"id": notification_id, "recipient_id": current_user.id}, {"_id": 1}):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Notification not found"
+            )
+        return {"message": "Notification marked as read"}
     
+    await adjust_unread_counts({current_user.id: -result.modified_count})
+    await publish_unread_count([current_user.id])
     return {"message": "Notification marked as read"}
 
 @api_router.get("/notifications/unread-count")
 async def get_unread_notifications_count(
-    current_user: User = Depends(require_role([UserRole.ADMIN]))
+    current_user: User = Depends(get_token_user)
 ):
-    count = await db.notifications.count_documents({"read": False})
-    return {"unread_count": count}
+    counts = await read_unread_counts([current_user.id])
+    return {"unread_count": counts[current_user.id]}
 
 @api_router.delete("/notifications/clear-all")
 async def clear_all_notifications(
-    current_user: User = Depends(require_role([UserRole.ADMIN]))
+    current_user: User = Depends(get_token_user)
 ):
-    result = await db.notifications.delete_many({})
+    await notification_writer.flush()
+    result = await db.notifications.delete_many({"recipient_id": current_user.id})
+    await db.notification_counters.update_one({"_id": current_user.id}, {"$set": {"unread": 0}}, upsert=True)
+    await publish_unread_count([current_user.id])
     return {"message": f"{result.deleted_count} notifications cleared"}
 
 @api_router.delete("/admin/repairs/delete-all")
@@ -1324,6 +3225,8 @@ async def delete_all_repairs(
     current_user: User = Depends(require_role([UserRole.ADMIN]))
 ):
     result = await db.repairs.delete_many({})
+    await reset_repair_counters()
+    await mark_repairs_purged()
     return {"message": f"{result.deleted_count} repair records deleted"}
 
 @api_router.delete("/admin/customers/delete-all")
@@ -1334,10 +3237,26 @@ async def delete_all_customers(
     repairs_result = await db.repairs.delete_many({})
     # Then delete all customers
     customers_result = await db.customers.delete_many({})
+    await reset_repair_counters("total_customers")
+    await mark_repairs_purged()
+    await bump_collection_version("customers")
     return {
         "message": f"{customers_result.deleted_count} customers and {repairs_result.deleted_count} repair records deleted"
     }
 
+async def delete_users(query: dict) -> int:
+    """Delete users and revoke their access and refresh tokens. Every user deletion goes
+    through here: stateless tokens are never checked against the users collection."""
+    users = await db.users.find(query, {"_id": 0, "id": 1, "token_epoch": 1}).to_list(None)
+    if not users:
+        return 0
+    user_ids = [user["id"] for user in users]
+    await token_epochs.revoke_deleted(users)
+    result = await db.users.delete_many({"id": {"$in": user_ids}})
+    await db.refresh_tokens.delete_many({"user_id": {"$in": user_ids}})
+    user_cache.invalidate()
+    return result.deleted_count
+
 @api_router.delete("/admin/system/reset")
 async def reset_system(
     current_user: User = Depends(require_role([UserRole.ADMIN]))
@@ -1346,11 +3265,29 @@ async def reset_system(
     repairs_result = await db.repairs.delete_many({})
     customers_result = await db.customers.delete_many({})
     notifications_result = await db.notifications.delete_many({})
+    await db.notification_counters.delete_many({})
     # Keep admin users, delete others
-    users_result = await db.users.delete_many({"role": {"$ne": "admin"}})
+    deleted_users = await delete_users({"role": {"$ne": "admin"}})
+    await reset_repair_counters("total_customers", "total_technicians")
+    await mark_repairs_purged()
+    await bump_collection_version("customers")
+    await bump_collection_version("users")
     
     return {
-        "message": f"System reset complete: {repairs_result.deleted_count} repairs, {customers_result.deleted_count} customers, {notifications_result.deleted_count} notifications, {users_result.deleted_count} non-admin users deleted"
+        "message": f"System reset complete: {repairs_result.deleted_count} repairs, {customers_result.deleted_count} customers, {notifications_result.deleted_count} notifications, {deleted_users} non-admin users deleted"
+    }
+
+@api_router.get("/admin/metrics")
+async def get_metrics(
+    current_user: User = Depends(require_role([UserRole.ADMIN]))
+):
+    """In-process metrics of the worker that serves this request"""
+    return {
+        "user_cache": user_cache.stats(),
+        "password_hashing": password_hasher.stats(),
+        "leaderboard_cache": leaderboard_cache.stats(),
+        "notification_stream": {**notification_hub.stats(), **notification_broker.stats()},
+        "notification_writes": notification_writer.stats()
     }
 
 @api_router.post("/admin/demo/create-data")
@@ -1365,7 +3302,7 @@ async def create_demo_data(
             "email": "info@ankaraseramik.com",
             "phone": "0312 456 7890",
             "address": "Ostim OSB, Ankara",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid.uuid4()),
@@ -1373,7 +3310,7 @@ async def create_demo_data(
             "email": "uretim@istanbulcini.com",
             "phone": "0216 345 6789",
             "address": "Kartal Sanayi Sitesi, İstanbul",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid.uuid4()),
@@ -1381,7 +3318,7 @@ async def create_demo_data(
             "email": "siparis@egekaro.com",
             "phone": "0232 567 8901",
             "address": "Kemalpaşa OSB, İzmir",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid.uuid4()),
@@ -1389,7 +3326,7 @@ async def create_demo_data(
             "email": "fabrika@bursaporselen.com",
             "phone": "0224 678 9012",
             "address": "Nilüfer Sanayi Bölgesi, Bursa",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid.uuid4()),
@@ -1397,12 +3334,16 @@ async def create_demo_data(
             "email": "atolye@kutahyacini.com",
             "phone": "0274 789 0123",
             "address": "Merkez, Kütahya",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         }
     ]
     
     # Insert demo customers
+    for customer in demo_customers:
+        customer.update(customer_search_fields(customer))
     await db.customers.insert_many(demo_customers)
+    await track_global_counter("total_customers", len(demo_customers))
+    await bump_collection_version("customers")
     
     # Create demo repair requests for ceramic machinery
     demo_repairs = [
@@ -1418,8 +3359,8 @@ async def create_demo_data(
             "priority": Priority.HIGH,
             "cost_estimate": 15000.0,
             "created_by": current_user.id,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc),
             "images": []
         },
         {
@@ -1434,8 +3375,8 @@ async def create_demo_data(
             "priority": Priority.MEDIUM,
             "cost_estimate": 8500.0,
             "created_by": current_user.id,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc),
             "images": []
         },
         {
@@ -1451,9 +3392,9 @@ async def create_demo_data(
             "cost_estimate": 5200.0,
             "final_cost": 4800.0,
             "created_by": current_user.id,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat(),
-            "completed_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc),
+            "completed_at": datetime.now(timezone.utc),
             "images": []
         },
         {
@@ -1468,8 +3409,8 @@ async def create_demo_data(
             "priority": Priority.LOW,
             "cost_estimate": 3200.0,
             "created_by": current_user.id,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc),
             "images": []
         },
         {
@@ -1484,14 +3425,20 @@ async def create_demo_data(
             "priority": Priority.URGENT,
             "cost_estimate": 2800.0,
             "created_by": current_user.id,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc),
             "images": []
         }
     ]
     
     # Insert demo repair requests
+    customers_by_id = {customer["id"]: customer for customer in demo_customers}
+    for repair in demo_repairs:
+        repair.update(repair_search_fields(repair))
+        repair["visible_to_technicians"] = repair_visibility(repair, customers_by_id.get(repair["customer_id"]))
     await db.repairs.insert_many(demo_repairs)
+    for repair in demo_repairs:
+        await track_repair_change(after=repair)
     
     return {
         "customers_created": len(demo_customers),
@@ -1499,15 +3446,13 @@ async def create_demo_data(
         "message": "Refsan Türkiye demo data created successfully"
     }
 
-# Include the router in the main app
-app.include_router(api_router)
-
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 # Configure logging
@@ -1522,18 +3467,19 @@ logger = logging.getLogger(__name__)
 
 @api_router.get("/stock", response_model=List[StockItem])
 async def get_stock_items(
+    request: Request,
+    limit: int = Query(PAGE_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = None,
     current_user: User = Depends(require_role([UserRole.ADMIN]))
 ):
-    """Get all stock items (Admin only)"""
-    stock_items = await db.stock.find().to_list(1000)
-    result = []
-    for item in stock_items:
-        if isinstance(item.get("created_at"), str):
-            item["created_at"] = datetime.fromisoformat(item["created_at"])
-        if isinstance(item.get("updated_at"), str):
-            item["updated_at"] = datetime.fromisoformat(item["updated_at"])
-        result.append(StockItem(**item))
-    return result
+    """Get stock items page by page (Admin only)"""
+    etag = await conditional_etag(request, current_user, "stock")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    result, next_cursor = await fetch_page(db.stock, {}, limit, after, projection=model_projection(StockItem), build=trusted_row(StockItem))
+    return page_response(result, next_cursor, etag)
 
 @api_router.post("/stock", response_model=StockItem)
 async def create_stock_item(
@@ -1541,14 +3487,13 @@ async def create_stock_item(
     current_user: User = Depends(require_role([UserRole.ADMIN]))
 ):
     """Create new stock item (Admin only)"""
-    stock_item = StockItem(**stock_data.dict())
+    stock_item = StockItem(**stock_data.model_dump())
     
     # Prepare for MongoDB
-    stock_dict = stock_item.dict()
-    stock_dict["created_at"] = stock_dict["created_at"].isoformat()
-    stock_dict["updated_at"] = stock_dict["updated_at"].isoformat()
+    stock_dict = stock_item.model_dump()
     
     await db.stock.insert_one(stock_dict)
+    await bump_collection_version("stock")
     return stock_item
 
 @api_router.put("/stock/{stock_id}", response_model=StockItem)
@@ -1563,17 +3508,14 @@ async def update_stock_item(
         raise HTTPException(status_code=404, detail="Stock item not found")
     
     # Update fields
-    update_dict = stock_data.dict()
-    update_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
+    update_dict = stock_data.model_dump()
+    update_dict["updated_at"] = datetime.now(timezone.utc)
     
     await db.stock.update_one({"id": stock_id}, {"$set": update_dict})
+    await bump_collection_version("stock")
     
     # Fetch updated item
     updated_item = await db.stock.find_one({"id": stock_id})
-    if isinstance(updated_item.get("created_at"), str):
-        updated_item["created_at"] = datetime.fromisoformat(updated_item["created_at"])
-    if isinstance(updated_item.get("updated_at"), str):
-        updated_item["updated_at"] = datetime.fromisoformat(updated_item["updated_at"])
     
     return StockItem(**updated_item)
 
@@ -1601,8 +3543,9 @@ async def update_stock_quantity(
     
     await db.stock.update_one(
         {"id": stock_id},
-        {"$set": {"quantity": new_quantity, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"quantity": new_quantity, "updated_at": datetime.now(timezone.utc)}}
     )
+    await bump_collection_version("stock")
     
     return {"success": True, "new_quantity": new_quantity}
 
@@ -1615,6 +3558,7 @@ async def delete_stock_item(
     result = await db.stock.delete_one({"id": stock_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Stock item not found")
+    await bump_collection_version("stock")
     return {"success": True}
 
 @api_router.get("/stock/low-stock")
@@ -1630,11 +3574,341 @@ async def get_low_stock_items(
     ]
     return low_stock
 
+# Include the router in the main app (after every route, including stock, is declared)
+app.include_router(api_router)
+
 # Serve uploaded files
 upload_dir = Path(ROOT_DIR) / "uploads"
 upload_dir.mkdir(exist_ok=True)
 app.mount("/uploads", StaticFiles(directory=str(upload_dir)), name="uploads")
 
+# ==================== DATE MIGRATION ====================
+
+# Timestamps used to be written as ISO strings. migrate_dates rewrites them as BSON
+# dates, walking each collection in _id order and saving its position in the
+# migrations collection after every batch, so an interrupted run resumes where it stopped.
+DATE_MIGRATION_ID = "native_dates"
+DATE_FIELDS = {
+    "users": ["created_at"],
+    "customers": ["created_at"],
+    "repairs": ["created_at", "updated_at", "completed_at"],
+    "notifications": ["created_at"],
+    "stock": ["created_at", "updated_at"],
+}
+
+def parse_stored_date(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+async def migrate_dates(database=None, batch_size: int = DATE_MIGRATION_BATCH_SIZE) -> dict:
+    """Convert string timestamps to dates; returns the timestamps converted per collection"""
+    database = db if database is None else database
+    progress = await database.migrations.find_one({"_id": DATE_MIGRATION_ID}) or {}
+    converted = {}
+    if progress.get("completed"):
+        return converted
+    
+    for collection_name, fields in DATE_FIELDS.items():
+        if collection_name in progress.get("done", []):
+            continue
+        collection = database[collection_name]
+        last_id = progress.get("positions", {}).get(collection_name)
+        converted[collection_name] = 0
+        while True:
+            query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+            batch = await collection.find(query, {field: 1 for field in fields}).sort("_id", ASCENDING).limit(batch_size).to_list(batch_size)
+            if not batch:
+                break
+            
+            operations = []
+            for document in batch:
+                for field in fields:
+                    if isinstance(document.get(field), str):
+                        try:
+                            parsed = parse_stored_date(document[field])
+                        except ValueError:
+                            logger.error(f"Unparseable {collection_name}.{field} on {document['_id']}: {document[field]!r}")
+                            continue
+                        # Runs online: leave a field alone if a request rewrote it since this batch was read
+                        operations.append(UpdateOne({"_id": document["_id"], field: document[field]}, {"$set": {field: parsed}}))
+            if operations:
+                result = await collection.bulk_write(operations, ordered=False)
+                converted[collection_name] += result.modified_count
+            
+            last_id = batch[-1]["_id"]
+            await database.migrations.update_one(
+                {"_id": DATE_MIGRATION_ID},
+                {"$set": {f"positions.{collection_name}": last_id}},
+                upsert=True
+            )
+        await database.migrations.update_one(
+            {"_id": DATE_MIGRATION_ID},
+            {"$addToSet": {"done": collection_name}},
+            upsert=True
+        )
+    
+    # Rollup days come from the repair dates, so rebuild them once every date is native
+    await rebuild_repair_rollups(database)
+    await database.migrations.update_one(
+        {"_id": DATE_MIGRATION_ID},
+        {"$set": {"completed": True, "completed_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+    return converted
+
+# ==================== NOTIFICATION RETENTION ====================
+
+# Read notifications carry expires_at (set by read_marker) and Mongo's TTL monitor deletes
+# them. Unread ones past NOTIFICATION_ARCHIVE_AFTER_DAYS leave the inbox for a monthly
+# archive collection holding only the fields needed to show them again, keyed by id, so
+# a pass interrupted between the copy and the delete is safe to run again.
+ARCHIVE_FIELDS = ["recipient_id", "type", "title", "message", "related_id", "created_at"]
+
+def archive_collection_name(created_at: datetime) -> str:
+    return f"notifications_archive_{created_at:%Y_%m}"
+
+async def compact_notifications(database=None, batch_size: int = 500) -> dict:
+    """Archive old unread notifications and give read ones missing expires_at a TTL.
+    
+    Returns {"archived": {collection: count}, "expiring": count}"""
+    database = db if database is None else database
+    now = datetime.now(timezone.utc)
+    # Notifications read before retention existed have no expiry yet
+    expiring = await database.notifications.update_many(
+        {"read": True, "expires_at": {"$exists": False}},
+        {"$set": {"expires_at": now + timedelta(days=NOTIFICATION_READ_RETENTION_DAYS)}}
+    )
+    
+    archived = {}
+    recipients = set()
+    cutoff = now - timedelta(days=NOTIFICATION_ARCHIVE_AFTER_DAYS)
+    query = {"read": False, "created_at": {"$lt": cutoff}}
+    while True:
+        batch = await database.notifications.find(query, {"_id": 0, "id": 1, **{field: 1 for field in ARCHIVE_FIELDS}}).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        
+        by_month = {}
+        unread = {}
+        for notification in batch:
+            archived_notification = {"_id": notification["id"], **{field: notification.get(field) for field in ARCHIVE_FIELDS}}
+            by_month.setdefault(archive_collection_name(notification["created_at"]), []).append(
+                ReplaceOne({"_id": notification["id"]}, archived_notification, upsert=True)
+            )
+            if notification.get("recipient_id"):
+                unread[notification["recipient_id"]] = unread.get(notification["recipient_id"], 0) - 1
+        recipients.update(unread)
+        for collection_name, operations in by_month.items():
+            await database[collection_name].bulk_write(operations, ordered=False)
+            await database[collection_name].create_index([("recipient_id", ASCENDING), ("created_at", DESCENDING)], name="recipient_created_at")
+            archived[collection_name] = archived.get(collection_name, 0) + len(operations)
+        
+        # Only what is still unread leaves the inbox and its counter
+        result = await database.notifications.delete_many({"id": {"$in": [n["id"] for n in batch]}, "read": False})
+        if result.deleted_count == len(batch):
+            await adjust_unread_counts(unread, database)
+        else:
+            # Some were read meanwhile; their archive copies are harmless, recount instead
+            await rebuild_notification_counters(database)
+    
+    await publish_unread_count(sorted(recipients))
+    return {"archived": archived, "expiring": expiring.modified_count}
+
+# ==================== INDEXES ====================
+
+# Every query the API runs on a hot path must be served by one of these indexes.
+# Keyset pages sort on (created_at, id), so list filters end with those two keys.
+INDEX_MANIFEST = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("role", ASCENDING)], name="role"),
+        IndexModel([("token_epoch", ASCENDING)], name="token_epoch", sparse=True),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+    ],
+    "customers": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("email", ASCENDING)], name="email"),
+        IndexModel(
+            [("search_primary", TEXT), ("search_text", TEXT)],
+            weights={"search_primary": 10, "search_text": 1},
+            default_language="none",
+            name="search"
+        ),
+        IndexModel([("created_by_technician", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="technician_created_at_id"),
+        IndexModel([("name_words", ASCENDING), ("full_name", ASCENDING), ("id", ASCENDING)], name="name_words_full_name"),
+        IndexModel([("phone_keys", ASCENDING)], name="phone_keys"),
+        IndexModel([("created_by_technician", ASCENDING), ("name_words", ASCENDING), ("full_name", ASCENDING), ("id", ASCENDING)], name="technician_name_words_full_name"),
+        IndexModel([("created_by_technician", ASCENDING), ("phone_keys", ASCENDING)], name="technician_phone_keys"),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+    ],
+    "repairs": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("customer_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="customer_created_at_id"),
+        IndexModel([("assigned_technician_id", ASCENDING), ("status", ASCENDING)], name="technician_status"),
+        IndexModel([("created_by", ASCENDING), ("status", ASCENDING)], name="created_by_status"),
+        IndexModel([("visible_to_technicians", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="visible_created_at_id"),
+        IndexModel([("updated_at", ASCENDING), ("id", ASCENDING)], name="updated_at_id"),
+        IndexModel([("visible_to_technicians", ASCENDING), ("updated_at", ASCENDING), ("id", ASCENDING)], name="visible_updated_at_id"),
+        IndexModel([("created_by", ASCENDING), ("updated_at", ASCENDING), ("id", ASCENDING)], name="created_by_updated_at_id"),
+        IndexModel([("status", ASCENDING)], name="status"),
+        IndexModel(
+            [("search_primary", TEXT), ("search_text", TEXT)],
+            weights={"search_primary": 10, "search_text": 1},
+            default_language="none",
+            name="search"
+        ),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+    ],
+    "notifications": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("recipient_id", ASCENDING), ("read", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="recipient_read_created_at_id"),
+        IndexModel([("recipient_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="recipient_created_at_id"),
+        # Archive pass and counter rebuilds
+        IndexModel([("read", ASCENDING), ("created_at", DESCENDING)], name="read_created_at"),
+        # TTL: Mongo removes read notifications once their retention ends
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+    "stock": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+    ],
+    "repair_rollups": [
+        IndexModel([("day", ASCENDING)], name="day"),
+        IndexModel([("technician_id", ASCENDING), ("day", ASCENDING)], name="technician_day"),
+    ],
+    "repair_tombstones": [
+        IndexModel([("deleted_at", ASCENDING)], name="deleted_at"),
+        IndexModel([("visible_to_technicians", ASCENDING), ("deleted_at", ASCENDING)], name="visible_deleted_at"),
+        IndexModel([("created_by", ASCENDING), ("deleted_at", ASCENDING)], name="created_by_deleted_at"),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+    "stream_events": [
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=NOTIFICATION_BROKER_EVENT_TTL_SECONDS, name="created_at_ttl"),
+    ],
+    "token_revocations": [
+        # TTL: a revocation is dropped once the access tokens it covers have expired
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+    "stream_tickets": [
+        # TTL: unused tickets are removed once they expire
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+    "refresh_tokens": [
+        IndexModel([("token_hash", ASCENDING)], unique=True, name="token_hash_unique"),
+        IndexModel([("family_id", ASCENDING)], name="family_id"),
+        # TTL: Mongo removes expired refresh tokens on its own
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+}
+
+# Representative hot-path queries: (collection, filter, sort). Checked with explain().
+HOT_QUERIES = [
+    ("users", {"email": "admin@demo.com"}, None),
+    ("users", {"id": "x"}, None),
+    ("users", {"role": UserRole.TECHNICIAN}, None),
+    ("users", {"token_epoch": {"$gt": 0}}, None),
+    ("users", {}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("customers", {"id": "x"}, None),
+    ("customers", {"email": "x@example.com"}, None),
+    ("customers", {"$text": {"$search": "x"}}, None),
+    ("customers", {"name_words": {"$all": ["ankara"]}}, [("full_name", ASCENDING), ("id", ASCENDING)]),
+    ("customers", {"$and": [{"name_words": {"$regex": "^ank"}}], "id": {"$nin": ["x"]}}, [("full_name", ASCENDING), ("id", ASCENDING)]),
+    ("customers", {"phone_keys": {"$regex": "^0555"}}, [("phone_keys", ASCENDING)]),
+    ("customers", {"created_by_technician": "x", "name_words": {"$all": ["ankara"]}}, [("full_name", ASCENDING), ("id", ASCENDING)]),
+    ("customers", {"created_by_technician": "x", "$and": [{"name_words": {"$regex": "^ank"}}], "id": {"$nin": ["x"]}}, [("full_name", ASCENDING), ("id", ASCENDING)]),
+    ("customers", {"created_by_technician": "x", "phone_keys": {"$regex": "^0555"}}, [("phone_keys", ASCENDING)]),
+    ("customers", {"created_by_technician": "x"}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("customers", {}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("repairs", {"id": "x"}, None),
+    ("repairs", {"customer_id": "x"}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("repairs", {"assigned_technician_id": "x", "status": RepairStatus.PENDING}, None),
+    ("repairs", {"created_by": "x", "status": RepairStatus.PENDING}, None),
+    ("repairs", {"status": RepairStatus.PENDING}, None),
+    ("repairs", {"$text": {"$search": "x"}}, None),
+    ("repairs", {"visible_to_technicians": "x"}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("repairs", {}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("repairs", {"updated_at": {"$gt": datetime(2024, 1, 1, tzinfo=timezone.utc)}}, [("updated_at", ASCENDING), ("id", ASCENDING)]),
+    ("repairs", {"visible_to_technicians": "x", "updated_at": {"$gt": datetime(2024, 1, 1, tzinfo=timezone.utc)}}, [("updated_at", ASCENDING), ("id", ASCENDING)]),
+    ("repair_tombstones", {"scope_exit": {"$ne": True}, "deleted_at": {"$gte": datetime(2024, 1, 1, tzinfo=timezone.utc)}}, None),
+    ("repair_tombstones", {"visible_to_technicians": "x", "deleted_at": {"$gte": datetime(2024, 1, 1, tzinfo=timezone.utc)}}, None),
+    ("notifications", {"id": "x"}, None),
+    ("notifications", {"recipient_id": "x", "read": False}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("notifications", {"recipient_id": "x"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("notifications", {"read": False, "recipient_id": {"$ne": None}}, None),
+    ("notifications", {"read": False, "created_at": {"$lt": datetime(2024, 1, 1, tzinfo=timezone.utc)}}, None),
+    ("notifications", {"read": True, "expires_at": {"$exists": False}}, None),
+    ("stock", {"id": "x"}, None),
+    ("stock", {}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("repair_rollups", {"day": {"$gte": "2024-01-01", "$lte": "2024-12-31"}}, None),
+    ("repair_rollups", {"technician_id": "x", "day": {"$gte": "2024-01-01"}}, None),
+    ("refresh_tokens", {"token_hash": "x", "used": False}, None),
+    ("refresh_tokens", {"family_id": "x"}, None),
+]
+
+# Documents written before a search field existed lack it; only_missing picks those
+SEARCH_FIELDS_MISSING = {
+    "customers": {"$or": [{"search_primary": {"$exists": False}}, {"name_words": {"$exists": False}}]},
+    "repairs": {"search_primary": {"$exists": False}},
+}
+
+async def rebuild_search_fields(database=None, batch_size: int = 500, only_missing: bool = False):
+    """Recompute search_primary/search_text on every customer and repair"""
+    database = db if database is None else database
+    counts = {}
+    for collection_name, build in (("customers", customer_search_fields), ("repairs", repair_search_fields)):
+        operations = []
+        counts[collection_name] = 0
+        query = SEARCH_FIELDS_MISSING[collection_name] if only_missing else {}
+        async for document in database[collection_name].find(query):
+            operations.append(UpdateOne({"_id": document["_id"]}, {"$set": build(document)}))
+            if len(operations) >= batch_size:
+                await database[collection_name].bulk_write(operations, ordered=False)
+                counts[collection_name] += len(operations)
+                operations = []
+        if operations:
+            await database[collection_name].bulk_write(operations, ordered=False)
+            counts[collection_name] += len(operations)
+    return counts
+
+def plan_stages(plan: dict):
+    """Yield every stage name in an explain() plan tree"""
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from plan_stages(child)
+
+async def find_collection_scans(database=None):
+    """Run explain() on every hot query and return the ones planned as a COLLSCAN"""
+    database = db if database is None else database
+    scans = []
+    for collection_name, query, sort in HOT_QUERIES:
+        cursor = database[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+        winning_plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in plan_stages(winning_plan):
+            scans.append({"collection": collection_name, "filter": query, "sort": sort})
+    return scans
+
+@app.on_event("startup")
+async def ensure_indexes():
+    """Apply INDEX_MANIFEST; create_indexes is a no-op for indexes that already exist"""
+    for collection_name, indexes in INDEX_MANIFEST.items():
+        for index in indexes:
+            # One call per index so a duplicate-key failure does not block the rest
+            try:
+                await db[collection_name].create_indexes([index])
+            except Exception as e:
+                logging.error(f"❌ Error creating index {collection_name}.{index.document['name']}: {e}")
+        logging.info(f"ℹ️ Indexes ready on {collection_name}")
+
 # Startup event to create first admin user
 @app.on_event("startup")
 async def create_first_admin():
@@ -1648,7 +3922,7 @@ async def create_first_admin():
                 "id": str(uuid.uuid4()),
                 "email": "admin@demo.com",
                 "full_name": "Admin User",
-                "hashed_password": pwd_context.hash("admin123"),
+                "hashed_password": await password_hasher.hash("admin123"),
                 "role": "admin",
                 "phone": "05551234567",
                 "is_active": True,
@@ -1656,12 +3930,124 @@ async def create_first_admin():
             }
             
             await db.users.insert_one(admin_user)
+            await bump_collection_version("users")
             logging.info("✅ First admin user created: admin@demo.com / admin123")
         else:
             logging.info(f"ℹ️ Database already has {user_count} users")
     except Exception as e:
         logging.error(f"❌ Error creating first admin user: {e}")
 
+@app.on_event("startup")
+async def rename_legacy_password_field():
+    """Users registered through /auth/register used to store their hash under "password",
+    which login never read"""
+    try:
+        result = await db.users.update_many(
+            {"password": {"$exists": True}, "hashed_password": {"$exists": False}},
+            {"$rename": {"password": "hashed_password"}}
+        )
+        if result.modified_count:
+            logging.info(f"ℹ️ Moved {result.modified_count} password hashes to hashed_password")
+    except Exception as e:
+        logging.error(f"❌ Error renaming legacy password fields: {e}")
+
+@app.on_event("startup")
+async def ensure_stats_counters():
+    """Build stats_counters and repair_rollups on first start against an existing database"""
+    try:
+        if await db.stats_counters.find_one({"_id": GLOBAL_SCOPE}) is None:
+            drift = await rebuild_stats_counters()
+            logging.info(f"ℹ️ Stats counters built ({len(drift)} values initialized)")
+        if await db.repair_rollups.find_one({}) is None and await db.repairs.find_one({}) is not None:
+            buckets = await rebuild_repair_rollups()
+            logging.info(f"ℹ️ Repair rollups built ({buckets} buckets)")
+    except Exception as e:
+        logging.error(f"❌ Error building stats counters: {e}")
+
+@app.on_event("startup")
+async def ensure_repair_visibility():
+    """Backfill visible_to_technicians on repairs written before the field existed"""
+    try:
+        updated = await rebuild_repair_visibility(only_missing=True)
+        if updated:
+            logging.info(f"ℹ️ visible_to_technicians set on {updated} repairs")
+    except Exception as e:
+        logging.error(f"❌ Error backfilling repair visibility: {e}")
+
+@app.on_event("startup")
+async def ensure_search_fields():
+    """Backfill the search and typeahead fields on documents written before they existed"""
+    try:
+        counts = await rebuild_search_fields(only_missing=True)
+        if any(counts.values()):
+            logging.info(f"ℹ️ Search fields backfilled: {counts}")
+    except Exception as e:
+        logging.error(f"❌ Error backfilling search fields: {e}")
+
+@app.on_event("startup")
+async def ensure_notification_inboxes():
+    """Give notifications written before inboxes a recipient, and build the unread counters"""
+    try:
+        migrated = await migrate_legacy_notifications()
+        if migrated:
+            logging.info(f"ℹ️ {migrated} notifications moved into admin inboxes")
+        elif await db.notification_counters.find_one({}) is None and await db.notifications.find_one({}) is not None:
+            inboxes = await rebuild_notification_counters()
+            logging.info(f"ℹ️ Unread counters built for {inboxes} inboxes")
+    except Exception as e:
+        logging.error(f"❌ Error migrating notifications: {e}")
+
+date_migration_task = None
+
+async def run_date_migration():
+    try:
+        converted = await migrate_dates()
+        if any(converted.values()):
+            logging.info(f"✅ Date migration finished: {converted}")
+    except Exception as e:
+        logging.error(f"❌ Date migration stopped, it resumes on the next start: {e}")
+
+@app.on_event("startup")
+async def start_date_migration():
+    """Run the string-to-date migration in the background so startup is not delayed"""
+    global date_migration_task
+    if DATE_MIGRATION_ON_STARTUP:
+        date_migration_task = asyncio.create_task(run_date_migration())
+
+@app.on_event("startup")
+async def start_notification_broker():
+    await notification_broker.start()
+    if NOTIFICATION_WRITE_BEHIND:
+        notification_writer.start()
+
+notification_retention_task = None
+
+async def run_notification_retention():
+    while True:
+        try:
+            result = await compact_notifications()
+            if result["archived"] or result["expiring"]:
+                logging.info(f"ℹ️ Notification retention: {result}")
+        except Exception as e:
+            logging.error(f"❌ Notification retention pass failed: {e}")
+        await asyncio.sleep(NOTIFICATION_RETENTION_INTERVAL_HOURS * 3600)
+
+@app.on_event("startup")
+async def start_notification_retention():
+    """Archive old unread notifications in the background, once per interval"""
+    global notification_retention_task
+    if NOTIFICATION_RETENTION_INTERVAL_HOURS > 0:
+        notification_retention_task = asyncio.create_task(run_notification_retention())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    if date_migration_task and not date_migration_task.done():
+        date_migration_task.cancel()
+    if notification_retention_task and not notification_retention_task.done():
+        notification_retention_task.cancel()
+    # Drain queued notifications while the broker and database are still up
+    await notification_writer.stop()
+    await notification_broker.stop()
+    notification_hub.close()
+    client.close()
+    password_hasher.executor.shutdown(wait=False)
\ No newline at end of file
@@ -2,6 +2,8 @@ import React from "react";
 import ReactDOM from "react-dom/client";
 import "./index.css";
 import App from "./App";
+// Attaches the access token to API calls and refreshes it when it expires
+import "./lib/auth";
 
 const root = ReactDOM.createRoot(document.getElementById("root"));
 root.render(
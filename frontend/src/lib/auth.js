@@ -0,0 +1,61 @@
+import axios from 'axios';
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const API = `${BACKEND_URL}/api`;
+
+// Tokens are shared with the HTML pages through localStorage
+const isApiRequest = (config) => (config.url || '').startsWith(API);
+
+axios.interceptors.request.use((config) => {
+  const token = localStorage.getItem('token');
+  if (token && isApiRequest(config) && !config.headers.Authorization) {
+    config.headers.Authorization = `Bearer ${token}`;
+  }
+  return config;
+});
+
+// Refresh tokens are single use: concurrent 401s share one refresh, and a token
+// already rotated by another tab is taken from localStorage instead
+let pendingRefresh = null;
+
+function refreshAccessToken(rejectedToken) {
+  const storedToken = localStorage.getItem('token');
+  if (storedToken && storedToken !== rejectedToken) {
+    return Promise.resolve(storedToken);
+  }
+  const refreshToken = localStorage.getItem('refresh_token');
+  if (!refreshToken) {
+    return Promise.resolve(null);
+  }
+  if (!pendingRefresh) {
+    pendingRefresh = axios
+      .post(`${API}/auth/refresh`, { refresh_token: refreshToken }, { skipAuthRefresh: true })
+      .then(({ data }) => {
+        localStorage.setItem('token', data.access_token);
+        localStorage.setItem('refresh_token', data.refresh_token);
+        localStorage.setItem('user', JSON.stringify(data.user));
+        return data.access_token;
+      })
+      .catch(() => null)
+      .finally(() => {
+        pendingRefresh = null;
+      });
+  }
+  return pendingRefresh;
+}
+
+// Access tokens expire after 30 minutes: on a 401, refresh and retry the request once
+axios.interceptors.response.use(undefined, async (error) => {
+  const config = error.config;
+  if (!config || error.response?.status !== 401 || !isApiRequest(config) || config.skipAuthRefresh || config.authRetried) {
+    throw error;
+  }
+  const rejectedToken = (config.headers.Authorization || '').replace(/^Bearer /, '');
+  const token = await refreshAccessToken(rejectedToken);
+  if (!token) {
+    throw error;
+  }
+  config.authRetried = true;
+  config.headers.Authorization = `Bearer ${token}`;
+  return axios(config);
+});
@@ -0,0 +1,15 @@
+import axios from 'axios';
+
+// List endpoints return one page plus an X-Next-Cursor header while rows remain;
+// follow it (as ?after=) so lists are never cut off at the first page
+export async function fetchAllPages(url, config = {}) {
+  const rows = [];
+  let after = null;
+  do {
+    const params = after ? { ...config.params, after } : config.params;
+    const response = await axios.get(url, { ...config, params });
+    rows.push(...response.data);
+    after = response.headers['x-next-cursor'];
+  } while (after);
+  return rows;
+}
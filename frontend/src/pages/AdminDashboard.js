@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../App';
 import axios from 'axios';
+import { fetchAllPages } from '../lib/pagination';
 import { Button } from '../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
 import { Badge } from '../components/ui/badge';
@@ -28,13 +29,14 @@ import {
 } from 'lucide-react';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-  const [selectedTechnician, setSelectedTechnician] = useState(null);
-  const [technicianReport, setTechnicianReport] = useState(null);
-  const [loadingReport, setLoadingReport] = useState(false);
 const API = `${BACKEND_URL}/api`;
 
 const AdminDashboard = () => {
   const { user, logout } = useAuth();
+  const [selectedTechnician, setSelectedTechnician] = useState(null);
+  const [technicianReport, setTechnicianReport] = useState(null);
+  const [loadingReport, setLoadingReport] = useState(false);
+  const [loadingMoreReport, setLoadingMoreReport] = useState(false);
   const [stats, setStats] = useState(null);
   const [repairs, setRepairs] = useState([]);
   const [customers, setCustomers] = useState([]);
@@ -79,17 +81,17 @@ const AdminDashboard = () => {
 
   const fetchData = async () => {
     try {
-      const [statsRes, repairsRes, customersRes, usersRes] = await Promise.all([
+      const [statsRes, repairs, customers, users] = await Promise.all([
         axios.get(`${API}/stats`),
-        axios.get(`${API}/repairs`),
-        axios.get(`${API}/customers`),
-        axios.get(`${API}/users`)
+        fetchAllPages(`${API}/repairs`),
+        fetchAllPages(`${API}/customers`),
+        fetchAllPages(`${API}/users`)
       ]);
       
       setStats(statsRes.data);
-      setRepairs(repairsRes.data);
-      setCustomers(customersRes.data);
-      setUsers(usersRes.data);
+      setRepairs(repairs);
+      setCustomers(customers);
+      setUsers(users);
     } catch (error) {
       console.error('Data fetch error:', error);
       toast.error('Veriler yüklenirken hata oluştu');
@@ -169,7 +171,6 @@ const AdminDashboard = () => {
     }
   };
 
-  const getPriorityColor = (priority) => {
   const fetchTechnicianReport = async (technicianId) => {
     if (!technicianId) return;
     
@@ -184,6 +185,32 @@ const AdminDashboard = () => {
       setLoadingReport(false);
     }
   };
+
+  // The report carries the first page of repairs (newest first) and customers;
+  // the rest is fetched page by page with the next cursors
+  const loadMoreTechnicianReport = async (kind) => {
+    const cursor = technicianReport[`${kind}_next_cursor`];
+    if (!cursor) return;
+    
+    setLoadingMoreReport(true);
+    try {
+      const response = await axios.get(`${API}/reports/technician/${selectedTechnician}/${kind}`, {
+        params: { after: cursor }
+      });
+      setTechnicianReport((report) => ({
+        ...report,
+        [kind]: [...report[kind], ...response.data],
+        [`${kind}_next_cursor`]: response.headers['x-next-cursor'] || null
+      }));
+    } catch (error) {
+      console.error('Report page fetch error:', error);
+      toast.error('Rapor yüklenirken hata oluştu');
+    } finally {
+      setLoadingMoreReport(false);
+    }
+  };
+
+  const getPriorityColor = (priority) => {
     switch (priority) {
       case 'dusuk': return 'bg-gray-100 text-gray-800';
       case 'orta': return 'bg-yellow-100 text-yellow-800';
@@ -672,15 +699,22 @@ const AdminDashboard = () => {
                           <div className="space-y-4">
                             {Object.entries(technicianReport.repairs_by_date)
                               .sort(([a], [b]) => new Date(b) - new Date(a))
-                              .map(([date, dayRepairs]) => (
+                              .map(([date, daySummary]) => (
                               <div key={date} className="border rounded-lg p-4">
                                 <div className="flex items-center justify-between mb-3">
                                   <h4 className="font-semibold text-lg">{new Date(date).toLocaleDateString('tr-TR')}</h4>
-                                  <Badge variant="outline">{dayRepairs.length} arıza</Badge>
+                                  <div className="flex items-center gap-2">
+                                    {daySummary.total_cost > 0 && (
+                                      <span className="text-sm font-medium text-green-600">₺{daySummary.total_cost.toLocaleString('tr-TR')}</span>
+                                    )}
+                                    <Badge variant="outline">{daySummary.count} arıza</Badge>
+                                  </div>
                                 </div>
                                 
                                 <div className="space-y-2">
-                                  {dayRepairs.map((repair, index) => (
+                                  {technicianReport.repairs
+                                    .filter((repair) => repair.created_at.slice(0, 10) === date)
+                                    .map((repair, index) => (
                                     <div key={index} className="bg-gray-50 p-3 rounded">
                                       <div className="flex items-start justify-between">
                                         <div>
@@ -702,10 +736,26 @@ const AdminDashboard = () => {
                                       </div>
                                     </div>
                                   ))}
+                                  {technicianReport.repairs_next_cursor &&
+                                    technicianReport.repairs.filter((repair) => repair.created_at.slice(0, 10) === date).length < daySummary.count && (
+                                    <p className="text-sm text-gray-500">Bu günün diğer kayıtları için daha fazla yükleyin</p>
+                                  )}
                                 </div>
                               </div>
                             ))}
                             
+                            {technicianReport.repairs_next_cursor && (
+                              <Button
+                                variant="outline"
+                                className="w-full"
+                                disabled={loadingMoreReport}
+                                onClick={() => loadMoreTechnicianReport('repairs')}
+                                data-testid="technician-report-more-repairs"
+                              >
+                                {loadingMoreReport ? 'Yükleniyor...' : 'Daha fazla arıza yükle'}
+                              </Button>
+                            )}
+                            
                             {Object.keys(technicianReport.repairs_by_date).length === 0 && (
                               <div className="text-center py-8 text-slate-500">
                                 Bu teknisyenin henüz arıza kaydı bulunmuyor
@@ -739,6 +789,18 @@ const AdminDashboard = () => {
                               </div>
                             ))}
                             
+                            {technicianReport.customers_next_cursor && (
+                              <Button
+                                variant="outline"
+                                className="w-full"
+                                disabled={loadingMoreReport}
+                                onClick={() => loadMoreTechnicianReport('customers')}
+                                data-testid="technician-report-more-customers"
+                              >
+                                {loadingMoreReport ? 'Yükleniyor...' : 'Daha fazla müşteri yükle'}
+                              </Button>
+                            )}
+                            
                             {technicianReport.customers.length === 0 && (
                               <div className="text-center py-8 text-slate-500">
                                 Bu teknisyenin henüz müşterisi bulunmuyor
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../App';
 import axios from 'axios';
+import { fetchAllPages } from '../lib/pagination';
 import { Button } from '../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
 import { Badge } from '../components/ui/badge';
@@ -51,9 +52,9 @@ const CustomerDashboard = () => {
 
   const fetchData = async () => {
     try {
-      const [statsRes, repairsRes] = await Promise.all([
+      const [statsRes, repairs] = await Promise.all([
         axios.get(`${API}/stats`),
-        axios.get(`${API}/repairs`)
+        fetchAllPages(`${API}/repairs`)
       ]);
   // Müşteri kendini customer olarak kaydetmek için
   useEffect(() => {
@@ -61,8 +62,8 @@ const CustomerDashboard = () => {
       if (user && user.role === 'musteri') {
         try {
           // Check if customer already exists
-          const existingCustomers = await axios.get(`${API}/customers`);
-          const selfCustomer = existingCustomers.data.find(c => c.email === user.email);
+          const existingCustomers = await fetchAllPages(`${API}/customers`);
+          const selfCustomer = existingCustomers.find(c => c.email === user.email);
           
           if (!selfCustomer) {
             // Create self as customer
@@ -86,8 +87,8 @@ const CustomerDashboard = () => {
     e.preventDefault();
     try {
       // Find self as customer
-      const customersResponse = await axios.get(`${API}/customers`);
-      const selfCustomer = customersResponse.data.find(c => c.email === user.email);
+      const allCustomers = await fetchAllPages(`${API}/customers`);
+      const selfCustomer = allCustomers.find(c => c.email === user.email);
       
       if (!selfCustomer) {
         toast.error('Müşteri kaydınız bulunamadı');
@@ -130,7 +131,7 @@ const CustomerDashboard = () => {
   };
       
       setStats(statsRes.data);
-      setRepairs(repairsRes.data);
+      setRepairs(repairs);
     } catch (error) {
       console.error('Data fetch error:', error);
       toast.error('Veriler yüklenirken hata oluştu');
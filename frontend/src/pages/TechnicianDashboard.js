@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../App';
 import axios from 'axios';
+import { fetchAllPages } from '../lib/pagination';
 import { Button } from '../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
 import { Badge } from '../components/ui/badge';
@@ -121,15 +122,15 @@ const TechnicianDashboard = () => {
 
   const fetchData = async () => {
     try {
-      const [statsRes, repairsRes, customersRes] = await Promise.all([
+      const [statsRes, repairs, customers] = await Promise.all([
         axios.get(`${API}/stats`),
-        axios.get(`${API}/repairs`),
-        axios.get(`${API}/customers`)
+        fetchAllPages(`${API}/repairs`),
+        fetchAllPages(`${API}/customers`)
       ]);
       
       setStats(statsRes.data);
-      setRepairs(repairsRes.data);
-      setCustomers(customersRes.data);
+      setRepairs(repairs);
+      setCustomers(customers);
     } catch (error) {
       console.error('Data fetch error:', error);
       toast.error('Veriler yüklenirken hata oluştu');
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Login burst load test.
+Runs concurrent logins and, at the same time, calls an unrelated read endpoint.
+Prints p50/p95/p99 for both, so a bcrypt call that blocks the event loop shows
+up as high latency on the unrelated endpoint.
+
+Usage: BACKEND_URL=http://localhost:8001/api python login_load_test.py
+"""
+
+import os
+import sys
+import time
+import threading
+import requests
+
+BACKEND_URL = os.environ.get('BACKEND_URL', 'http://localhost:8001/api')
+DURATION_SECONDS = float(os.environ.get('DURATION_SECONDS', '20'))
+LOGIN_THREADS = int(os.environ.get('LOGIN_THREADS', '16'))
+READ_THREADS = int(os.environ.get('READ_THREADS', '4'))
+READ_ENDPOINT = os.environ.get('READ_ENDPOINT', 'stats')
+
+ADMIN_CREDENTIALS = {'email': 'admin@demo.com', 'password': 'admin123'}
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def worker(name, send, deadline, results, lock):
+    session = requests.Session()
+    latencies = []
+    errors = 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            response = send(session)
+            if response.status_code != 200:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+    with lock:
+        results[name]['latencies'].extend(latencies)
+        results[name]['errors'] += errors
+
+
+def report(name, data, elapsed):
+    latencies = data['latencies']
+    print(f"\n📊 {name}")
+    print(f"   Requests: {len(latencies)} ({len(latencies) / elapsed:.1f}/s), errors: {data['errors']}")
+    print(f"   p50: {percentile(latencies, 50):.1f} ms")
+    print(f"   p95: {percentile(latencies, 95):.1f} ms")
+    print(f"   p99: {percentile(latencies, 99):.1f} ms")
+
+
+def main():
+    response = requests.post(f"{BACKEND_URL}/auth/login", json=ADMIN_CREDENTIALS, timeout=30)
+    if response.status_code != 200:
+        print(f"❌ Admin login failed: {response.status_code} {response.text}")
+        return 1
+    headers = {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+    def send_login(session):
+        return session.post(f"{BACKEND_URL}/auth/login", json=ADMIN_CREDENTIALS, timeout=30)
+
+    def send_read(session):
+        return session.get(f"{BACKEND_URL}/{READ_ENDPOINT}", headers=headers, timeout=30)
+
+    print(f"🔍 {LOGIN_THREADS} login threads + {READ_THREADS} threads on /{READ_ENDPOINT} for {DURATION_SECONDS:.0f}s")
+    results = {
+        'POST /auth/login': {'latencies': [], 'errors': 0},
+        f'GET /{READ_ENDPOINT}': {'latencies': [], 'errors': 0},
+    }
+    lock = threading.Lock()
+    started = time.monotonic()
+    deadline = started + DURATION_SECONDS
+    threads = [
+        threading.Thread(target=worker, args=('POST /auth/login', send_login, deadline, results, lock))
+        for _ in range(LOGIN_THREADS)
+    ] + [
+        threading.Thread(target=worker, args=(f'GET /{READ_ENDPOINT}', send_read, deadline, results, lock))
+        for _ in range(READ_THREADS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    for name, data in results.items():
+        report(name, data, elapsed)
+
+    metrics = requests.get(f"{BACKEND_URL}/admin/metrics", headers=headers, timeout=30)
+    if metrics.status_code == 200:
+        print(f"\n⚙️  Password hashing: {metrics.json().get('password_hashing')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
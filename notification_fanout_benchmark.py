@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Notification fan-out benchmark.
+Connects N simulated admin streams (default 500) to the notification hub through
+the configured broker, publishes a burst of events and reports how long publish()
+takes and how long each event takes to reach every stream (p50/p95/p99), plus the
+events dropped or streams cut off by the slow-consumer policy. A share of the
+streams (SLOW_FRACTION) sleep SLOW_DELAY_MS per event to model a stalled tab.
+
+Usage: MONGO_URL=mongodb://localhost:27017 python notification_fanout_benchmark.py [500]
+BROKER=mongo needs a replica set; its events go to BENCH_DB_NAME (default
+"fanout_benchmark"), which is dropped at the end.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+import server  # noqa: E402
+
+BROKER = os.environ.get('BROKER', 'memory')
+BENCH_DB_NAME = os.environ.get('BENCH_DB_NAME', 'fanout_benchmark')
+EVENTS = int(os.environ.get('EVENTS', '200'))
+EVENT_INTERVAL_MS = float(os.environ.get('EVENT_INTERVAL_MS', '5'))
+SLOW_FRACTION = float(os.environ.get('SLOW_FRACTION', '0.02'))
+SLOW_DELAY_MS = float(os.environ.get('SLOW_DELAY_MS', '50'))
+DEFAULT_CLIENTS = 500
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def stream_client(hub, delay, latencies):
+    """What stream_notifications does per event: wait on the queue, format the frame"""
+    queue = hub.subscribe()
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            server.format_sse(*item)
+            latencies.append((time.perf_counter() - item[1]["sent_at"]) * 1000)
+            if delay:
+                await asyncio.sleep(delay)
+    finally:
+        hub.unsubscribe(queue)
+
+
+async def main(clients):
+    database = server.client[BENCH_DB_NAME]
+    if BENCH_DB_NAME == server.db_name:
+        print(f"❌ BENCH_DB_NAME must differ from the API database '{server.db_name}'")
+        return 1
+
+    hub = server.NotificationHub(server.NOTIFICATION_STREAM_QUEUE_SIZE, server.NOTIFICATION_STREAM_DROP_POLICY)
+    broker = server.make_notification_broker(BROKER, hub, database)
+    slow_clients = int(clients * SLOW_FRACTION)
+    latencies = []
+    tasks = [
+        asyncio.create_task(stream_client(hub, SLOW_DELAY_MS / 1000 if index < slow_clients else 0, latencies))
+        for index in range(clients)
+    ]
+    try:
+        await broker.start()
+        # Let every client subscribe and the change stream open
+        await asyncio.sleep(1)
+        print(f"🔍 {clients} streams ({slow_clients} slow), {EVENTS} events, broker={BROKER}, "
+              f"queue={hub.queue_size}, drop policy={hub.drop_policy}")
+
+        publish_timings = []
+        started = time.perf_counter()
+        for index in range(EVENTS):
+            before = time.perf_counter()
+            await broker.publish("notification", {"index": index, "sent_at": time.perf_counter()}, str(index))
+            publish_timings.append((time.perf_counter() - before) * 1000)
+            await asyncio.sleep(EVENT_INTERVAL_MS / 1000)
+
+        # Wait for the fast streams to drain
+        expected = (clients - slow_clients) * EVENTS
+        deadline = time.monotonic() + 30
+        while len(latencies) < expected and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - started
+
+        stats = hub.stats()
+        print(f"\n📊 publish(): p50 {percentile(publish_timings, 50):.3f} ms, "
+              f"p99 {percentile(publish_timings, 99):.3f} ms")
+        print(f"📊 delivery: {len(latencies)} frames in {elapsed:.1f}s ({len(latencies) / elapsed:.0f}/s)")
+        print(f"   p50: {percentile(latencies, 50):.1f} ms")
+        print(f"   p95: {percentile(latencies, 95):.1f} ms")
+        print(f"   p99: {percentile(latencies, 99):.1f} ms")
+        print(f"⚙️  dropped: {stats['dropped']}, disconnected: {stats['disconnected']}, broker: {broker.stats()}")
+    finally:
+        await broker.stop()
+        hub.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if BROKER != "memory":
+            await server.client.drop_database(BENCH_DB_NAME)
+        server.client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    requested = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CLIENTS
+    sys.exit(asyncio.run(main(requested)))
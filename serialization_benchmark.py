@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+List serialization benchmark.
+Times how GET /api/repairs, /customers and /stock turn a page of Mongo documents
+into a response body, two ways: validating every row into the model and again
+through response_model before JSONResponse (the old path), and the trusted-read
+path the API uses now (model_construct-style field dicts encoded by ORJSONResponse).
+No database is needed; documents are synthetic.
+
+Usage: MONGO_URL=mongodb://localhost:27017 python serialization_benchmark.py [1000 10000]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+import server  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000]
+RUNS = int(os.environ.get('RUNS', '5'))
+
+
+def synthetic_repair(now):
+    created_at = now - timedelta(minutes=random.randint(0, 60 * 24 * 365))
+    return {
+        "id": str(uuid.uuid4()),
+        "customer_id": str(uuid.uuid4()),
+        "customer_name": "Benchmark Müşteri",
+        "customer_phone": "05551234567",
+        "device_type": "Seramik Fırını",
+        "brand": "Refsan",
+        "model": "RF-2500",
+        "description": "Fırın sıcaklığı ayarlanan değere ulaşmıyor",
+        "priority": random.choice(list(server.Priority)).value,
+        "status": random.choice(list(server.RepairStatus)).value,
+        "cost_estimate": round(random.uniform(500, 20000), 2),
+        "final_cost": None,
+        "payment_status": random.choice(list(server.PaymentStatus)).value,
+        "created_by": str(uuid.uuid4()),
+        "created_at": created_at,
+        "updated_at": created_at,
+        "images": ["/uploads/benchmark.jpg"]
+    }
+
+
+def synthetic_customer(now):
+    return {
+        "id": str(uuid.uuid4()),
+        "full_name": "Benchmark Müşteri",
+        "email": "musteri@example.com",
+        "phone": "05551234567",
+        "address": "Organize Sanayi Bölgesi, Eskişehir",
+        "created_by_technician": str(uuid.uuid4()),
+        "created_at": now - timedelta(minutes=random.randint(0, 60 * 24 * 365))
+    }
+
+
+def synthetic_stock_item(now):
+    return {
+        "id": str(uuid.uuid4()),
+        "name": "Rezistans 2kW",
+        "category": random.choice(list(server.StockCategory)).value,
+        "quantity": random.randint(0, 200),
+        "unit": "adet",
+        "min_quantity": 5,
+        "supplier": "Benchmark Tedarik",
+        "price": 350.0,
+        "description": "Raf A-3",
+        "created_at": now,
+        "updated_at": now
+    }
+
+
+async def validated_body(model, documents):
+    """The old path: model(**doc) per row, response_model validation, JSONResponse"""
+    field = create_response_field(name="response", type_=List[model])
+    items = [model(**dict(document)) for document in documents]
+    content = await serialize_response(field=field, response_content=items)
+    return JSONResponse(content).body
+
+
+async def trusted_body(model, documents):
+    """The fast path: trusted field dicts encoded by ORJSONResponse"""
+    build = server.trusted_row(model)
+    return ORJSONResponse([build(dict(document)) for document in documents]).body
+
+
+async def time_call(func, model, documents):
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        await func(model, documents)
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings), sorted(timings)[len(timings) // 2]
+
+
+async def main(sizes):
+    now = datetime.now(timezone.utc)
+    cases = [
+        ("repairs", server.RepairRequest, synthetic_repair),
+        ("customers", server.Customer, synthetic_customer),
+        ("stock", server.StockItem, synthetic_stock_item),
+    ]
+    print(f"{'endpoint':>10} | {'rows':>6} | {'validated min/median (ms)':>26} | {'trusted min/median (ms)':>24} | {'speedup':>7}")
+    for name, model, make in cases:
+        for size in sorted(sizes):
+            documents = [make(now) for _ in range(size)]
+            validated = await time_call(validated_body, model, documents)
+            trusted = await time_call(trusted_body, model, documents)
+            print(f"{name:>10} | {size:>6} | {validated[0]:>12.1f} / {validated[1]:<11.1f} | "
+                  f"{trusted[0]:>10.1f} / {trusted[1]:<11.1f} | {validated[1] / trusted[1]:>6.1f}x")
+    server.client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    requested = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    sys.exit(asyncio.run(main(requested)))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+/api/stats benchmark.
+Seeds a throwaway database with N synthetic repairs and times the admin stats
+three ways: the old five count_documents calls plus a Python scan of every
+repair, the single $group aggregation that replaced them, and read_stats as the
+API serves it today from the stats_counters document.
+
+Usage: MONGO_URL=mongodb://localhost:27017 python stats_benchmark.py [10000 100000 1000000]
+The benchmark database (BENCH_DB_NAME, default "stats_benchmark") is dropped at the end.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+import server  # noqa: E402
+
+BENCH_DB_NAME = os.environ.get('BENCH_DB_NAME', 'stats_benchmark')
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+RUNS = int(os.environ.get('RUNS', '5'))
+BATCH_SIZE = 10_000
+ADMIN = server.User.model_construct(id="benchmark-admin", role=server.UserRole.ADMIN)
+
+
+def synthetic_repair(now):
+    status = random.choice(list(server.RepairStatus)).value
+    final_cost = round(random.uniform(500, 20000), 2) if random.random() < 0.4 else None
+    created_at = now - timedelta(minutes=random.randint(0, 60 * 24 * 365))
+    return {
+        "id": str(uuid.uuid4()),
+        "customer_id": str(uuid.uuid4()),
+        "customer_name": "Benchmark Müşteri",
+        "device_type": "Seramik Fırını",
+        "brand": "Refsan",
+        "model": "RF-2500",
+        "description": "Benchmark kaydı",
+        "priority": random.choice(list(server.Priority)).value,
+        "status": status,
+        "final_cost": final_cost,
+        "payment_status": random.choice(list(server.PaymentStatus)).value,
+        "created_by": "benchmark",
+        "created_at": created_at,
+        "updated_at": created_at,
+        "images": []
+    }
+
+
+async def seed(database, target):
+    current = await database.repairs.estimated_document_count()
+    now = datetime.now(timezone.utc)
+    while current < target:
+        batch = [synthetic_repair(now) for _ in range(min(BATCH_SIZE, target - current))]
+        await database.repairs.insert_many(batch, ordered=False)
+        current += len(batch)
+    await database.repairs.create_index("status")
+
+
+async def legacy_admin_stats(database):
+    """The admin branch of get_stats before the single aggregation"""
+    stats = {
+        "total_repairs": await database.repairs.count_documents({}),
+        "pending_repairs": await database.repairs.count_documents({"status": server.RepairStatus.PENDING}),
+        "completed_repairs": await database.repairs.count_documents({"status": server.RepairStatus.COMPLETED}),
+        "total_customers": await database.customers.count_documents({}),
+        "total_technicians": await database.users.count_documents({"role": server.UserRole.TECHNICIAN}),
+    }
+    paid = unpaid = 0.0
+    async for repair in database.repairs.find({}):
+        if repair.get("final_cost") and repair.get("final_cost") > 0:
+            if repair.get("payment_status") == "odendi":
+                paid += repair["final_cost"]
+            else:
+                unpaid += repair["final_cost"]
+    stats["total_paid_amount"] = paid
+    stats["total_unpaid_amount"] = unpaid
+    return stats
+
+
+async def aggregated_admin_stats(database):
+    """The admin branch of get_stats before stats_counters: one $group pass"""
+    repair_stats, total_customers, total_technicians = await asyncio.gather(
+        server.compute_repair_stats({}, database),
+        database.customers.estimated_document_count(),
+        database.users.count_documents({"role": server.UserRole.TECHNICIAN})
+    )
+    return {
+        **repair_stats,
+        "total_customers": total_customers,
+        "total_technicians": total_technicians,
+    }
+
+
+async def counter_admin_stats(database):
+    """What GET /api/stats does for an admin (read_counters reads server.db)"""
+    return await server.read_stats(ADMIN)
+
+
+async def time_call(func, database):
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        await func(database)
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings), sorted(timings)[len(timings) // 2]
+
+
+async def main(sizes):
+    database = server.client[BENCH_DB_NAME]
+    if BENCH_DB_NAME == server.db_name:
+        print(f"❌ BENCH_DB_NAME must differ from the API database '{server.db_name}'")
+        return 1
+
+    server.db = database
+    try:
+        await database.repairs.drop()
+        await database.stats_counters.drop()
+        print(f"{'repairs':>10} | {'legacy min/median (ms)':>24} | {'aggregation min/median (ms)':>28} | "
+              f"{'counters min/median (ms)':>25}")
+        for size in sorted(sizes):
+            await seed(database, size)
+            await server.rebuild_stats_counters(database)
+            legacy = await time_call(legacy_admin_stats, database)
+            aggregated = await time_call(aggregated_admin_stats, database)
+            counters = await time_call(counter_admin_stats, database)
+            print(f"{size:>10} | {legacy[0]:>11.1f} / {legacy[1]:<10.1f} | {aggregated[0]:>13.1f} / {aggregated[1]:<12.1f} | "
+                  f"{counters[0]:>12.1f} / {counters[1]:<10.1f}")
+    finally:
+        await server.client.drop_database(BENCH_DB_NAME)
+        server.client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    requested = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    sys.exit(asyncio.run(main(requested)))
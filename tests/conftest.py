@@ -0,0 +1,22 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+# server reads MONGO_URL at import; the tests never connect to it
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import server  # noqa: E402
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """A fresh in-memory database, also installed as server.db"""
+    client = AsyncMongoMockClient(tz_aware=True)
+    database = client["test"]
+    monkeypatch.setattr(server, "client", client)
+    monkeypatch.setattr(server, "db", database)
+    return database
@@ -0,0 +1,39 @@
+import asyncio
+
+import server
+
+
+ADMIN = server.User.model_construct(id="admin-1", role=server.UserRole.ADMIN)
+NAMES = ["Aliye Kaya", "Bali Ali", "Ali Veli", "Alican Demir", "Veli Ak"]
+
+
+async def seed(database):
+    await database.customers.insert_many([
+        {"id": f"customer-{index}", "full_name": name, "phone": f"0555 000 00 0{index}",
+         **server.customer_search_fields({"full_name": name, "phone": f"0555 000 00 0{index}"})}
+        for index, name in enumerate(NAMES)
+    ])
+
+
+def names(suggestions):
+    return [suggestion.full_name for suggestion in suggestions]
+
+
+def test_whole_word_matches_come_first_in_name_order(database):
+    async def scenario():
+        await seed(database)
+        assert names(await server.suggest_customers("ali", 10, ADMIN)) == ["Ali Veli", "Bali Ali", "Alican Demir", "Aliye Kaya"]
+        # The order holds from one keystroke to the next and under a limit
+        assert names(await server.suggest_customers("ali", 3, ADMIN)) == ["Ali Veli", "Bali Ali", "Alican Demir"]
+        assert names(await server.suggest_customers("ali v", 10, ADMIN)) == ["Ali Veli"]
+
+    asyncio.run(scenario())
+
+
+def test_phone_matches_come_in_phone_order(database):
+    async def scenario():
+        await seed(database)
+        suggestions = await server.suggest_customers("0555 000", 10, ADMIN)
+        assert names(suggestions) == NAMES
+
+    asyncio.run(scenario())
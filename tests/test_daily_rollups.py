@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import server
+
+
+ADMIN = server.User.model_construct(id="admin-1", email="admin@example.com", role=server.UserRole.ADMIN)
+
+
+async def rollup_snapshot(database):
+    """Non-zero fields of every bucket; incremental buckets can be left at zero"""
+    snapshot = {}
+    async for bucket in database.repair_rollups.find({}):
+        values = {field: round(bucket.get(field, 0), 2) for field in server.ROLLUP_FIELDS if bucket.get(field)}
+        if values:
+            snapshot[bucket["_id"]] = values
+    return snapshot
+
+
+async def update(repair_id, **changes):
+    await server.update_repair_request(repair_id, server.RepairRequestUpdate(**changes), ADMIN)
+
+
+def test_rollups_match_a_backfill_after_every_write_path(database):
+    async def scenario():
+        await database.users.insert_many([
+            {"id": "admin-1", "email": "admin@example.com", "full_name": "Admin", "role": "admin", "is_active": True},
+            {"id": "technician-1", "email": "t1@example.com", "full_name": "Tek Bir", "role": "teknisyen", "is_active": True},
+        ])
+        customer = await server.create_customer(server.CustomerCreate(full_name="Müşteri", phone="05550000000"), ADMIN)
+        # A repair opened three days ago, before the rollups were built
+        opened_at = datetime.now(timezone.utc) - timedelta(days=3)
+        await database.repairs.insert_one({
+            "id": "old-repair", "customer_id": customer.id, "customer_name": "Müşteri", "device_type": "Fırın",
+            "brand": "Refsan", "model": "RF", "description": "test", "priority": "orta", "status": "beklemede",
+            "payment_status": "beklemede", "created_by": "admin-1", "cost_estimate": 40.0,
+            "created_at": opened_at, "updated_at": opened_at,
+        })
+        await server.rebuild_repair_rollups()
+
+        repairs = []
+        for device_type in ("Ocak", "Davlumbaz"):
+            repair = server.RepairRequestCreate(customer_id=customer.id, device_type=device_type, brand="Refsan", model="RF", description="test", cost_estimate=60)
+            repairs.append((await server.create_repair_request(repair, ADMIN)).id)
+
+        await update("old-repair", assigned_technician_id="technician-1", final_cost=300, payment_status=server.PaymentStatus.PAID)
+        await server.update_repair_status("old-repair", server.RepairStatus.COMPLETED, ADMIN)
+        await update(repairs[0], assigned_technician_id="technician-1", final_cost=90)
+        await update(repairs[0], assigned_technician_id="")
+        await server.cancel_repair_request(repairs[1], ADMIN)
+        await server.delete_repair_request(repairs[1], ADMIN)
+
+        incremental = await rollup_snapshot(database)
+        await server.rebuild_repair_rollups()
+        assert incremental == await rollup_snapshot(database)
+
+        # The old repair is opened on its own day and closed today, both under the technician
+        opened_day, today = server.rollup_day(opened_at), server.rollup_day(datetime.now(timezone.utc))
+        days = {day["day"]: day for day in await server.read_daily_rollups(None, None, "technician-1")}
+        assert days[opened_day]["opened"] == 1 and days[opened_day]["paid_amount"] == 300
+        assert days[today]["closed"] == 1 and days[today]["opened"] == 0
+        assert days[opened_day]["by_status"] == {"tamamlandi": {"opened": 1, "closed": 0}}
+
+        days = {day["day"]: day for day in await server.read_daily_rollups(today, today)}
+        assert days[today]["opened"] == 1 and days[today]["unpaid_amount"] == 90
+        assert days[today]["cost_estimate_total"] == 60
+
+    asyncio.run(scenario())
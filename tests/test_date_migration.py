@@ -0,0 +1,150 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import server
+
+
+def repair(index, created_at, updated_at=None, completed_at=None):
+    return {
+        "id": f"repair-{index}",
+        "customer_id": "customer-1",
+        "customer_name": "Test Müşteri",
+        "device_type": "Fırın",
+        "brand": "Refsan",
+        "model": "RF",
+        "description": "test",
+        "priority": "orta",
+        "status": "beklemede",
+        "payment_status": "beklemede",
+        "created_by": "technician-1",
+        "created_at": created_at,
+        "updated_at": updated_at or created_at,
+        "completed_at": completed_at,
+    }
+
+
+async def seed(database):
+    native = datetime(2024, 3, 1, 9, 30, tzinfo=timezone.utc)
+    await database.repairs.insert_many([
+        repair(0, "2024-01-05T10:00:00+00:00"),
+        repair(1, "2024-01-06T11:00:00", completed_at="2024-01-07T12:00:00Z"),
+        repair(2, native),
+        repair(3, "2024-02-01T08:00:00.123456+00:00", updated_at=native),
+        repair(4, "not a date"),
+    ])
+    await database.customers.insert_one({"id": "customer-1", "full_name": "Test Müşteri", "created_at": "2024-01-01T00:00:00"})
+    return native
+
+
+def test_migrate_dates_converts_mixed_documents_and_resumes(database, monkeypatch):
+    async def scenario():
+        native = await seed(database)
+        collection_class = type(database.repairs)
+        original_bulk_write = collection_class.bulk_write
+        calls = {"repairs": 0}
+
+        async def failing_bulk_write(self, operations, *args, **kwargs):
+            if self.name == "repairs":
+                calls["repairs"] += 1
+                if calls["repairs"] == 2:
+                    raise ConnectionError("connection lost")
+            return await original_bulk_write(self, operations, *args, **kwargs)
+
+        # Two repairs per batch: the second repairs batch fails
+        monkeypatch.setattr(collection_class, "bulk_write", failing_bulk_write)
+        with pytest.raises(ConnectionError):
+            await server.migrate_dates(database, batch_size=2)
+
+        progress = await database.migrations.find_one({"_id": server.DATE_MIGRATION_ID})
+        assert not progress.get("completed")
+        assert "repairs" not in progress.get("done", [])
+        assert progress["positions"]["repairs"] is not None
+        first = await database.repairs.find_one({"id": "repair-0"})
+        assert isinstance(first["created_at"], datetime)
+
+        # The resumed run starts from the saved position and finishes
+        monkeypatch.setattr(collection_class, "bulk_write", original_bulk_write)
+        converted = await server.migrate_dates(database, batch_size=2)
+        assert converted["repairs"] == 1  # repair-3; repair-2 needed nothing, repair-4 is unparseable
+
+        repairs = {document["id"]: document async for document in database.repairs.find({})}
+        assert repairs["repair-1"]["created_at"] == datetime(2024, 1, 6, 11, tzinfo=timezone.utc)
+        assert repairs["repair-1"]["completed_at"] == datetime(2024, 1, 7, 12, tzinfo=timezone.utc)
+        assert repairs["repair-2"]["created_at"] == native
+        assert repairs["repair-3"]["created_at"] == datetime(2024, 2, 1, 8, 0, 0, 123000, tzinfo=timezone.utc)
+        assert repairs["repair-3"]["updated_at"] == native
+        assert repairs["repair-4"]["created_at"] == "not a date"
+        customer = await database.customers.find_one({"id": "customer-1"})
+        assert isinstance(customer["created_at"], datetime)
+
+        progress = await database.migrations.find_one({"_id": server.DATE_MIGRATION_ID})
+        assert progress["completed"]
+        assert await database.repair_rollups.count_documents({}) > 0
+        # A completed migration is not repeated
+        assert await server.migrate_dates(database) == {}
+
+    asyncio.run(scenario())
+
+
+def test_migration_keeps_values_rewritten_while_it_runs(database, monkeypatch):
+    async def scenario():
+        await seed(database)
+        collection_class = type(database.repairs)
+        original_bulk_write = collection_class.bulk_write
+        rewritten = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+        async def racing_bulk_write(self, operations, *args, **kwargs):
+            # A request updates repair-0 between the migration's read and its write
+            if self.name == "repairs":
+                await self.update_one({"id": "repair-0"}, {"$set": {"updated_at": rewritten}})
+            return await original_bulk_write(self, operations, *args, **kwargs)
+
+        monkeypatch.setattr(collection_class, "bulk_write", racing_bulk_write)
+        await server.migrate_dates(database, batch_size=10)
+
+        repair = await database.repairs.find_one({"id": "repair-0"})
+        assert repair["updated_at"] == rewritten
+        assert repair["created_at"] == datetime(2024, 1, 5, 10, tzinfo=timezone.utc)
+
+    asyncio.run(scenario())
+
+
+def test_pages_cross_unconverted_and_native_timestamps(database):
+    async def scenario():
+        # Half the customers still carry string timestamps
+        await database.customers.insert_many([
+            {
+                "id": f"customer-{index}",
+                "full_name": f"Müşteri {index}",
+                "created_at": f"2024-01-0{index + 1}T00:00:00" if index < 4 else datetime(2024, 2, index, tzinfo=timezone.utc),
+            }
+            for index in range(8)
+        ])
+        for descending in (False, True):
+            seen, after = [], None
+            while True:
+                items, after = await server.fetch_page(database.customers, {}, 3, after, {"_id": 0}, descending=descending)
+                seen += [item["id"] for item in items]
+                if not after:
+                    break
+            expected = [f"customer-{index}" for index in range(8)]
+            assert seen == (expected[::-1] if descending else expected)
+
+    asyncio.run(scenario())
+
+
+def test_startup_runs_the_migration_in_the_background(database, monkeypatch):
+    async def scenario():
+        await seed(database)
+        monkeypatch.setattr(server, "DATE_MIGRATION_ON_STARTUP", True)
+        await server.start_date_migration()
+        assert not server.date_migration_task.done()
+        await server.date_migration_task
+
+        progress = await database.migrations.find_one({"_id": server.DATE_MIGRATION_ID})
+        assert progress["completed"]
+        assert await database.repairs.count_documents({"created_at": {"$type": "string"}}) == 1  # "not a date"
+
+    asyncio.run(scenario())
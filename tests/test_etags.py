@@ -0,0 +1,60 @@
+import asyncio
+
+from starlette.requests import Request
+
+import server
+
+
+ADMIN = server.User.model_construct(id="admin-1", email="admin@example.com", role=server.UserRole.ADMIN)
+TECHNICIAN = server.User.model_construct(id="technician-1", email="t1@example.com", role=server.UserRole.TECHNICIAN)
+
+
+def request(path, query="", if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": path, "headers": headers, "query_string": query.encode()})
+
+
+async def repairs(query="", if_none_match=None, user=ADMIN):
+    return await server.get_repair_requests(request("/api/repairs", query, if_none_match), server.PAGE_LIMIT_DEFAULT, None, None, user)
+
+
+def test_unchanged_reads_get_304_until_a_write(database):
+    async def scenario():
+        customer = await server.create_customer(server.CustomerCreate(full_name="Müşteri", phone="05550000000"), ADMIN)
+        repair = server.RepairRequestCreate(customer_id=customer.id, device_type="Fırın", brand="Refsan", model="RF", description="test")
+        await server.create_repair_request(repair, ADMIN)
+
+        first = await repairs()
+        etag = first.headers["etag"]
+        assert first.status_code == 200 and first.headers["cache-control"] == "private, no-cache"
+        assert (await repairs(if_none_match=etag)).status_code == 304
+        assert (await repairs(if_none_match=f'W/"other", {etag}')).status_code == 304
+
+        # The tag depends on the caller and the query string
+        assert (await repairs(if_none_match=etag, user=TECHNICIAN)).status_code == 200
+        assert (await repairs("limit=5", if_none_match=etag)).status_code == 200
+
+        # Repairs show the customer's phone, so a customer edit changes the tag too
+        await server.update_customer(customer.id, server.CustomerUpdate(phone="05551111111"), ADMIN)
+        changed = await repairs(if_none_match=etag)
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+        assert b"05551111111" in changed.body
+
+        etag = changed.headers["etag"]
+        await server.create_repair_request(repair, ADMIN)
+        assert (await repairs(if_none_match=etag)).status_code == 200
+
+    asyncio.run(scenario())
+
+
+def test_stats_revalidate_against_counter_writes(database):
+    async def scenario():
+        stats = await server.get_stats(request("/api/stats"), ADMIN)
+        etag = stats.headers["etag"]
+        assert (await server.get_stats(request("/api/stats", if_none_match=etag), ADMIN)).status_code == 304
+
+        await server.create_customer(server.CustomerCreate(full_name="Müşteri", phone="05550000000"), ADMIN)
+        stats = await server.get_stats(request("/api/stats", if_none_match=etag), ADMIN)
+        assert stats.status_code == 200 and b'"total_customers":1' in stats.body
+
+    asyncio.run(scenario())
@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime, timezone
+
+import orjson
+from starlette.requests import Request
+
+import server
+
+
+ADMIN = server.User.model_construct(id="admin-1", email="admin@example.com", role=server.UserRole.ADMIN)
+
+
+def request(path):
+    return Request({"type": "http", "method": "GET", "path": path, "headers": [], "query_string": b""})
+
+
+def test_fast_path_rows_validate_to_the_response_model(database):
+    async def scenario():
+        customer = await server.create_customer(server.CustomerCreate(full_name="Müşteri", phone="05550000000"), ADMIN)
+        repair = server.RepairRequestCreate(customer_id=customer.id, device_type="Fırın", brand="Refsan", model="RF", description="test", cost_estimate=75.5, images=["/uploads/a.jpg"])
+        await server.create_repair_request(repair, ADMIN)
+        # A document from before payment tracking and images existed
+        created_at = datetime(2023, 5, 1, 12, 30, tzinfo=timezone.utc)
+        await database.repairs.insert_one({
+            "id": "legacy", "customer_id": customer.id, "customer_name": "Müşteri", "device_type": "Ocak",
+            "brand": "Refsan", "model": "RF", "description": "eski", "priority": "yuksek", "status": "tamamlandi",
+            "created_by": "admin-1", "created_at": created_at, "updated_at": created_at, "completed_at": created_at,
+        })
+
+        response = await server.get_repair_requests(request("/api/repairs"), server.PAGE_LIMIT_DEFAULT, None, None, ADMIN)
+        rows = orjson.loads(response.body)
+        assert len(rows) == 2
+        for row in rows:
+            document = await database.repairs.find_one({"id": row["id"]}, {"_id": 0})
+            document["customer_phone"] = "05550000000"
+            assert server.RepairRequest.model_validate(row) == server.RepairRequest(**document)
+            # Only model fields leave the server, never the search or visibility helpers
+            assert set(row) == set(server.RepairRequest.model_fields)
+
+        legacy = next(row for row in rows if row["id"] == "legacy")
+        assert legacy["images"] == [] and legacy["payment_status"] == "beklemede"
+        assert datetime.fromisoformat(legacy["created_at"]) == created_at
+
+    asyncio.run(scenario())
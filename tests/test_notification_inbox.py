@@ -0,0 +1,105 @@
+import asyncio
+
+import orjson
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def user(user_id, role):
+    return server.User.model_construct(id=user_id, email=f"{user_id}@example.com", role=role)
+
+
+ADMIN = user("admin-1", server.UserRole.ADMIN)
+OTHER_ADMIN = user("admin-2", server.UserRole.ADMIN)
+TECHNICIAN = user("technician-1", server.UserRole.TECHNICIAN)
+CUSTOMER = user("customer-user", server.UserRole.CUSTOMER)
+
+
+async def seed(database):
+    await database.users.insert_many([
+        {"id": account.id, "email": account.email, "full_name": account.id, "role": account.role.value, "is_active": True}
+        for account in (ADMIN, OTHER_ADMIN, TECHNICIAN, CUSTOMER)
+    ])
+    customer = await server.create_customer(server.CustomerCreate(full_name="Müşteri", email=CUSTOMER.email, phone="05550000000"), ADMIN)
+    repair = server.RepairRequestCreate(customer_id=customer.id, device_type="Fırın", brand="Refsan", model="RF", description="test")
+    repair_id = (await server.create_repair_request(repair, ADMIN)).id
+    await server.update_repair_request(repair_id, server.RepairRequestUpdate(assigned_technician_id=TECHNICIAN.id), ADMIN)
+    await server.update_repair_request(repair_id, server.RepairRequestUpdate(status=server.RepairStatus.IN_PROGRESS), ADMIN)
+
+
+async def unread(account):
+    return (await server.get_unread_notifications_count(account))["unread_count"]
+
+
+async def inbox(account, limit=50, after=None, unread_only=False):
+    response = await server.get_notifications(limit, after, unread_only, account)
+    return orjson.loads(response.body), response.headers.get("x-next-cursor")
+
+
+def test_every_recipient_gets_an_inbox_copy(database):
+    async def scenario():
+        await seed(database)
+        # Admins see everything: new customer, new repair, status update
+        assert await unread(ADMIN) == await unread(OTHER_ADMIN) == 3
+        # The technician was assigned after the repair was created; the customer's
+        # account matches the customer record by email
+        assert await unread(TECHNICIAN) == 1
+        assert await unread(CUSTOMER) == 2
+
+        notifications, _ = await inbox(TECHNICIAN)
+        assert [notification["type"] for notification in notifications] == ["repair_status_update"]
+        assert notifications[0]["recipient_id"] == TECHNICIAN.id
+
+    asyncio.run(scenario())
+
+
+def test_unread_counters_follow_reads_and_clears(database):
+    async def scenario():
+        await seed(database)
+        notifications, _ = await inbox(ADMIN)
+
+        await server.mark_notification_read(notifications[0]["id"], ADMIN)
+        await server.mark_notification_read(notifications[0]["id"], ADMIN)
+        assert await unread(ADMIN) == 2
+        assert await unread(OTHER_ADMIN) == 3
+        # Another admin's copy is not this admin's to read
+        with pytest.raises(HTTPException):
+            await server.mark_notification_read(notifications[1]["id"], OTHER_ADMIN)
+
+        assert await server.mark_notifications_read(server.NotificationReadRequest(ids=[notifications[1]["id"]]), ADMIN) == {"marked_read": 1}
+        assert [n["id"] for n in (await inbox(ADMIN, unread_only=True))[0]] == [notifications[2]["id"]]
+        assert await server.mark_notifications_read(server.NotificationReadRequest(), ADMIN) == {"marked_read": 1}
+        assert await server.mark_notifications_read(server.NotificationReadRequest(), ADMIN) == {"marked_read": 0}
+        assert await unread(ADMIN) == 0
+
+        await server.clear_all_notifications(OTHER_ADMIN)
+        assert await unread(OTHER_ADMIN) == 0 and (await inbox(OTHER_ADMIN))[0] == []
+        assert len((await inbox(ADMIN))[0]) == 3
+
+        incremental = await server.read_unread_counts([ADMIN.id, OTHER_ADMIN.id, TECHNICIAN.id, CUSTOMER.id])
+        await server.rebuild_notification_counters()
+        assert await server.read_unread_counts(list(incremental)) == incremental
+
+    asyncio.run(scenario())
+
+
+def test_inbox_pages_newest_first(database):
+    async def scenario():
+        await seed(database)
+        for index in range(4):
+            await server.create_notification(notification_type="test", title="Test", message=f"#{index}", related_id=None)
+
+        seen, after = [], None
+        while True:
+            page, after = await inbox(ADMIN, limit=2, after=after)
+            seen.extend(page)
+            if not after:
+                break
+        assert len(seen) == 7 and len({notification["id"] for notification in seen}) == 7
+        keys = [(notification["created_at"], notification["id"]) for notification in seen]
+        assert keys == sorted(keys, reverse=True)
+        assert {"#0", "#1", "#2", "#3"} <= {notification["message"] for notification in seen}
+
+    asyncio.run(scenario())
@@ -0,0 +1,48 @@
+import asyncio
+from datetime import datetime, timezone
+
+import server
+
+
+def test_replay_resumes_inside_a_batch_that_shares_a_timestamp(database):
+    async def scenario():
+        created_at = datetime(2024, 6, 1, 12, tzinfo=timezone.utc)
+        await database.notifications.insert_many([
+            {"id": f"n-{index}", "recipient_id": "admin-1", "title": "t", "message": "m", "read": False, "created_at": created_at}
+            for index in range(5)
+        ] + [{"id": "n-later", "recipient_id": "admin-1", "title": "t", "message": "m", "read": False,
+              "created_at": datetime(2024, 6, 1, 12, 1, tzinfo=timezone.utc)}])
+
+        replayed = await server.replay_notifications("admin-1", "n-1")
+        assert [notification["id"] for notification in replayed] == ["n-2", "n-3", "n-4", "n-later"]
+        assert await server.replay_notifications("admin-1", "unknown") == []
+
+    asyncio.run(scenario())
+
+
+def test_streams_receive_a_batch_in_replay_order(database, monkeypatch):
+    async def scenario():
+        await database.users.insert_one({"id": "admin-1", "email": "admin@example.com", "role": "admin", "is_active": True})
+        hub = server.NotificationHub(100)
+        monkeypatch.setattr(server, "notification_broker", server.MemoryBroker(hub))
+        queue = hub.subscribe("admin-1")
+        # Notifications created within one millisecond tie on the stored created_at
+        created_at = datetime(2024, 6, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+        writer = server.NotificationWriter(100, 50, 100, 1)
+        await writer.write([
+            {"notification": {"title": f"#{index}", "message": "m", "read": False, "created_at": created_at}, "user_ids": [], "customer_id": None}
+            for index in range(5)
+        ])
+
+        streamed = []
+        while not queue.empty():
+            event, data, event_id = queue.get_nowait()
+            if event == "notification":
+                streamed.append(event_id)
+        assert len(streamed) == 5
+        # Every later event of the batch replays after any of them
+        for position, event_id in enumerate(streamed):
+            replayed = await server.replay_notifications("admin-1", event_id)
+            assert [notification["id"] for notification in replayed] == streamed[position + 1:]
+
+    asyncio.run(scenario())
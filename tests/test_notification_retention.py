@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import server
+
+
+ADMIN = server.User.model_construct(id="admin-1", email="admin@example.com", role=server.UserRole.ADMIN)
+
+
+def notification(notification_id, created_at, read=False, recipient_id="admin-1"):
+    return {
+        "id": notification_id, "recipient_id": recipient_id, "type": "new_repair", "title": "Yeni",
+        "message": notification_id, "related_id": None, "read": read, "created_at": created_at,
+    }
+
+
+def test_compaction_archives_old_unread_and_expires_read(database):
+    async def scenario():
+        now = datetime.now(timezone.utc)
+        await database.notifications.insert_many([
+            notification("january", datetime(2024, 1, 15, tzinfo=timezone.utc)),
+            notification("february", datetime(2024, 2, 3, tzinfo=timezone.utc)),
+            notification("february-other", datetime(2024, 2, 4, tzinfo=timezone.utc), recipient_id="technician-1"),
+            notification("recent", now - timedelta(days=1)),
+            notification("old-read", datetime(2024, 1, 1, tzinfo=timezone.utc), read=True),
+        ])
+        await server.rebuild_notification_counters()
+
+        result = await server.compact_notifications(batch_size=2)
+        assert result == {
+            "archived": {"notifications_archive_2024_01": 1, "notifications_archive_2024_02": 2},
+            "expiring": 1,
+        }
+        assert sorted([n["id"] async for n in database.notifications.find({})]) == ["old-read", "recent"]
+        assert await server.read_unread_counts(["admin-1", "technician-1"]) == {"admin-1": 1, "technician-1": 0}
+
+        archived = await database.notifications_archive_2024_02.find_one({"_id": "february-other"})
+        assert archived["recipient_id"] == "technician-1" and archived["message"] == "february-other"
+        assert set(archived) == {"_id", *server.ARCHIVE_FIELDS}
+        old_read = await database.notifications.find_one({"id": "old-read"})
+        assert old_read["expires_at"] > now + timedelta(days=server.NOTIFICATION_READ_RETENTION_DAYS - 1)
+
+        # A second pass finds nothing left to do
+        assert await server.compact_notifications() == {"archived": {}, "expiring": 0}
+
+    asyncio.run(scenario())
+
+
+def test_reading_a_notification_schedules_its_expiry(database):
+    async def scenario():
+        await database.notifications.insert_one(notification("recent", datetime.now(timezone.utc)))
+        await server.rebuild_notification_counters()
+        await server.mark_notification_read("recent", ADMIN)
+        stored = await database.notifications.find_one({"id": "recent"})
+        assert stored["expires_at"] - stored["read_at"] == timedelta(days=server.NOTIFICATION_READ_RETENTION_DAYS)
+        assert "expires_at" in {key for index in server.INDEX_MANIFEST["notifications"] for key in index.document["key"]}
+
+    asyncio.run(scenario())
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.requests import Request
+
+import server
+
+
+ADMIN = {
+    "id": "admin-1",
+    "email": "admin@example.com",
+    "full_name": "Admin",
+    "role": "admin",
+    "is_active": True,
+}
+
+
+@pytest.fixture
+def stateless(database, monkeypatch):
+    monkeypatch.setattr(server, "AUTH_MODE", "stateless")
+    monkeypatch.setattr(server, "token_epochs", server.TokenEpochs(0))
+    monkeypatch.setattr(server, "notification_hub", server.NotificationHub(100))
+    asyncio.run(database.users.insert_one(dict(ADMIN)))
+
+
+def credentials(minutes=5):
+    token = server.create_access_token(server.user_token_claims(ADMIN), timedelta(minutes=minutes))
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def request():
+    return Request({"type": "http", "method": "GET", "path": "/api/notifications/stream", "headers": [], "query_string": b""})
+
+
+async def read_stream(response):
+    return [chunk async for chunk in response.body_iterator]
+
+
+def test_stream_tickets_are_single_use(database, stateless):
+    async def scenario():
+        issued = await server.create_stream_ticket(credentials())
+        assert issued["expires_in"] == server.NOTIFICATION_STREAM_TICKET_SECONDS
+        stored = await database.stream_tickets.find_one({})
+        # Only the hash is stored
+        assert stored["_id"] != issued["ticket"]
+
+        session = await server.get_stream_session(ticket=issued["ticket"], credentials=None)
+        assert session["user"].id == "admin-1" and session["user"].role == server.UserRole.ADMIN
+        with pytest.raises(HTTPException):
+            await server.get_stream_session(ticket=issued["ticket"], credentials=None)
+        with pytest.raises(HTTPException):
+            await server.get_stream_session(ticket=None, credentials=None)
+
+    asyncio.run(scenario())
+
+
+def test_expired_and_revoked_tickets_are_refused(database, stateless):
+    async def scenario():
+        expired = await server.create_stream_ticket(credentials())
+        await database.stream_tickets.update_one({}, {"$set": {"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+        with pytest.raises(HTTPException):
+            await server.get_stream_session(ticket=expired["ticket"], credentials=None)
+
+        revoked = await server.create_stream_ticket(credentials())
+        await server.token_epochs.bump("admin-1")
+        with pytest.raises(HTTPException):
+            await server.get_stream_session(ticket=revoked["ticket"], credentials=None)
+
+    asyncio.run(scenario())
+
+
+def test_stream_closes_when_the_token_is_revoked(database, stateless, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(server, "NOTIFICATION_STREAM_HEARTBEAT_SECONDS", 0.01)
+        session = await server.get_stream_session(ticket=(await server.create_stream_ticket(credentials()))["ticket"], credentials=None)
+        response = await server.stream_notifications(request(), None, session)
+
+        async def revoke():
+            await asyncio.sleep(0.05)
+            await server.token_epochs.bump("admin-1")
+
+        chunks, _ = await asyncio.wait_for(asyncio.gather(read_stream(response), revoke()), timeout=5)
+        assert chunks[0].startswith("retry:") and ": heartbeat\n\n" in chunks
+        assert server.notification_hub.subscribers == {}
+
+    asyncio.run(scenario())
+
+
+def test_stream_closes_when_the_token_expires(database, stateless):
+    async def scenario():
+        session = await server.get_stream_session(ticket=None, credentials=credentials())
+        session["expires_at"] = datetime.now(timezone.utc) + timedelta(milliseconds=50)
+        response = await server.stream_notifications(request(), None, session)
+
+        # The heartbeat is far longer; the wait is cut short at the token's expiry
+        chunks = await asyncio.wait_for(read_stream(response), timeout=5)
+        assert ": heartbeat\n\n" not in chunks
+
+    asyncio.run(scenario())
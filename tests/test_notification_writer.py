@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+ADMIN = server.User.model_construct(id="admin-1", email="admin@example.com", role=server.UserRole.ADMIN)
+
+
+@pytest.fixture
+def writer(database, monkeypatch):
+    """A writer installed as server.notification_writer, with an admin and a technician to notify"""
+    async def seed():
+        await database.users.insert_many([
+            {"id": "admin-1", "email": "admin@example.com", "role": "admin", "is_active": True},
+            {"id": "technician-1", "email": "tech@example.com", "role": "teknisyen", "is_active": True},
+        ])
+    asyncio.run(seed())
+    hub = server.NotificationHub(10_000)
+    monkeypatch.setattr(server, "notification_broker", server.MemoryBroker(hub))
+    writer = server.NotificationWriter(flush_size=100, flush_latency_ms=50, queue_size=1000, enqueue_timeout=1)
+    monkeypatch.setattr(server, "notification_writer", writer)
+    return writer
+
+
+def notification(index):
+    return server.Notification(type="repair_created", title="Yeni tamir", message=f"#{index}", related_id=f"repair-{index}").model_dump()
+
+
+def test_writer_batches_and_drains_on_stop(database, writer):
+    async def scenario():
+        writer.start()
+        hub_queue = server.notification_broker.hub.subscribe("technician-1")
+        for index in range(250):
+            await writer.add(notification(index), ["technician-1"])
+        await writer.stop()
+
+        stats = writer.stats()
+        assert stats["queued"] == 250 and stats["inline"] == 0 and stats["failed"] == 0
+        assert 3 <= stats["batches"] < 250
+        assert await database.notifications.count_documents({"recipient_id": "admin-1"}) == 250
+        assert await database.notifications.count_documents({"recipient_id": "technician-1"}) == 250
+        assert (await server.read_unread_counts(["admin-1", "technician-1"])) == {"admin-1": 250, "technician-1": 250}
+        # Every stored notification was published to its recipient's stream, plus the
+        # recipient's unread count once per batch
+        events = [hub_queue.get_nowait()[0] for _ in range(hub_queue.qsize())]
+        assert events.count("notification") == 250
+        assert events.count("unread_count") == stats["batches"]
+
+    asyncio.run(scenario())
+
+
+def test_writer_writes_inline_until_started(database, writer):
+    async def scenario():
+        await writer.add(notification(0))
+        assert writer.stats()["inline"] == 1
+        assert await database.notifications.count_documents({"recipient_id": "admin-1"}) == 1
+
+    asyncio.run(scenario())
+
+
+def test_clear_all_and_mark_all_read_cover_queued_notifications(database, writer):
+    async def scenario():
+        # A latency long enough that nothing is written unless flushed
+        writer.flush_latency = 60
+        writer.start()
+        try:
+            await writer.add(notification(0))
+            await writer.add(notification(1))
+            assert (await server.mark_notifications_read(server.NotificationReadRequest(), ADMIN)) == {"marked_read": 2}
+
+            await writer.add(notification(2))
+            response = await server.clear_all_notifications(ADMIN)
+            assert response["message"].startswith("3 ")
+            assert await database.notifications.count_documents({}) == 0
+            assert (await server.read_unread_counts(["admin-1"])) == {"admin-1": 0}
+        finally:
+            await writer.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,47 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import server
+
+
+async def seed(database, count):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    # Three customers share each timestamp, so pages must break ties on id
+    await database.customers.insert_many([
+        {"id": f"customer-{index:04d}", "full_name": f"Müşteri {index}", "created_at": start + timedelta(minutes=index // 3)}
+        for index in range(count)
+    ])
+
+
+async def read_all(database, limit, descending=False):
+    pages, after = [], None
+    while True:
+        items, after = await server.fetch_page(database.customers, {}, limit, after, {"_id": 0}, descending=descending)
+        pages.append([item["id"] for item in items])
+        if not after:
+            return pages
+
+
+def test_following_next_cursor_reads_every_row_once(database):
+    async def scenario():
+        await seed(database, 250)
+        expected = [f"customer-{index:04d}" for index in range(250)]
+
+        pages = await read_all(database, 100)
+        assert [len(page) for page in pages] == [100, 100, 50]
+        assert sum(pages, []) == expected
+
+        pages = await read_all(database, 100, descending=True)
+        assert sum(pages, []) == expected[::-1]
+
+    asyncio.run(scenario())
+
+
+def test_a_full_last_page_has_no_next_cursor(database):
+    async def scenario():
+        await seed(database, server.PAGE_LIMIT_DEFAULT)
+        items, next_cursor = await server.fetch_page(database.customers, {}, server.PAGE_LIMIT_DEFAULT)
+        assert len(items) == server.PAGE_LIMIT_DEFAULT
+        assert next_cursor is None
+
+    asyncio.run(scenario())
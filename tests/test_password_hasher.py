@@ -0,0 +1,40 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def test_hash_and_verify_run_off_the_event_loop():
+    async def scenario():
+        hasher = server.PasswordHasher(workers=2, max_queue=10)
+        hashed = await hasher.hash("gizli-şifre")
+        assert await hasher.verify("gizli-şifre", hashed)
+        assert not await hasher.verify("yanlış", hashed)
+        assert hasher.stats()["completed"] == 3
+
+    asyncio.run(scenario())
+
+
+def test_calls_beyond_the_workers_wait_and_beyond_the_queue_get_503():
+    async def scenario():
+        hasher = server.PasswordHasher(workers=2, max_queue=1)
+        release = threading.Event()
+        running = [asyncio.create_task(hasher.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        waiting = asyncio.create_task(hasher.run(release.wait))
+        await asyncio.sleep(0.05)
+        assert hasher.stats()["in_flight"] == 2 and hasher.stats()["queue_depth"] == 1
+
+        with pytest.raises(HTTPException) as error:
+            await hasher.run(release.wait)
+        assert error.value.status_code == 503 and error.value.headers["Retry-After"] == "1"
+
+        release.set()
+        assert await asyncio.gather(*running, waiting) == [True, True, True]
+        stats = hasher.stats()
+        assert stats["completed"] == 3 and stats["rejected"] == 1 and stats["in_flight"] == 0
+
+    asyncio.run(scenario())
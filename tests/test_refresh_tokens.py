@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+USER = {
+    "id": "user-1",
+    "email": "user@example.com",
+    "full_name": "User",
+    "role": "teknisyen",
+    "is_active": True,
+}
+
+
+def test_refresh_rotates_the_token(database):
+    async def scenario():
+        await database.users.insert_one(dict(USER))
+        first = await server.issue_refresh_token(USER["id"])
+
+        token = await server.refresh_access_token(server.RefreshRequest(refresh_token=first))
+        assert token.user.id == USER["id"]
+        assert server.decode_access_token(token.access_token)["uid"] == USER["id"]
+        assert token.refresh_token != first
+
+        # The rotated token works once more; the original no longer does
+        second = await server.refresh_access_token(server.RefreshRequest(refresh_token=token.refresh_token))
+        assert second.refresh_token not in (first, token.refresh_token)
+
+    asyncio.run(scenario())
+
+
+def test_reusing_a_refresh_token_revokes_the_family(database):
+    async def scenario():
+        await database.users.insert_one(dict(USER))
+        stolen = await server.issue_refresh_token(USER["id"])
+        rotated = (await server.refresh_access_token(server.RefreshRequest(refresh_token=stolen))).refresh_token
+        other_login = await server.issue_refresh_token(USER["id"])
+
+        with pytest.raises(HTTPException):
+            await server.refresh_access_token(server.RefreshRequest(refresh_token=stolen))
+        with pytest.raises(HTTPException):
+            await server.refresh_access_token(server.RefreshRequest(refresh_token=rotated))
+        # Other logins of the same user are untouched
+        assert (await server.refresh_access_token(server.RefreshRequest(refresh_token=other_login))).user.id == USER["id"]
+
+    asyncio.run(scenario())
+
+
+def test_logout_and_deactivation_end_refresh(database):
+    async def scenario():
+        await database.users.insert_one(dict(USER))
+        logged_out = await server.issue_refresh_token(USER["id"])
+        await server.logout(server.RefreshRequest(refresh_token=logged_out))
+        with pytest.raises(HTTPException):
+            await server.refresh_access_token(server.RefreshRequest(refresh_token=logged_out))
+
+        deactivated = await server.issue_refresh_token(USER["id"])
+        await database.users.update_one({"id": USER["id"]}, {"$set": {"is_active": False}})
+        with pytest.raises(HTTPException):
+            await server.refresh_access_token(server.RefreshRequest(refresh_token=deactivated))
+        assert await database.refresh_tokens.count_documents({}) == 0
+
+    asyncio.run(scenario())
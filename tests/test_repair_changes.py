@@ -0,0 +1,91 @@
+import asyncio
+
+import orjson
+
+import server
+
+
+ADMIN = server.User.model_construct(id="admin-1", email="admin@example.com", role=server.UserRole.ADMIN)
+TECHNICIAN = server.User.model_construct(id="technician-1", email="t1@example.com", role=server.UserRole.TECHNICIAN)
+
+
+async def seed(database):
+    await database.users.insert_many([
+        {"id": "admin-1", "email": "admin@example.com", "full_name": "Admin", "role": "admin", "is_active": True},
+        {"id": "technician-1", "email": "t1@example.com", "full_name": "Tek Bir", "role": "teknisyen", "is_active": True},
+    ])
+    customer = await server.create_customer(server.CustomerCreate(full_name="Müşteri", phone="05550000000"), ADMIN)
+    repair_ids = []
+    for device_type in ("Fırın", "Ocak", "Davlumbaz"):
+        repair = server.RepairRequestCreate(customer_id=customer.id, device_type=device_type, brand="Refsan", model="RF", description="test")
+        repair_id = (await server.create_repair_request(repair, ADMIN)).id
+        await server.update_repair_request(repair_id, server.RepairRequestUpdate(assigned_technician_id="technician-1"), ADMIN)
+        repair_ids.append(repair_id)
+    return repair_ids
+
+
+async def changes(since, user, limit=server.PAGE_LIMIT_DEFAULT):
+    return orjson.loads((await server.get_repair_changes(since, limit, user)).body)
+
+
+def test_changes_report_updates_deletes_and_scope_exits(database):
+    async def scenario():
+        watermark = (await changes(None, ADMIN))["next"]
+        kept, unassigned, deleted = await seed(database)
+
+        await server.update_repair_request(unassigned, server.RepairRequestUpdate(assigned_technician_id=""), ADMIN)
+        await server.delete_repair_request(deleted, ADMIN)
+
+        # The technician sees the unassigned repair as deleted
+        feed = await changes(watermark, TECHNICIAN)
+        assert not feed["reset"] and not feed["has_more"]
+        assert [repair["id"] for repair in feed["changed"]] == [kept]
+        assert sorted(feed["deleted"]) == sorted([unassigned, deleted])
+
+        # Admins still see it, so it is only a change for them
+        feed = await changes(watermark, ADMIN)
+        assert sorted(repair["id"] for repair in feed["changed"]) == sorted([kept, unassigned])
+        assert feed["deleted"] == [deleted]
+
+        # Reassigned back, it is a change again and not a deletion
+        await server.update_repair_request(unassigned, server.RepairRequestUpdate(assigned_technician_id="technician-1"), ADMIN)
+        feed = await changes(watermark, TECHNICIAN)
+        assert sorted(repair["id"] for repair in feed["changed"]) == sorted([kept, unassigned])
+        assert feed["deleted"] == [deleted]
+
+    asyncio.run(scenario())
+
+
+def test_changes_page_through_ties_with_the_watermark(database):
+    async def scenario():
+        watermark = (await changes(None, ADMIN))["next"]
+        repair_ids = await seed(database)
+
+        seen, since = [], watermark
+        while True:
+            feed = await changes(since, ADMIN, limit=1)
+            seen.extend(repair["id"] for repair in feed["changed"])
+            since = feed["next"]
+            if not feed["has_more"]:
+                break
+        assert sorted(seen) == sorted(repair_ids) and len(seen) == len(set(seen))
+
+    asyncio.run(scenario())
+
+
+def test_bulk_deletes_and_old_watermarks_force_a_reload(database):
+    async def scenario():
+        assert (await changes(None, ADMIN))["reset"]
+        old = server.encode_watermark(server.datetime.now(server.timezone.utc) - server.timedelta(days=server.REPAIR_TOMBSTONE_RETENTION_DAYS + 1))
+        assert (await changes(old, ADMIN))["reset"]
+
+        watermark = (await changes(None, ADMIN))["next"]
+        await seed(database)
+        assert not (await changes(watermark, ADMIN))["reset"]
+        # delete-all leaves no tombstones, so earlier watermarks cannot be replayed
+        await server.delete_all_repairs(ADMIN)
+        feed = await changes(watermark, ADMIN)
+        assert feed["reset"] and feed["changed"] == [] and feed["deleted"] == []
+        assert not (await changes(feed["next"], ADMIN))["reset"]
+
+    asyncio.run(scenario())
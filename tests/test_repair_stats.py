@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+def repair(index, **fields):
+    return {"id": f"repair-{index}", "status": "beklemede", "payment_status": "beklemede", "assigned_technician_id": "technician-1", **fields}
+
+
+REPAIRS = [
+    repair(0),
+    repair(1, final_cost=None),
+    repair(2, final_cost=0),
+    repair(3, status="tamamlandi", final_cost=120.5, payment_status="odendi"),
+    repair(4, status="tamamlandi", final_cost=80),
+    repair(5, status="isleniyor", final_cost=40, assigned_technician_id="technician-2"),
+    repair(6, status="iptal", final_cost=15, payment_status="odendi", assigned_technician_id=None),
+]
+
+
+def test_aggregated_stats_match_the_per_repair_counter_values(database):
+    async def scenario():
+        await database.repairs.insert_many([dict(document) for document in REPAIRS])
+
+        expected = {}
+        for document in REPAIRS:
+            for field, value in server.repair_counter_values(document).items():
+                expected[field] = expected.get(field, 0) + value
+        stats = await server.compute_repair_stats({})
+        assert stats == pytest.approx(expected)
+        assert stats["paid_repairs"] == 2 and stats["unpaid_repairs"] == 2
+        assert stats["total_paid_amount"] == pytest.approx(135.5)
+
+        by_technician = await server.group_repair_stats({"assigned_technician_id": {"$nin": [None, ""]}}, "$assigned_technician_id")
+        assert by_technician["technician-1"]["total_repairs"] == 5
+        assert by_technician["technician-2"]["unpaid_repairs"] == 1
+        # An empty match still has every field
+        assert await server.compute_repair_stats({"status": "reddedildi"}) == {
+            field: 0 for field in server.REPAIR_COUNTER_FIELDS
+        }
+
+    asyncio.run(scenario())
@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime, timezone
+
+import server
+
+
+ADMIN = server.User.model_construct(id="admin-1", email="admin@example.com", role=server.UserRole.ADMIN)
+
+
+def technician(user_id):
+    return server.User.model_construct(id=user_id, email=f"{user_id}@example.com", role=server.UserRole.TECHNICIAN)
+
+
+async def seed(database):
+    now = datetime.now(timezone.utc)
+    await database.users.insert_many([
+        {"id": "admin-1", "email": "admin@example.com", "full_name": "Admin", "role": "admin", "is_active": True},
+        {"id": "technician-1", "email": "t1@example.com", "full_name": "Tek Bir", "role": "teknisyen", "is_active": True},
+        {"id": "technician-2", "email": "t2@example.com", "full_name": "Tek İki", "role": "teknisyen", "is_active": True},
+    ])
+    await database.customers.insert_one({"id": "customer-1", "full_name": "Müşteri", "created_at": now})
+    repair = {
+        "id": "repair-1",
+        "customer_id": "customer-1",
+        "customer_name": "Müşteri",
+        "device_type": "Fırın",
+        "brand": "Refsan",
+        "model": "RF",
+        "description": "test",
+        "priority": "orta",
+        "status": "beklemede",
+        "payment_status": "beklemede",
+        "created_by": "admin-1",
+        "assigned_technician_id": "technician-1",
+        "assigned_technician_name": "Tek Bir",
+        "created_at": now,
+        "updated_at": now,
+    }
+    repair["visible_to_technicians"] = server.repair_visibility(repair, None)
+    await database.repairs.insert_one(repair)
+
+
+async def visible_ids(database, user):
+    return [repair["id"] async for repair in database.repairs.find(server.repair_scope_filter(user))]
+
+
+def test_unassigning_a_repair_hides_it_from_the_previous_technician(database):
+    async def scenario():
+        await seed(database)
+        assert await visible_ids(database, technician("technician-1")) == ["repair-1"]
+
+        # The React select sends "" for "no technician"
+        updated = await server.update_repair_request("repair-1", server.RepairRequestUpdate(assigned_technician_id=""), ADMIN)
+        assert updated.assigned_technician_id is None
+
+        repair = await database.repairs.find_one({"id": "repair-1"})
+        assert repair["assigned_technician_id"] is None and repair["assigned_technician_name"] is None
+        assert repair["visible_to_technicians"] == ["admin-1"]  # the creator
+        assert await visible_ids(database, technician("technician-1")) == []
+        tombstone = await database.repair_tombstones.find_one({"id": "repair-1"})
+        assert tombstone["scope_exit"] and tombstone["visible_to_technicians"] == ["technician-1"]
+
+    asyncio.run(scenario())
+
+
+def test_reassigning_a_repair_moves_it_between_technicians(database):
+    async def scenario():
+        await seed(database)
+        await server.update_repair_request("repair-1", server.RepairRequestUpdate(assigned_technician_id="technician-2"), ADMIN)
+
+        repair = await database.repairs.find_one({"id": "repair-1"})
+        assert repair["assigned_technician_name"] == "Tek İki"
+        assert await visible_ids(database, technician("technician-1")) == []
+        assert await visible_ids(database, technician("technician-2")) == ["repair-1"]
+
+    asyncio.run(scenario())
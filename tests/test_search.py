@@ -0,0 +1,21 @@
+import server
+
+
+def test_word_prefixes_of_statuses_stay_text_terms():
+    for word in ["red", "tam", "bek", "onay"]:
+        assert server.parse_search_query(word) == ([word], [word], set(), set())
+
+
+def test_whole_values_filter_repairs_and_still_search_customers():
+    customer_terms, repair_terms, statuses, priorities = server.parse_search_query("Acil Fırın beklemede")
+    assert customer_terms == ["acil", "firin", "beklemede"]
+    assert repair_terms == ["firin"]
+    assert statuses == {"beklemede"}
+    assert priorities == {"acil"}
+
+
+def test_explicit_filters_match_value_prefixes():
+    assert server.parse_search_query("durum:bekle öncelik:yük ahmet") == (["ahmet"], ["ahmet"], {"beklemede"}, {"yuksek"})
+    assert server.parse_search_query("status:tamam") == ([], [], {"tamamlandi"}, set())
+    # An explicit filter nothing matches finds no repairs instead of every repair
+    assert server.parse_search_query("durum:xyz") == ([], [], {"xyz"}, set())
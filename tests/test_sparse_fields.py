@@ -0,0 +1,56 @@
+import asyncio
+
+import orjson
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import server
+
+
+ADMIN = server.User.model_construct(id="admin-1", email="admin@example.com", role=server.UserRole.ADMIN)
+
+
+def request(path, fields):
+    return Request({"type": "http", "method": "GET", "path": path, "headers": [], "query_string": f"fields={fields}".encode()})
+
+
+async def repairs(fields):
+    response = await server.get_repair_requests(request("/api/repairs", fields), server.PAGE_LIMIT_DEFAULT, None, fields, ADMIN)
+    return orjson.loads(response.body)
+
+
+def test_fields_select_columns_and_keep_id_and_created_at(database):
+    async def scenario():
+        customer = await server.create_customer(server.CustomerCreate(full_name="Müşteri", phone="05550000000"), ADMIN)
+        repair = server.RepairRequestCreate(customer_id=customer.id, device_type="Fırın", brand="Refsan", model="RF", description="test")
+        await server.create_repair_request(repair, ADMIN)
+
+        assert set((await repairs("status,customer_name"))[0]) == {"id", "created_at", "status", "customer_name"}
+        # The phone comes from the customer lookup, which needs customer_id to run
+        row = (await repairs(" customer_phone ,"))[0]
+        assert set(row) == {"id", "created_at", "customer_phone"} and row["customer_phone"] == "05550000000"
+
+        with pytest.raises(HTTPException) as error:
+            await repairs("status,visible_to_technicians")
+        assert error.value.status_code == 400 and "visible_to_technicians" in error.value.detail
+
+    asyncio.run(scenario())
+
+
+def test_user_fields_never_include_the_password_hash(database):
+    async def scenario():
+        await database.users.insert_one({
+            "id": "user-1", "email": "user@example.com", "full_name": "User", "role": "teknisyen",
+            "is_active": True, "hashed_password": "secret",
+        })
+        response = await server.get_users(request("/api/users", "full_name"), server.PAGE_LIMIT_DEFAULT, None, "full_name", ADMIN)
+        [row] = orjson.loads(response.body)
+        assert set(row) == {"id", "created_at", "full_name"} and row["full_name"] == "User"
+
+        response = await server.get_users(request("/api/users", ""), server.PAGE_LIMIT_DEFAULT, None, None, ADMIN)
+        assert b"hashed_password" not in response.body and b"secret" not in response.body
+        with pytest.raises(HTTPException):
+            await server.get_users(request("/api/users", "hashed_password"), server.PAGE_LIMIT_DEFAULT, None, "hashed_password", ADMIN)
+
+    asyncio.run(scenario())
@@ -0,0 +1,87 @@
+import asyncio
+
+import server
+
+
+ADMIN = server.User.model_construct(id="admin-1", email="admin@example.com", role=server.UserRole.ADMIN)
+
+
+def technician(user_id):
+    return server.User.model_construct(id=user_id, email=f"{user_id}@example.com", role=server.UserRole.TECHNICIAN)
+
+
+async def seed(database):
+    await database.users.insert_many([
+        {"id": "admin-1", "email": "admin@example.com", "full_name": "Admin", "role": "admin", "is_active": True},
+        {"id": "technician-1", "email": "t1@example.com", "full_name": "Tek Bir", "role": "teknisyen", "is_active": True},
+        {"id": "technician-2", "email": "t2@example.com", "full_name": "Tek İki", "role": "teknisyen", "is_active": True},
+    ])
+    assert await server.rebuild_stats_counters() == [
+        {"scope": "global", "field": "total_technicians", "expected": 2, "actual": 0}
+    ]
+    customer = await server.create_customer(server.CustomerCreate(full_name="Müşteri", phone="05550000000"), ADMIN)
+    repairs = []
+    for device_type in ("Fırın", "Ocak", "Davlumbaz"):
+        repair = server.RepairRequestCreate(customer_id=customer.id, device_type=device_type, brand="Refsan", model="RF", description="test")
+        repairs.append((await server.create_repair_request(repair, ADMIN)).id)
+    return customer.id, repairs
+
+
+async def update(repair_id, **changes):
+    await server.update_repair_request(repair_id, server.RepairRequestUpdate(**changes), ADMIN)
+
+
+def test_counters_match_a_rebuild_after_every_write_path(database):
+    async def scenario():
+        customer_id, (completed, moved, removed) = await seed(database)
+
+        await update(completed, assigned_technician_id="technician-1", cost_estimate=100)
+        await update(completed, status=server.RepairStatus.COMPLETED, final_cost=250, payment_status=server.PaymentStatus.PAID)
+        await update(moved, assigned_technician_id="technician-1", final_cost=80)
+        await update(moved, assigned_technician_id="technician-2")
+        await update(moved, assigned_technician_id="")
+        await server.cancel_repair_request(removed, ADMIN)
+        assert (await server.read_counters(server.GLOBAL_SCOPE))["pending_repairs"] == 1
+        await server.update_repair_status(removed, server.RepairStatus.COMPLETED, ADMIN)
+        assert (await server.read_counters(server.GLOBAL_SCOPE))["completed_repairs"] == 2
+        await server.delete_repair_request(removed, ADMIN)
+
+        assert await server.read_stats(ADMIN) == {
+            "total_repairs": 2,
+            "pending_repairs": 1,
+            "completed_repairs": 1,
+            "total_customers": 1,
+            "total_technicians": 2,
+            "total_paid_amount": 250.0,
+            "total_unpaid_amount": 80.0,
+            "paid_repairs": 1,
+            "unpaid_repairs": 1,
+        }
+        assert await server.read_stats(technician("technician-1")) == {"my_repairs": 1, "my_pending": 0, "my_completed": 1}
+        assert await server.read_stats(technician("technician-2")) == {"my_repairs": 0, "my_pending": 0, "my_completed": 0}
+        assert await server.rebuild_stats_counters() == []
+
+        await server.delete_customer(customer_id, ADMIN)
+        counters = await server.read_counters(server.GLOBAL_SCOPE)
+        assert counters["total_repairs"] == counters["total_customers"] == 0
+        assert counters["total_paid_amount"] == counters["total_unpaid_amount"] == 0
+        assert await server.rebuild_stats_counters() == []
+
+    asyncio.run(scenario())
+
+
+def test_reconcile_reports_and_repairs_drift(database):
+    async def scenario():
+        _, (repair_id, _, _) = await seed(database)
+        await update(repair_id, assigned_technician_id="technician-1")
+        # A lost $inc, and a scope left behind by a repair that no longer exists
+        await database.stats_counters.update_one({"_id": "global"}, {"$inc": {"pending_repairs": -1}})
+        await database.stats_counters.insert_one({"_id": "technician:gone", "total_repairs": 1})
+
+        drift = await server.rebuild_stats_counters()
+        assert {"scope": "global", "field": "pending_repairs", "expected": 3, "actual": 2} in drift
+        assert {"scope": "technician:gone", "field": "total_repairs", "expected": 0, "actual": 1} in drift
+        assert await server.rebuild_stats_counters() == []
+        assert (await server.read_counters(server.GLOBAL_SCOPE))["pending_repairs"] == 3
+
+    asyncio.run(scenario())
@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import server
+
+
+def repair(index, created_by, assigned=..., status="beklemede", final_cost=None):
+    created_at = datetime(2024, 5, 1, 9, tzinfo=timezone.utc)
+    document = {
+        "id": f"repair-{index}",
+        "customer_id": "customer-1",
+        "status": status,
+        "final_cost": final_cost,
+        "payment_status": "beklemede",
+        "created_by": created_by,
+        "created_at": created_at,
+        "updated_at": created_at,
+        "completed_at": created_at + timedelta(hours=6) if status == "tamamlandi" else None,
+    }
+    if assigned is not ...:
+        document["assigned_technician_id"] = assigned
+    return document
+
+
+def test_leaderboard_credits_unassigned_repairs_to_their_creator_like_the_rollups(database):
+    async def scenario():
+        repairs = [
+            repair(0, "technician-1", "technician-2", status="tamamlandi", final_cost=100.0),
+            repair(1, "technician-1", ""),
+            repair(2, "technician-1", None),
+            repair(3, "technician-1"),
+            repair(4, "technician-2", "technician-2"),
+        ]
+        await database.repairs.insert_many(repairs)
+
+        grouped = await server.compute_technician_leaderboard(database=database)
+        assert set(grouped) == {"technician-1", "technician-2"}
+        assert grouped["technician-1"]["total_repairs"] == 3
+        assert grouped["technician-2"]["total_repairs"] == 2
+        assert grouped["technician-2"]["completed_repairs"] == 1
+        assert grouped["technician-2"]["revenue"] == 100.0
+        assert grouped["technician-2"]["avg_turnaround_hours"] == 6.0
+
+        # The daily rollups attribute the same way
+        opened = {}
+        for document in repairs:
+            for _, dimensions, values in server.repair_rollup_values(document):
+                if values.get("opened"):
+                    opened[dimensions["technician_id"]] = opened.get(dimensions["technician_id"], 0) + 1
+        assert opened == {technician_id: stats["total_repairs"] for technician_id, stats in grouped.items()}
+
+        # A repair migrate_dates has not converted yet still counts, without a turnaround
+        unconverted = repair(5, "technician-2", "technician-2", status="tamamlandi")
+        unconverted.update(created_at="2024-05-01T09:00:00", completed_at="2024-05-02T09:00:00")
+        await database.repairs.insert_one(unconverted)
+        grouped = await server.compute_technician_leaderboard(database=database)
+        assert grouped["technician-2"]["completed_repairs"] == 2
+        assert grouped["technician-2"]["avg_turnaround_hours"] == 6.0
+
+    asyncio.run(scenario())
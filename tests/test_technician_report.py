@@ -0,0 +1,78 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import orjson
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+ADMIN = server.User.model_construct(id="admin-1", email="admin@example.com", role=server.UserRole.ADMIN)
+
+
+def repair(index, created_at, **fields):
+    return {
+        "id": f"repair-{index:04d}", "customer_id": "customer-1", "customer_name": "Müşteri", "device_type": "Fırın",
+        "brand": "Refsan", "model": "RF", "description": "test", "priority": "orta", "status": "beklemede",
+        "payment_status": "beklemede", "created_by": "admin-1", "assigned_technician_id": "technician-1",
+        "final_cost": 10.0, "created_at": created_at, "updated_at": created_at, **fields,
+    }
+
+
+async def seed(database):
+    await database.users.insert_many([
+        {"id": "technician-1", "email": "t1@example.com", "full_name": "Tek Bir", "role": "teknisyen", "is_active": True},
+        {"id": "technician-2", "email": "t2@example.com", "full_name": "Tek İki", "role": "teknisyen", "is_active": True},
+    ])
+    start = datetime(2024, 3, 1, 9, tzinfo=timezone.utc)
+    # More than the old 1000-row cap, over three days
+    repairs = [repair(index, start + timedelta(days=index % 3, seconds=index)) for index in range(1050)]
+    # Created by the technician and never assigned: theirs too
+    repairs.append(repair(1050, start, assigned_technician_id=None, created_by="technician-1"))
+    # Created by the technician but assigned to someone else: not theirs
+    repairs.append(repair(1051, start, assigned_technician_id="technician-2", created_by="technician-1"))
+    await database.repairs.insert_many(repairs)
+    await server.rebuild_repair_rollups()
+
+
+def test_report_totals_cover_every_repair_and_pages_reach_them_all(database):
+    async def scenario():
+        await seed(database)
+        report = await server.get_technician_report("technician-1", None, None, 50, ADMIN)
+        assert report["summary"]["total_repairs"] == 1051
+        assert report["summary"]["total_cost"] == pytest.approx(10510.0)
+        assert report["repairs_by_date"] == {
+            "2024-03-01": {"count": 351, "total_cost": pytest.approx(3510.0), "total_estimate": 0.0},
+            "2024-03-02": {"count": 350, "total_cost": pytest.approx(3500.0), "total_estimate": 0.0},
+            "2024-03-03": {"count": 350, "total_cost": pytest.approx(3500.0), "total_estimate": 0.0},
+        }
+        assert len(report["repairs"]) == 50 and report["repairs_next_cursor"]
+
+        seen, after = [], None
+        while True:
+            response = await server.get_technician_report_repairs("technician-1", None, None, server.PAGE_LIMIT_MAX, after, ADMIN)
+            seen.extend(row["id"] for row in orjson.loads(response.body))
+            after = response.headers.get("x-next-cursor")
+            if not after:
+                break
+        assert len(seen) == len(set(seen)) == 1051 and "repair-1051" not in seen
+
+        day = await server.get_technician_report("technician-1", "2024-03-02", "2024-03-02", 50, ADMIN)
+        assert day["summary"]["total_repairs"] == 350
+        assert {row["created_at"].date().isoformat() for row in day["repairs"]} == {"2024-03-02"}
+
+    asyncio.run(scenario())
+
+
+def test_report_rejects_unknown_technicians_and_impossible_days(database):
+    async def scenario():
+        await seed(database)
+        with pytest.raises(HTTPException) as error:
+            await server.get_technician_report("nobody", None, None, 50, ADMIN)
+        assert error.value.status_code == 404
+        with pytest.raises(HTTPException) as error:
+            await server.get_technician_report_repairs("technician-1", "2024-02-30", None, 50, None, ADMIN)
+        assert error.value.status_code == 400
+
+    asyncio.run(scenario())
@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+import server
+
+
+def user(index, role):
+    return {
+        "id": f"user-{index}",
+        "email": f"user{index}@example.com",
+        "full_name": f"User {index}",
+        "role": role,
+        "is_active": True,
+        "token_epoch": index,
+    }
+
+
+def credentials(document):
+    token = server.create_access_token(server.user_token_claims(document), timedelta(minutes=5))
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_deleted_users_tokens_are_revoked(database, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(server, "AUTH_MODE", "stateless")
+        monkeypatch.setattr(server, "token_epochs", server.TokenEpochs(0))
+        admin, technician = user(0, "admin"), user(1, "teknisyen")
+        await database.users.insert_many([dict(admin), dict(technician)])
+        await server.issue_refresh_token(technician["id"])
+        admin_token, technician_token = credentials(admin), credentials(technician)
+        assert (await server.get_token_user(technician_token)).id == technician["id"]
+
+        assert await server.delete_users({"role": {"$ne": "admin"}}) == 1
+
+        with pytest.raises(HTTPException):
+            await server.get_token_user(technician_token)
+        assert (await server.get_token_user(admin_token)).id == admin["id"]
+        assert await database.refresh_tokens.count_documents({"user_id": technician["id"]}) == 0
+
+        # Other workers see the revocation once their mirror reloads
+        server.token_epochs.epochs = {}
+        with pytest.raises(HTTPException):
+            await server.get_token_user(technician_token)
+        revocation = await database.token_revocations.find_one({"_id": technician["id"]})
+        assert revocation["token_epoch"] == 2
+        assert revocation["expires_at"] > datetime.now(timezone.utc) + timedelta(minutes=server.ACCESS_TOKEN_EXPIRE_MINUTES - 1)
+
+    asyncio.run(scenario())
@@ -0,0 +1,70 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+import server
+
+
+ADMIN = server.User.model_construct(id="admin-1", email="admin@example.com", role=server.UserRole.ADMIN)
+
+
+def user(index, role="teknisyen"):
+    return {"id": f"user-{index}", "email": f"user{index}@example.com", "full_name": f"User {index}", "role": role, "is_active": True}
+
+
+def credentials(document):
+    token = server.create_access_token(server.user_token_claims(document), timedelta(minutes=5))
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.fixture
+def cache(database, monkeypatch):
+    cache = server.UserCache(enabled=True, ttl_seconds=60, max_size=2)
+    monkeypatch.setattr(server, "user_cache", cache)
+    monkeypatch.setattr(server, "token_epochs", server.TokenEpochs(0))
+    return cache
+
+
+def test_cached_users_are_copies_and_lru_bounded(database, cache):
+    async def scenario():
+        await database.users.insert_many([user(0), user(1), user(2)])
+        first = await cache.get("user0@example.com")
+        first["role"] = "admin"
+        assert (await cache.get("user0@example.com"))["role"] == "teknisyen"
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+        await cache.get("user1@example.com")
+        await cache.get("user0@example.com")
+        await cache.get("user2@example.com")
+        # user1 was the least recently used
+        assert list(cache.entries) == ["user0@example.com", "user2@example.com"]
+        assert await cache.get("nobody@example.com") is None
+
+    asyncio.run(scenario())
+
+
+def test_writes_invalidate_and_the_ttl_bounds_other_workers(database, cache):
+    async def scenario():
+        document = user(0)
+        await database.users.insert_one(dict(document))
+        old_token = credentials(document)
+        assert (await server.get_current_user(old_token)).role == server.UserRole.TECHNICIAN
+
+        await server.update_user_role("user-0", server.UserRole.ADMIN, ADMIN)
+        # The old token's role claim is revoked, a new login sees the new role at once
+        with pytest.raises(HTTPException):
+            await server.get_current_user(old_token)
+        fresh = await database.users.find_one({"id": "user-0"})
+        assert (await server.get_current_user(credentials(fresh))).role == server.UserRole.ADMIN
+
+        # A write from another worker is seen once the entry's TTL has run out
+        await database.users.update_one({"id": "user-0"}, {"$set": {"full_name": "Renamed"}})
+        assert (await cache.get("user0@example.com"))["full_name"] == "User 0"
+        cached_at, document = cache.entries["user0@example.com"]
+        cache.entries["user0@example.com"] = (cached_at - cache.ttl_seconds - 1, document)
+        assert (await cache.get("user0@example.com"))["full_name"] == "Renamed"
+
+    asyncio.run(scenario())